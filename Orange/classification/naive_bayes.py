@@ -51,6 +51,10 @@ class NaiveBayesModel(Model):
         if isinstance(data, Instance):
             data = Table(np.atleast_2d(data.x))
         if type(data) is Table:  # pylint: disable=unidiomatic-typecheck
+            columns = [data.get_column_codes(i)
+                       for i in range(len(data.domain.attributes))]
+            if columns and all(col is not None for col in columns):
+                return self._values_probs(self._code_probs(columns))
             return self.predict(data.X)
 
         if not len(data) or not len(data[0]):
@@ -77,7 +81,11 @@ class NaiveBayesModel(Model):
             probs = self._sparse_probs(X)
         else:
             probs = self._dense_probs(X)
-        probs = np.exp(probs)
+        return self._values_probs(probs)
+
+    @staticmethod
+    def _values_probs(log_probs):
+        probs = np.exp(log_probs)
         probs /= probs.sum(axis=1)[:, None]
         values = probs.argmax(axis=1)
         return values, probs
@@ -96,6 +104,16 @@ class NaiveBayesModel(Model):
             probs += probs0[col]
         return probs
 
+    def _code_probs(self, columns):
+        # columns are codes of a compact table; the largest code of the
+        # type, which stands for unknown values, picks the row of zeros
+        probs = self._priors(columns[0][0])
+        zeros = np.zeros((1, probs.shape[1]))
+        for (codes, _), attr_prob in zip(columns, self.log_cont_prob):
+            probs0 = np.vstack((attr_prob.T, zeros))
+            probs += probs0[np.minimum(codes, len(probs0) - 1)]
+        return probs
+
     def _sparse_probs(self, data):
         probs = self._priors(data)
 
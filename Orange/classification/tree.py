@@ -6,6 +6,7 @@ import sklearn.tree as skl_tree
 from Orange.base import TreeModel as TreeModelInterface
 from Orange.classification import SklLearner, SklModel, Learner
 from Orange.classification import _tree_scorers
+from Orange.data import Table
 from Orange.statistics import distribution, contingency
 from Orange.tree import Node, DiscreteNode, MappedDiscreteNode, \
     NumericNode, TreeModel
@@ -159,17 +160,18 @@ class TreeLearner(Learner):
 
         #######################################
         # The real _select_attr starts here
-        is_sparse = sp.issparse(data.X)
         domain = data.domain
         class_var = domain.class_var
+        if sp.issparse(data.X) and data.X.format != "csc":
+            # slicing columns of CSR matrices scans all stored values, so
+            # columns (and contingencies) are computed from a CSC copy
+            data = Table.from_numpy(domain, data.X.tocsc(), data.Y,
+                                    data.metas, data.W)
         best_score, *best_res = REJECT_ATTRIBUTE
         best_res = [Node(None, None, None)] + best_res[1:]
         disc_scorer = _score_disc_bin if self.binarize else _score_disc
         for attr_no, attr in enumerate(domain.attributes):
-            col_x = data.X[:, attr_no]
-            if is_sparse:
-                col_x = col_x.toarray()
-                col_x = col_x.flatten()
+            col_x = data.get_column_view(attr_no)[0]
             sc, *res = disc_scorer() if attr.is_discrete else _score_cont()
             if res[0] is not None and sc > best_score:
                 best_score, best_res = sc, res
@@ -30,6 +30,10 @@ _HAS_WARD_LINKAGE_FROM_DIST = \
     _LooseVersion(scipy.__version__) >= _LooseVersion("0.18") and \
     _HAS_NN_CHAIN
 
+# scipy >= 1.0 ships a compiled optimal leaf ordering
+_HAS_OPTIMAL_LEAF_ORDERING = \
+    hasattr(scipy.cluster.hierarchy, "optimal_leaf_ordering")
+
 
 def condensedform(X, mode="upper"):
     X = numpy.asarray(X)
@@ -137,6 +141,215 @@ def sample_clustering(X, linkage=AVERAGE, metric="euclidean"):
     return tree_from_linkage(Z)
 
 
+def data_linkage(X, linkage=AVERAGE, metric="euclidean", block_size=1024):
+    """
+    Return linkage computed directly from the data rows without storing
+    the (N, N) distance matrix.
+
+    Single linkage is computed from a minimum spanning tree (Prim's
+    algorithm), ward linkage with a nearest-neighbour chain over cluster
+    centroids, and average and complete linkage with a nearest-neighbour
+    chain that recomputes distances of the chain's head cluster to all
+    points in blocks of `block_size` rows. Memory use is linear in N;
+    the time of average and complete linkage grows with cluster sizes.
+
+    The result is the same as that of `scipy.cluster.hierarchy.linkage`.
+
+    :param numpy.ndarray X: A (N, M) array of data rows.
+    :param str linkage: Single, average, complete or ward linkage.
+    :param str metric:
+        A metric name accepted by `scipy.spatial.distance.cdist`; ward
+        linkage requires euclidean.
+    :param int block_size: Number of rows in a block of distances.
+    """
+    X = numpy.asarray(X, dtype=float)
+    assert len(X.shape) == 2
+    N = X.shape[0]
+    if N < 2:
+        raise ValueError("at least two rows are needed for clustering")
+    if linkage == SINGLE:
+        edges = _mst_edges(X, metric)
+    elif linkage == WARD:
+        if metric != "euclidean":
+            raise ValueError("ward linkage requires euclidean metric")
+        edges = _nn_chain_edges(N, _WardDistances(X))
+    elif linkage in (AVERAGE, COMPLETE):
+        edges = _nn_chain_edges(
+            N, _BlockDistances(X, linkage, metric, block_size))
+    else:
+        raise ValueError("invalid linkage for clustering from data: {}"
+                         .format(linkage))
+    return _label_edges(edges, N)
+
+
+def _mst_edges(X, metric):
+    """
+    Return the edges of a minimum spanning tree over rows of `X` as an
+    (N - 1, 3) array of (row, row, distance).
+    """
+    N = X.shape[0]
+    in_tree = numpy.zeros(N, dtype=bool)
+    dist = numpy.full(N, numpy.inf)
+    nearest = numpy.zeros(N, dtype=int)
+    edges = numpy.empty((N - 1, 3))
+    current = 0
+    for i in range(N - 1):
+        in_tree[current] = True
+        d = scipy.spatial.distance.cdist(
+            X[current:current + 1], X, metric=metric)[0]
+        closer = d < dist
+        dist[closer] = d[closer]
+        nearest[closer] = current
+        current = int(numpy.argmin(numpy.where(in_tree, numpy.inf, dist)))
+        edges[i] = nearest[current], current, dist[current]
+    return edges
+
+
+class _WardDistances:
+    """
+    Ward distances between clusters computed from their centroids.
+    Clusters are identified by one of their rows.
+    """
+    def __init__(self, X):
+        self.centroids = X.copy()
+        self.sizes = numpy.ones(X.shape[0])
+
+    def __call__(self, a):
+        diff = self.centroids - self.centroids[a]
+        dist = numpy.sqrt(numpy.einsum("ij,ij->i", diff, diff))
+        sizes = self.sizes
+        return dist * numpy.sqrt(2 * sizes[a] * sizes / (sizes[a] + sizes))
+
+    def merge(self, a, b, into):
+        na, nb = self.sizes[a], self.sizes[b]
+        self.centroids[into] = \
+            (na * self.centroids[a] + nb * self.centroids[b]) / (na + nb)
+        self.sizes[into] = na + nb
+
+
+class _BlockDistances:
+    """
+    Average or complete linkage distances between clusters computed in
+    blocks of rows from the data. Clusters are identified by one of their
+    rows.
+    """
+    def __init__(self, X, linkage, metric, block_size):
+        self.X = X
+        self.average = linkage == AVERAGE
+        self.metric = metric
+        self.block_size = block_size
+        self.labels = numpy.arange(X.shape[0])
+        self.sizes = numpy.ones(X.shape[0])
+
+    def __call__(self, a):
+        X, N = self.X, self.X.shape[0]
+        members = numpy.flatnonzero(self.labels == a)
+        agg = numpy.zeros(N) if self.average else numpy.full(N, -numpy.inf)
+        for start in range(0, len(members), self.block_size):
+            block = X[members[start:start + self.block_size]]
+            d = scipy.spatial.distance.cdist(block, X, metric=self.metric)
+            if self.average:
+                agg += d.sum(axis=0)
+            else:
+                numpy.maximum(agg, d.max(axis=0), out=agg)
+        if self.average:
+            sums = numpy.bincount(self.labels, weights=agg, minlength=N)
+            return sums / (self.sizes[a] * self.sizes)
+        dist = numpy.full(N, -numpy.inf)
+        numpy.maximum.at(dist, self.labels, agg)
+        return dist
+
+    def merge(self, a, b, into):
+        other = b if into == a else a
+        self.labels[self.labels == other] = into
+        self.sizes[into] = self.sizes[a] + self.sizes[b]
+
+
+def _nn_chain_edges(N, cluster_distances):
+    """
+    Return merges found by the nearest-neighbour chain algorithm as an
+    (N - 1, 3) array of (row, row, distance), where rows identify the
+    merged clusters.
+
+    `cluster_distances(a)` must return distances from cluster `a` to all
+    clusters (entries of inactive clusters are ignored), and
+    `cluster_distances.merge(a, b, into)` must merge clusters `a` and `b`
+    into cluster `into`.
+    """
+    active = numpy.ones(N, dtype=bool)
+    edges = numpy.empty((N - 1, 3))
+    chain = []
+    for i in range(N - 1):
+        if not chain:
+            chain.append(int(numpy.flatnonzero(active)[0]))
+        while True:
+            a = chain[-1]
+            dist = numpy.where(active, cluster_distances(a), numpy.inf)
+            dist[a] = numpy.inf
+            b = int(numpy.argmin(dist))
+            # prefer the previous chain element on ties to guarantee
+            # termination
+            if len(chain) > 1 and dist[chain[-2]] <= dist[b]:
+                b = chain[-2]
+            if len(chain) > 1 and b == chain[-2]:
+                break
+            chain.append(b)
+        chain = chain[:-2]
+        into = min(a, b)
+        edges[i] = a, b, dist[b]
+        cluster_distances.merge(a, b, into)
+        active[max(a, b)] = False
+    return edges
+
+
+def _label_edges(edges, N):
+    """
+    Return the linkage matrix for merges given as (N - 1, 3) array of
+    (row, row, distance) in arbitrary order.
+    """
+    parent = numpy.arange(2 * N - 1)
+    sizes = numpy.ones(2 * N - 1)
+
+    def find(x):
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    Z = numpy.empty((N - 1, 4))
+    order = numpy.argsort(edges[:, 2], kind="mergesort")
+    for i, (a, b, d) in enumerate(edges[order]):
+        ra, rb = find(int(a)), find(int(b))
+        parent[ra] = parent[rb] = N + i
+        sizes[N + i] = sizes[ra] + sizes[rb]
+        Z[i] = min(ra, rb), max(ra, rb), d, sizes[N + i]
+    return Z
+
+
+def linkage_from_tree(tree):
+    """
+    Return a linkage matrix encoding the clustering in a binary Tree.
+
+    This is the inverse of :func:`tree_from_linkage`.
+    """
+    N = tree.value.last - tree.value.first
+    ids = {}
+    Z = numpy.empty((N - 1, 4))
+    i = 0
+    for node in postorder(tree):
+        if node.is_leaf:
+            ids[node] = node.value.index
+        else:
+            left, right = node.branches
+            Z[i] = ids[left], ids[right], node.value.height, \
+                node.value.last - node.value.first
+            ids[node] = N + i
+            i += 1
+    return Z
+
+
 class Tree(object):
     __slots__ = ("__value", "__branches", "__hash")
 
@@ -422,6 +635,15 @@ def optimal_leaf_ordering(tree, distances, progress_callback=None):
         Function used to report on progress.
 
     """
+    if _HAS_OPTIMAL_LEAF_ORDERING and not tree.is_leaf:
+        # Use scipy's compiled implementation
+        Z = scipy.cluster.hierarchy.optimal_leaf_ordering(
+            linkage_from_tree(tree),
+            condensedform(numpy.asarray(distances, dtype=float)))
+        if progress_callback:
+            progress_callback(100.0)
+        return tree_from_linkage(Z)
+
     distances = numpy.asarray(distances)
     M = numpy.zeros_like(distances)
 
@@ -1,16 +1,71 @@
 import numpy as np
+import scipy.sparse as sp
 import sklearn.cluster as skl_cluster
 from sklearn.metrics import silhouette_samples, silhouette_score
+from sklearn.utils import check_random_state
 
 from Orange.data import Table, DiscreteVariable, Domain, Instance
 from Orange.projection import SklProjector, Projection
 from Orange.distance import Euclidean
 
 
-__all__ = ["KMeans"]
+__all__ = ["KMeans", "MiniBatchKMeans"]
 
 SILHOUETTE_MAX_SAMPLES = 5000
 
+
+def _compute_scores(proj, X, compute_silhouette, random_state=None):
+    """
+    Add silhouette score, inertia and inter-cluster distance to a fitted
+    scikit-learn clustering `proj`. Silhouettes of large data are computed
+    on a sample of `SILHOUETTE_MAX_SAMPLES` rows.
+    """
+    proj.silhouette = np.nan
+    proj.silhouette_samples = None
+    labels = proj.labels_
+    try:
+        if compute_silhouette and 2 <= proj.n_clusters < X.shape[0]:
+            if X.shape[0] <= SILHOUETTE_MAX_SAMPLES:
+                proj.silhouette_samples = silhouette_samples(X, labels)
+                proj.silhouette = np.mean(proj.silhouette_samples)
+            else:
+                proj.silhouette = silhouette_score(
+                    X, labels, sample_size=SILHOUETTE_MAX_SAMPLES,
+                    random_state=random_state)
+    except MemoryError:  # Pairwise dist in silhouette fails for large data
+        pass
+    proj.inertia = proj.inertia_ / X.shape[0]
+    cluster_dist = Euclidean(proj.cluster_centers_)
+    proj.inter_cluster = np.mean(cluster_dist[np.triu_indices_from(cluster_dist, 1)])
+    return proj
+
+
+def warm_start_centroids(X, centroids, n_clusters, random_state=None):
+    """
+    Return initial centroids for `n_clusters` clusters that extend the given
+    `centroids` (e.g. of a clustering with fewer clusters) with new ones
+    chosen by k-means++ seeding on `X`.
+
+    The result can be passed as `init` to :obj:`KMeans` or
+    :obj:`MiniBatchKMeans` when sweeping over the number of clusters.
+    """
+    random_state = check_random_state(random_state)
+    centroids = np.asarray(centroids, dtype=float)[:n_clusters]
+    if sp.issparse(X):
+        X = X.toarray()
+    dist = np.min(Euclidean(X, centroids), axis=1) ** 2
+    new = []
+    for _ in range(n_clusters - len(centroids)):
+        total = dist.sum()
+        if total > 0:
+            i = random_state.choice(len(X), p=dist / total)
+        else:
+            i = random_state.randint(len(X))
+        new.append(X[i])
+        dist = np.minimum(dist, np.sum((X - X[i]) ** 2, axis=1))
+    return np.vstack([centroids] + new)
+
+
 class KMeans(SklProjector):
     __wraps__ = skl_cluster.KMeans
 
@@ -24,25 +79,96 @@ class KMeans(SklProjector):
     def fit(self, X, Y=None):
         proj = skl_cluster.KMeans(**self.params)
         proj = proj.fit(X, Y)
-        proj.silhouette = np.nan
-        try:
-            if self._compute_silhouette and 2 <= proj.n_clusters < X.shape[0]:
-                if X.shape[0] <= SILHOUETTE_MAX_SAMPLES:
-                    proj.silhouette_samples = \
-                        silhouette_samples(X, proj.labels_)
-                    proj.silhouette = np.mean(proj.silhouette_samples)
-                else:
-                    proj.silhouette_samples = None
-                    proj.silhouette = \
-                        silhouette_score(X, proj.labels_, sample_size=SILHOUETTE_MAX_SAMPLES)
-        except MemoryError:  # Pairwise dist in silhouette fails for large data
-            pass
-        proj.inertia = proj.inertia_ / X.shape[0]
-        cluster_dist = Euclidean(proj.cluster_centers_)
-        proj.inter_cluster = np.mean(cluster_dist[np.triu_indices_from(cluster_dist, 1)])
+        _compute_scores(proj, X, self._compute_silhouette,
+                        self.params["random_state"])
         return KMeansModel(proj, self.preprocessors)
 
 
+class MiniBatchKMeans(SklProjector):
+    """
+    k-Means on mini batches, which can also be fitted incrementally with
+    `partial_fit` on chunks of data or streamed from a (database) table
+    with `fit_chunks`.
+    """
+    __wraps__ = skl_cluster.MiniBatchKMeans
+    name = 'mini-batch k-means'
+
+    def __init__(self, n_clusters=8, init='k-means++', max_iter=100,
+                 batch_size=100, tol=0.0, max_no_improvement=10,
+                 init_size=None, n_init=3, reassignment_ratio=0.01,
+                 random_state=None, preprocessors=None,
+                 compute_silhouette_score=False):
+        super().__init__(preprocessors=preprocessors)
+        self.params = vars()
+        self._compute_silhouette = compute_silhouette_score
+
+    def fit(self, X, Y=None):
+        proj = skl_cluster.MiniBatchKMeans(**self.params)
+        proj = proj.fit(X, Y)
+        _compute_scores(proj, X, self._compute_silhouette,
+                        self.params["random_state"])
+        return MiniBatchKMeansModel(proj, self.preprocessors)
+
+    def partial_fit(self, data):
+        """
+        Return a model fitted on the first chunk of data; further chunks
+        are passed to the model's `partial_fit`.
+        """
+        data = self.preprocess(data)
+        self.domain = data.domain
+        proj = skl_cluster.MiniBatchKMeans(**self.params)
+        proj = proj.partial_fit(data.X)
+        model = MiniBatchKMeansModel(proj, self.preprocessors)
+        model.pre_domain = data.domain
+        model.name = self.name
+        model.compute_silhouette = self._compute_silhouette
+        model.partial_fit(data, refit=False)
+        return model
+
+    def fit_chunks(self, data, chunk_size=10000, max_chunks=None):
+        """
+        Fit the model by streaming the data in chunks of `chunk_size` rows.
+
+        Tables in memory are passed in consecutive chunks of rows. Tables
+        stored in a database (`SqlTable`) are not downloaded; each chunk is
+        a random sample of about `chunk_size` rows.
+
+        Args:
+            data (Table): data
+            chunk_size (int): number of rows in a chunk
+            max_chunks (int): maximal number of chunks (by default, the
+                number of chunks that covers all rows)
+
+        Returns:
+            MiniBatchKMeansModel
+        """
+        model = None
+        for chunk in _iter_chunks(data, chunk_size, max_chunks):
+            if model is None:
+                model = self.partial_fit(chunk)
+            else:
+                model.partial_fit(chunk)
+        return model
+
+
+def _iter_chunks(data, chunk_size, max_chunks=None):
+    n = data.approx_len()
+    n_chunks = max(1, int(np.ceil(n / chunk_size)))
+    if max_chunks is not None:
+        n_chunks = min(n_chunks, max_chunks)
+    if hasattr(data, "sample_percentage"):
+        percent = min(100, chunk_size / n * 100) if n else 100
+        for _ in range(n_chunks):
+            chunk = data.sample_percentage(percent, no_cache=True)
+            if not chunk:
+                continue
+            chunk.download_data(10 * chunk_size, partial=True)
+            yield Table.from_numpy(chunk.domain, chunk.X, chunk.Y, chunk.metas)
+    else:
+        for start in range(0, n_chunks * chunk_size, chunk_size):
+            yield data[start:start + chunk_size]
+
+
 class KMeansModel(Projection):
     def __init__(self, proj, preprocessors=None):
         super().__init__(proj=proj)
@@ -70,3 +196,26 @@ class KMeansModel(Projection):
                 np.atleast_2d(self.proj.predict(data._x.reshape(1, -1))).astype(int))
         else:
             return self.proj.predict(data).reshape((data.shape[0], 1))
+
+
+class MiniBatchKMeansModel(KMeansModel):
+    compute_silhouette = False
+
+    def partial_fit(self, data, refit=True):
+        """
+        Update the clustering with a chunk of data. Scores (silhouette,
+        inertia) are computed on the last chunk.
+        """
+        if isinstance(data, Table):
+            if data.domain is not self.pre_domain:
+                data = data.transform(self.pre_domain)
+            X = data.X
+        else:
+            X = data
+        if refit:
+            self.proj.partial_fit(X)
+        _compute_scores(self.proj, X, self.compute_silhouette,
+                        self.proj.random_state)
+        self.__dict__.update(self.proj.__dict__)
+        self.centroids = self.proj.cluster_centers_
+        return self
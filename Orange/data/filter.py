@@ -530,7 +530,7 @@ class FilterStringList(ValueFilter):
         if self.case_sensitive:
             return value in self._values
         else:
-            return value.lower() in self.values_lower
+            return str(value).lower() in self.values_lower
 
 
 class FilterRegex(ValueFilter):
@@ -8,7 +8,7 @@ import sys
 import warnings
 
 from ast import literal_eval
-from collections import OrderedDict, Counter, defaultdict
+from collections import OrderedDict, Counter
 from functools import lru_cache
 from importlib import import_module
 from itertools import chain, repeat
@@ -160,7 +160,7 @@ def guess_data_type(orig_values, namask=None):
         except ValueError:
             tvar = TimeVariable('_')
             try:
-                values[~namask] = [tvar.parse(i) for i in orig_values[~namask]]
+                values[~namask] = tvar.parse_array(orig_values[~namask])
             except ValueError:
                 coltype = StringVariable
                 # return original_values
@@ -191,17 +191,7 @@ def sanitize_variable(valuemap, values, orig_values, coltype, coltype_kwargs,
     if isinstance(var, DiscreteVariable):
         # Map discrete data to 'ints' (or at least what passes as int around
         # here)
-        mapping = defaultdict(
-            lambda: np.nan,
-            {val: i for i, val in enumerate(var.values)},
-        )
-        mapping[""] = np.nan
-        mapvalues_ = np.frompyfunc(mapping.__getitem__, 1, 1)
-
-        def mapvalues(arr):
-            arr = np.asarray(arr, dtype=object)
-            return mapvalues_(arr, out=np.empty_like(arr, dtype=float))
-        values = mapvalues(orig_values)
+        values = var.encode(orig_values, strict=False)
 
     if coltype is StringVariable:
         values = orig_values
@@ -221,7 +211,7 @@ def sanitize_variable(valuemap, values, orig_values, coltype, coltype_kwargs,
         # Re-parse the values because only now after coltype.make call
         # above, variable var is the correct one
         _var = var if isinstance(var, TimeVariable) else TimeVariable('_')
-        values = [_var.parse(i) for i in orig_values]
+        values = _var.parse_array(orig_values)
 
     return values, var
 
@@ -1,6 +1,9 @@
 """Pandas DataFrame↔Table conversion helpers"""
+from collections import OrderedDict
+
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 from pandas.api.types import (
     is_categorical_dtype, is_object_dtype,
     is_datetime64_any_dtype, is_numeric_dtype,
@@ -50,6 +53,11 @@ def table_from_frame(df, *, force_nominal=False):
                                        df.index.is_monotonic_decreasing)):
         df = df.reset_index()
 
+    # A frame with only float columns is viewed as X, without copying
+    if len(df.columns) and all(dtype == np.float64 for dtype in df.dtypes):
+        attrs = [ContinuousVariable(str(name)) for name in df.columns]
+        return Table.from_numpy(Domain(attrs), df.values)
+
     attrs, metas = [], []
     X, M = [], []
 
@@ -59,12 +67,13 @@ def table_from_frame(df, *, force_nominal=False):
         if _is_discrete(s):
             discrete = s.astype('category').cat
             attrs.append(DiscreteVariable(name, discrete.categories.astype(str).tolist()))
-            X.append(discrete.codes.replace(-1, np.nan).values)
+            codes = discrete.codes.values
+            X.append(np.where(codes == -1, np.nan, codes))
         elif _is_datetime(s):
             tvar = TimeVariable(name)
             attrs.append(tvar)
             s = pd.to_datetime(s, infer_datetime_format=True)
-            X.append(s.astype('str').replace('NaT', np.nan).map(tvar.parse).values)
+            X.append(tvar.parse_array(s.values))
         elif is_numeric_dtype(s):
             attrs.append(ContinuousVariable(name))
             X.append(s.values)
@@ -78,50 +87,73 @@ def table_from_frame(df, *, force_nominal=False):
                             np.column_stack(M) if M else None)
 
 
-def table_to_frame(tab):
+def table_to_frame(tab, include_metas=False):
     """
     Convert Orange.data.Table to pandas.DataFrame
 
+    If all attributes are continuous with decimal values, the columns of the
+    frame for attributes are a view of the table's X (they share memory).
+
     Parameters
     ----------
     tab : Table
+    include_metas : bool
+        If True, include meta attributes (copied as object columns).
 
     Returns
     -------
     pandas.DataFrame
     """
     def _column_to_series(col, vals):
-        result = ()
+        if col.is_primitive():
+            vals = vals.astype(float)
         if col.is_discrete:
-            codes = pd.Series(vals).fillna(-1).astype(int)
-            result = (col.name, pd.Categorical.from_codes(codes=codes, categories=col.values,
-                                                          ordered=col.ordered))
+            codes = np.where(np.isnan(vals), -1, vals).astype(int)
+            return pd.Categorical.from_codes(codes=codes, categories=col.values,
+                                             ordered=col.ordered)
         elif col.is_time:
-            result = (col.name, pd.to_datetime(vals, unit='s').to_series().reset_index()[0])
+            return pd.to_datetime(vals, unit='s')
         elif col.is_continuous:
-            dt = float
             # np.nan are not compatible with int column
-            nan_values_in_column = [t for t in vals if np.isnan(t)]
-            if col.number_of_decimals == 0 and len(nan_values_in_column) == 0:
-                dt = int
-            result = (col.name, pd.Series(vals).astype(dt))
+            if _is_integer(col, vals):
+                return vals.astype(int)
+            return vals
         elif col.is_string:
-            result = (col.name, pd.Series(vals))
-        return result
+            return vals
+        return None
+
+    def _is_integer(col, vals):
+        return col.is_continuous and not col.is_time \
+            and col.number_of_decimals == 0 and not np.isnan(vals).any()
+
+    def _is_float(col, vals):
+        return col.is_continuous and not col.is_time \
+            and not _is_integer(col, vals)
 
-    def _columns_to_series(cols, vals):
-        return [_column_to_series(col, vals[:, i]) for i, col in enumerate(cols)]
+    def _columns(cols, vals):
+        if sp.issparse(vals):
+            vals = vals.toarray()
+        return [(col.name, _column_to_series(col, vals[:, i]))
+                for i, col in enumerate(cols)]
 
-    x, y, metas = [], [], []
     domain = tab.domain
-    if domain.attributes:
-        x = _columns_to_series(domain.attributes, tab.X)
+    index = pd.RangeIndex(len(tab))
+    frames, columns = [], []
+    if domain.attributes and not sp.issparse(tab.X) \
+            and all(_is_float(col, tab.X[:, i])
+                    for i, col in enumerate(domain.attributes)):
+        frames.append(pd.DataFrame(
+            tab.X, columns=[var.name for var in domain.attributes],
+            index=index, copy=False))
+    else:
+        columns += _columns(domain.attributes, tab.X)
     if domain.class_vars:
         y_values = tab.Y.reshape(tab.Y.shape[0], len(domain.class_vars))
-        y = _columns_to_series(domain.class_vars, y_values)
-    if domain.metas:
-        metas = _columns_to_series(domain.metas, tab.metas)
-    all_series = dict(x + y + metas)
-    original_column_order = [var.name for var in tab.domain.variables]
-    unsorted_columns_df = pd.DataFrame(all_series)
-    return unsorted_columns_df[original_column_order]
+        columns += _columns(domain.class_vars, y_values)
+    if include_metas and domain.metas:
+        columns += _columns(domain.metas, tab.metas)
+    if columns or not frames:
+        frames.append(pd.DataFrame(OrderedDict(columns), index=index))
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, axis=1, copy=False)
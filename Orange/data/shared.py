@@ -0,0 +1,196 @@
+"""
+Sharing tables between processes through memory-mapped files.
+
+:obj:`SharedTable` (see :obj:`Orange.data.Table.to_shared`) writes the
+numeric arrays of a table into a file, preferably in shared memory
+(`/dev/shm`, if the arrays fit into it; otherwise in the temporary
+directory), and keeps just the names of the arrays and their positions in
+the file. It is small to pickle, so it can be sent to worker processes,
+which map the file into memory instead of receiving copies of the arrays::
+
+    with data.to_shared() as shared:
+        results = pool.map(function, [(shared, fold) for fold in folds])
+
+    def function(args):
+        shared, fold = args
+        data = Table.from_shared(shared)
+
+Arrays of objects (e.g. meta attributes with strings) cannot be mapped and
+are pickled with the handle.
+
+The file is removed when the table's owner closes the handle or when the
+handle is garbage collected in the process that created it; processes
+must map the file before that. Arrays are mapped copy-on-write, so changes
+in a worker do not affect other processes.
+"""
+import atexit
+import os
+import tempfile
+import weakref
+
+import numpy as np
+import scipy.sparse as sp
+
+__all__ = ["SharedTable"]
+
+# offsets of arrays in the file are aligned to cache lines
+ALIGNMENT = 64
+
+# files that could not be removed yet because they are still mapped (Windows)
+_pending_removal = set()
+
+
+def _shared_memory_dir(nbytes=0):
+    # shared memory is often small (e.g. 64 MB in containers), so it is used
+    # only if the arrays fit into it
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        try:
+            stat = os.statvfs("/dev/shm")
+        except OSError:
+            return None
+        if stat.f_bavail * stat.f_frsize >= nbytes:
+            return "/dev/shm"
+    return None  # the default temporary directory
+
+
+class SharedTable:
+    """
+    A handle to numeric arrays of a table, stored in a file that can be
+    mapped into memory by other processes.
+
+    Attributes:
+        filename (str): the name of the file with arrays
+        domain (Domain): the domain of the table
+        name (str): the name of the table
+        attributes (dict): the attributes of the table
+    """
+    def __init__(self, table, directory=None):
+        self.domain = table.domain
+        self.name = getattr(table, "name", "")
+        self.attributes = getattr(table, "attributes", {})
+        # for each array: its description for mapping or the array itself
+        self.layout = {}
+        self.sparse = {}
+
+        arrays = {"_Y": table._Y, "W": table.W, "ids": table.ids}
+        for name in ("X", "metas"):
+            array = getattr(table, name)
+            if sp.issparse(array):
+                array = array.tocsr()
+                self.sparse[name] = array.shape
+                arrays.update({(name, "data"): array.data,
+                               (name, "indices"): array.indices,
+                               (name, "indptr"): array.indptr})
+            else:
+                arrays[name] = array
+
+        arrays = {name: np.ascontiguousarray(array)
+                  for name, array in arrays.items()}
+        if directory is not None:
+            self._write(arrays, directory)
+            return
+        nbytes = sum(array.nbytes + ALIGNMENT for array in arrays.values()
+                     if array.dtype != object)
+        directory = _shared_memory_dir(nbytes)
+        try:
+            self._write(arrays, directory)
+        except OSError:
+            if directory is None:
+                raise
+            # e.g. shared memory was filled by others in the meantime
+            self._write(arrays, None)
+
+    def _write(self, arrays, directory):
+        fd, self.filename = tempfile.mkstemp(
+            prefix="orange-", suffix=".shared", dir=directory)
+        # forked children inherit the finalizer, so it checks the process
+        self._pid = os.getpid()
+        self._finalizer = weakref.finalize(
+            self, _remove, self.filename, self._pid)
+        self.layout = {}
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for name, array in arrays.items():
+                    if array.dtype == object or not array.size:
+                        self.layout[name] = array
+                        continue
+                    offset = -f.tell() % ALIGNMENT
+                    f.write(bytes(offset))
+                    self.layout[name] = \
+                        (f.tell(), array.dtype.str, array.shape)
+                    array.tofile(f)
+        except OSError:
+            # do not leave a partial file until the handle is collected
+            self._finalizer()
+            raise
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        # only the creator removes the file
+        state["_finalizer"] = None
+        return state
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    @property
+    def closed(self):
+        """`True` if the file has been removed by this handle"""
+        return self._is_owner() and not self._finalizer.alive
+
+    def close(self):
+        """
+        Remove the file with arrays. Tables that were already constructed
+        from the handle remain valid. Handles received by other processes
+        cannot be closed.
+
+        On Windows, files that are still mapped cannot be removed; their
+        removal is retried at next removals and at exit.
+        """
+        if self._is_owner():
+            self._finalizer()
+
+    def _is_owner(self):
+        return self._finalizer is not None and self._pid == os.getpid()
+
+    def arrays(self):
+        """
+        Return a dictionary with arrays (`X`, `_Y`, `metas`, `W` and `ids`)
+        that are mapped from the file.
+        """
+        mapped = {}
+        for name, desc in self.layout.items():
+            if isinstance(desc, np.ndarray):
+                mapped[name] = desc.copy()
+            else:
+                offset, dtype, shape = desc
+                mapped[name] = np.asarray(np.memmap(
+                    self.filename, dtype=dtype, mode="c", offset=offset,
+                    shape=shape))
+        for name, shape in self.sparse.items():
+            mapped[name] = sp.csr_matrix(
+                (mapped.pop((name, "data")), mapped.pop((name, "indices")),
+                 mapped.pop((name, "indptr"))), shape=shape, copy=False)
+        return mapped
+
+
+def _remove(filename, pid):
+    if os.getpid() != pid:
+        return
+    _pending_removal.add(filename)
+    _remove_pending()
+
+
+@atexit.register
+def _remove_pending():
+    for filename in list(_pending_removal):
+        try:
+            os.remove(filename)
+        except FileNotFoundError:
+            pass
+        except OSError:  # still mapped
+            continue
+        _pending_removal.discard(filename)
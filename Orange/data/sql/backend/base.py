@@ -1,15 +1,215 @@
 import logging
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
 from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from time import monotonic
+
+import numpy as np
 
 from Orange.util import Registry
 
 log = logging.getLogger(__name__)
 
+#: Number of seconds after which cached metadata (row counts, statistics,
+#: distinct values) is queried from the database again
+METADATA_CACHE_TTL = 600
+#: Number of threads executing queries submitted with Backend.submit_query
+QUERY_THREADS = 4
+#: Number of rows inserted with a single query by Backend.create_rows_table
+ROWS_PER_INSERT = 1000
+#: Number of seconds after which unused samples are dropped when new samples
+#: are drawn and when the backend is closed
+SAMPLE_MAX_AGE = 24 * 3600
+
+_query_executor = None
+_query_executor_lock = threading.Lock()
+# the future of the asynchronous query that runs in the current thread
+_running_query = threading.local()
+
+
+def _get_query_executor():
+    global _query_executor
+    with _query_executor_lock:
+        if _query_executor is None:
+            _query_executor = ThreadPoolExecutor(
+                QUERY_THREADS, thread_name_prefix="sql-query")
+        return _query_executor
+
 
 class BackendError(Exception):
     pass
 
 
+class MetadataCache:
+    """Cache of metadata about tables, such as row counts, statistics and
+    distinct values of fields.
+
+    Entries are keyed by the table (or sql query) they describe and by the
+    query that computed them, which includes any active filters. Entries
+    expire after `ttl` seconds; the least recently used entries are dropped
+    when there are more than `maxsize` of them.
+
+    Parameters
+    ----------
+    ttl : Optional[float]
+        time to live of entries in seconds (default: METADATA_CACHE_TTL)
+    maxsize : int
+        maximal number of entries
+    """
+    def __init__(self, ttl=None, maxsize=1024):
+        self.ttl = METADATA_CACHE_TTL if ttl is None else ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, table_name, key, compute):
+        """Return the cached value for `key` of the table or, if the entry is
+        missing or expired, compute it by calling `compute()` and store it.
+        """
+        key = (table_name, key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                return entry[1]
+        now = monotonic()
+        value = compute()
+        with self._lock:
+            self._entries[key] = (now, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, table_name=None):
+        """Remove entries for the given table, or all entries if `table_name`
+        is `None`."""
+        with self._lock:
+            if table_name is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries
+                            if key[0] == table_name]:
+                    del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __reduce__(self):
+        # Entries and the lock are not pickled
+        return type(self), (self.ttl, self.maxsize)
+
+
+class QueryFuture(Future):
+    """Future with the results of a query submitted with
+    `Backend.submit_query`.
+
+    Unlike with other futures, a query can be cancelled while it is
+    running: cancelling also cancels the query on the server (if the
+    backend supports it) and stops fetching the results.
+    """
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._interrupt = None
+
+    def cancel(self):
+        with self._lock:
+            if not super().cancel():
+                return False
+            interrupt = self._interrupt
+        if interrupt is not None:
+            try:
+                interrupt()
+            except NotImplementedError:
+                pass
+        return True
+
+    def _set_interrupt(self, interrupt):
+        with self._lock:
+            if interrupt is not None and self.cancelled():
+                raise CancelledError
+            self._interrupt = interrupt
+
+    def _finish(self, result=None, exception=None):
+        with self._lock:
+            if self.cancelled():
+                return
+            if exception is not None:
+                self.set_exception(exception)
+            else:
+                self.set_result(result)
+
+
+class SampleTables:
+    """Registry of tables with samples of data, created by SqlTable.
+
+    Sample tables are kept in the database, so they can be reused by other
+    tables and widgets. The registry records the table each sample was drawn
+    from and when the sample was last used, so that samples of a table and
+    samples that are not used any more can be found and dropped.
+    """
+    def __init__(self):
+        self._samples = OrderedDict()
+        # weak references to SqlTables that read from the samples
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def register(self, sample_table, table_name, user=None):
+        """Record that `sample_table` with a sample of `table_name` is used
+        (by `user`, if given, for as long as it exists)"""
+        with self._lock:
+            self._samples[sample_table] = (table_name, monotonic())
+            self._samples.move_to_end(sample_table)
+            if user is not None:
+                users = [ref for ref in self._users.get(sample_table, ())
+                         if ref() is not None]
+                users.append(weakref.ref(user))
+                self._users[sample_table] = users
+
+    def forget(self, sample_table):
+        """Remove the sample table from the registry"""
+        with self._lock:
+            self._samples.pop(sample_table, None)
+            self._users.pop(sample_table, None)
+
+    def find(self, table_name=None, max_age=None):
+        """Return samples of the table, including samples of its samples,
+        or all samples if `table_name` is `None`. If `max_age` is given,
+        only samples that were not used in the last `max_age` seconds and
+        whose users no longer exist are returned.
+
+        Samples drawn from other samples are listed before their sources.
+        """
+        with self._lock:
+            samples = list(self._samples.items())
+            users = dict(self._users)
+        now = monotonic()
+        sources = {table_name}
+        found = []
+        for sample, (source, last_used) in samples:
+            if table_name is not None and source not in sources:
+                continue
+            sources.add(sample)
+            if max_age is None \
+                    or now - last_used >= max_age \
+                    and all(ref() is None for ref in users.get(sample, ())):
+                found.append(sample)
+        return found[::-1]
+
+    def __contains__(self, sample_table):
+        return sample_table in self._samples
+
+    def __len__(self):
+        return len(self._samples)
+
+    def __reduce__(self):
+        return type(self), ()
+
+
 class Backend(metaclass=Registry):
     """Base class for SqlTable backends. Implementations should define
     all of the methods defined below.
@@ -21,9 +221,27 @@ class Backend(metaclass=Registry):
     """
 
     display_name = ""
+    #: Whether the database supports `GROUP BY GROUPING SETS (...)`
+    supports_grouping_sets = False
+    #: SQL template for numbering the rows of a query, starting with 1, in
+    #: the order of the given expressions
+    row_number_sql = "ROW_NUMBER() OVER (ORDER BY {})"
+    #: SQL template for basic statistics of a continuous field (min, max,
+    #: mean, standard deviation, number of nulls and non-nulls); if `None`,
+    #: SqlTable uses the template for Postgres
+    continuous_stats_sql = None
+    #: SQL template for creating a table (used for samples) from a query
+    create_table_as_sql = "CREATE TABLE {} AS {}"
+    #: SQL template for creating a table with numbers of selected rows
+    rows_table_sql = "CREATE TABLE {} (row_number BIGINT PRIMARY KEY)"
+    #: Number of queries for partitions of a table that SqlTable runs
+    #: concurrently when computing aggregates (1 disables partitioning)
+    max_parallel_queries = 1
 
     def __init__(self, connection_params):
         self.connection_params = connection_params
+        self.metadata_cache = MetadataCache()
+        self.sample_tables = SampleTables()
 
     @classmethod
     def available_backends(cls):
@@ -101,8 +319,7 @@ class Backend(metaclass=Registry):
         query = self.create_sql_query(table_name, fields,
                                       group_by=fields, order_by=fields,
                                       limit=21)
-        with self.execute_sql_query(query) as cur:
-            values = cur.fetchall()
+        values = self.cached_query(query, table_name)
         if len(values) > 20:
             return ()
         else:
@@ -168,6 +385,171 @@ class Backend(metaclass=Registry):
         """
         raise NotImplementedError
 
+    def cached_query(self, query, table_name=None):
+        """Return all rows of the (aggregate) query
+
+        The results are kept in the metadata cache, so repeated queries do not
+        reach the database until the entry expires or is invalidated.
+
+        Parameters
+        ----------
+        query : str
+        table_name : Optional[str]
+            table or sql query the results describe; used for invalidation
+
+        Returns
+        -------
+        tuple of rows
+        """
+        def fetch():
+            with self.execute_sql_query(query) as cur:
+                return tuple(cur.fetchall())
+
+        return self.metadata_cache.get(table_name, query, fetch)
+
+    def create_sample_query(self, table_name, method, parameter, seed=None):
+        """Construct a query that returns a random sample of the table
+
+        Parameters
+        ----------
+        table_name : str
+            name of the table or a subquery
+        method : str
+            `system` for a percentage of rows or `system_time` for the rows
+            that can be read in the given number of milliseconds
+        parameter : str
+            percentage or number of milliseconds
+        seed : Optional[int]
+            seed for a reproducible sample; samples of the same table with the
+            same seed and a smaller percentage are subsets of larger ones
+
+        Returns
+        -------
+        string containing sql query
+        """
+        if table_name.startswith("("):
+            # subqueries cannot be sampled with TABLESAMPLE
+            if method != "system":
+                raise NotImplementedError(
+                    "Only percentage sampling of complex queries is supported")
+            return "SELECT * FROM {} WHERE random() < {} / 100.0".format(
+                table_name, parameter)
+        sql = ["SELECT * FROM", table_name,
+               "TABLESAMPLE", method, "(", parameter, ")"]
+        if seed is not None:
+            sql.extend(["REPEATABLE", "(", str(seed), ")"])
+        return " ".join(sql)
+
+    def partition_filters(self, table_name, n_partitions):
+        """Return filters that split the rows of the table into (at most)
+        `n_partitions` disjoint partitions that can be scanned independently,
+        or `None` if the table cannot be partitioned efficiently
+
+        Parameters
+        ----------
+        table_name : str
+            name of the table or a subquery
+        n_partitions : int
+
+        Returns
+        -------
+        Optional[List[str]]
+        """
+        return None
+
+    def row_order(self, table_name):
+        """Return expressions by which the rows of the table are ordered in
+        the same way in all queries (e.g. the columns of the primary key), or
+        `None` if the table has no such key
+
+        Parameters
+        ----------
+        table_name : str
+            name of the table or a subquery
+
+        Returns
+        -------
+        Optional[List[str]]
+        """
+        return None
+
+    def create_rows_table(self, table_name, rows):
+        """Create a table with a column `row_number` that contains the
+        given numbers of rows, which are used to select rows with a join
+        instead of listing them in queries
+
+        Parameters
+        ----------
+        table_name : str
+            quoted name of the table
+        rows : Sequence[int]
+        """
+        with self.execute_sql_query(self.rows_table_sql.format(table_name)):
+            pass
+        for start in range(0, len(rows), ROWS_PER_INSERT):
+            values = ", ".join("(%i)" % row
+                               for row in rows[start:start + ROWS_PER_INSERT])
+            with self.execute_sql_query(
+                    "INSERT INTO {} VALUES {}".format(table_name, values)):
+                pass
+
+    def stale_tables(self, prefix, max_age, schema=None):
+        """Return names of tables whose names start with `prefix` and which,
+        according to the database catalog, were created (or last used, if
+        the database records it) more than `max_age` seconds ago. SqlTable
+        uses it to find samples that were left by other sessions; databases
+        that do not record the age of tables return an empty list.
+
+        Parameters
+        ----------
+        prefix : str
+            unquoted prefix of table names
+        max_age : float
+        schema : Optional[str]
+            unquoted name of the schema; if `None`, tables on the search
+            path are listed
+
+        Returns
+        -------
+        List[str]
+            unquoted names of tables
+        """
+        return []
+
+    def drop_samples(self, table_name=None, max_age=None):
+        """Drop tables with samples of the table, or of any table, that were
+        not used in the last `max_age` seconds (or all, if `max_age` is `None`)
+
+        Parameters
+        ----------
+        table_name : Optional[str]
+        max_age : Optional[float]
+        """
+        for sample_table in self.sample_tables.find(table_name, max_age):
+            self.drop_sample(sample_table)
+
+    def drop_sample(self, sample_table):
+        """Drop the table with a sample and remove it from the registry
+
+        Parameters
+        ----------
+        sample_table : str
+            quoted name of the table
+        """
+        with self.execute_sql_query("DROP TABLE IF EXISTS " + sample_table):
+            pass
+        self.sample_tables.forget(sample_table)
+        self.metadata_cache.invalidate(sample_table)
+
+    def close(self):
+        """Drop samples that were not used for `SAMPLE_MAX_AGE` seconds and
+        close the connection to the database. The backend cannot be used
+        after it is closed."""
+        try:
+            self.drop_samples(max_age=SAMPLE_MAX_AGE)
+        except BackendError as ex:
+            log.warning("Samples could not be dropped: %s", ex)
+
     @contextmanager
     def execute_sql_query(self, query, params=None):
         """Context manager for execution of sql queries
@@ -191,6 +573,168 @@ class Backend(metaclass=Registry):
         """
         raise NotImplementedError
 
+    def submit_query(self, query, params=None, batch_size=10000,
+                     callback=None):
+        """Execute the query in a separate thread
+
+        Cancelling the returned future cancels the query, also when it is
+        already running.
+
+        Parameters
+        ----------
+        query : string
+            query to be executed
+        params: tuple
+            parameters to be passed to the query
+        batch_size: int
+            number of rows fetched at once
+        callback: Optional[Callable[[list], None]]
+            function that is called (in the worker thread) with each batch
+            of rows as it arrives
+
+        Returns
+        -------
+        QueryFuture with a list of all rows or, if `callback` is given,
+        the number of rows
+        """
+        def fetch():
+            future = _running_query.future
+            rows, n_rows = [], 0
+            for batch in self.fetch_batches(query, params, batch_size):
+                if future.cancelled():
+                    return None
+                n_rows += len(batch)
+                if callback is not None:
+                    callback(batch)
+                else:
+                    rows.extend(batch)
+            return n_rows if callback is not None else rows
+
+        return self.submit(fetch)
+
+    def submit(self, function, *args, **kwargs):
+        """Call the function in a separate thread, like `submit_query`
+
+        Cancelling the returned future cancels the query that the function
+        is running; queries that it starts afterwards raise `CancelledError`.
+
+        Parameters
+        ----------
+        function : Callable
+            function that runs queries, e.g. `SqlTable.download_data`
+        args, kwargs
+            arguments of the function
+
+        Returns
+        -------
+        QueryFuture with the result of the function
+        """
+        future = QueryFuture()
+
+        def run():
+            if future.cancelled():
+                return
+            _running_query.future = future
+            try:
+                future._finish(function(*args, **kwargs))
+            except BaseException as ex:  # pylint: disable=broad-except
+                future._finish(exception=ex)
+            finally:
+                _running_query.future = None
+
+        _get_query_executor().submit(run)
+        return future
+
+    @contextmanager
+    def cancellable(self, handle):
+        """Context manager that lets `QueryFuture.cancel` cancel a query,
+        submitted with `submit_query` or `submit`, while it runs
+
+        Backends that support cancelling should wrap the execution of queries
+        in `execute_sql_query` and `fetch_batches` with it.
+
+        Parameters
+        ----------
+        handle
+            whatever the backend needs to cancel the query (e.g. the
+            connection); it is passed to `cancel_query`
+        """
+        future = getattr(_running_query, "future", None)
+        if future is None:
+            yield
+            return
+        future._set_interrupt(lambda: self.cancel_query(handle))
+        try:
+            yield
+        finally:
+            future._set_interrupt(None)
+
+    def cancel_query(self, handle):
+        """Cancel the query that is running
+
+        Parameters
+        ----------
+        handle
+            the handle of the query, as given to `cancellable`
+        """
+        raise NotImplementedError
+
+    def fetch_batches(self, query, params=None, batch_size=10000):
+        """Execute the query and yield its results in batches of rows
+
+        The default implementation calls `fetchmany` on the cursor from
+        `execute_sql_query`; backends can override it to stream the results
+        from the server (e.g. with server-side cursors).
+
+        Parameters
+        ----------
+        query : string
+            query to be executed
+        params: tuple
+            parameters to be passed to the query
+        batch_size: int
+            number of rows in a batch
+
+        Returns
+        -------
+        yields lists of rows (tuples of values)
+        """
+        with self.execute_sql_query(query, params) as cur:
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+
+    def fetch_arrays(self, query, variables, params=None, batch_size=10000):
+        """Execute the query and yield its results in batches of columns
+        converted to values of the variables
+
+        Columns of primitive variables are converted to float arrays (with
+        indices of discrete values and epoch seconds for time variables) and
+        other columns to object arrays. The default implementation converts
+        rows from `fetch_batches`; backends can override it to convert columns
+        by the types reported by the database.
+
+        Parameters
+        ----------
+        query : string
+            query with a column for each variable
+        variables : List[Variable]
+        params: tuple
+            parameters to be passed to the query
+        batch_size: int
+            number of rows in a batch
+
+        Returns
+        -------
+        yields lists of numpy arrays, one for each variable
+        """
+        for rows in self.fetch_batches(query, params, batch_size):
+            columns = list(zip(*rows))
+            yield [column_to_array(var, column)
+                   for var, column in zip(variables, columns)]
+
     def quote_identifier(self, name):
         """Quote identifier name so it can be safely used in queries
 
@@ -221,6 +765,56 @@ class Backend(metaclass=Registry):
         raise NotImplementedError
 
 
+def range_filters(expression, bounds):
+    """Return filters for rows where the expression lies between consecutive
+    bounds (SQL literals); the first and the last range are open, so the
+    filters cover all rows with non-null values of the expression."""
+    if len(bounds) < 3:
+        return None
+    filters = ["{} < {}".format(expression, bounds[1])]
+    filters += ["{0} >= {1} AND {0} < {2}".format(expression, low, high)
+                for low, high in zip(bounds[1:-2], bounds[2:-1])]
+    filters.append("{} >= {}".format(expression, bounds[-2]))
+    return filters
+
+
+def column_to_array(var, column):
+    """
+    Convert a column of values from the database to an array of values of
+    the variable, calling `to_val` only once for each distinct value.
+    """
+    if not var.is_primitive():
+        values = np.empty(len(column), dtype=object)
+        values[:] = column
+        return values
+    if var.is_continuous:
+        try:
+            return np.array(column, dtype=float)
+        except (TypeError, ValueError):
+            pass
+        if var.is_time:
+            return dates_to_epoch(column)
+    mapping = {value: var.to_val(value) for value in set(column)}
+    return np.fromiter(map(mapping.__getitem__, column), dtype=float,
+                       count=len(column))
+
+
+def dates_to_epoch(column):
+    """Convert a column of dates, datetimes (naive ones are taken to be in
+    UTC) or `None` to an array of seconds since the epoch"""
+    values = np.full(len(column), np.nan)
+    for i, value in enumerate(column):
+        if isinstance(value, datetime):
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            values[i] = value.timestamp()
+        elif isinstance(value, date):
+            values[i] = (value - date(1970, 1, 1)).days * 86400.
+        elif value is not None:
+            values[i] = float(value)
+    return values
+
+
 class TableDesc:
     def __init__(self, name, schema, sql):
         self.name = name
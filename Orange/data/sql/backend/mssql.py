@@ -1,16 +1,20 @@
 import re
 import warnings
 from contextlib import contextmanager
+from functools import partial
 
+import numpy as np
 import pymssql  # pylint: disable=import-error
 
 from Orange.data import StringVariable, TimeVariable, ContinuousVariable, DiscreteVariable
 from Orange.data.sql.backend import Backend
-from Orange.data.sql.backend.base import ToSql, BackendError
+from Orange.data.sql.backend.base import ToSql, BackendError, \
+    column_to_array, dates_to_epoch
 
 
 class PymssqlBackend(Backend):
     display_name = "SQL Server"
+    supports_grouping_sets = True
 
     def __init__(self, connection_params):
         connection_params["server"] = connection_params.pop("host", None)
@@ -73,11 +77,33 @@ class PymssqlBackend(Backend):
     def execute_sql_query(self, query, params=()):
         try:
             with self.connection.cursor() as cur:
-                cur.execute(query, *params)
+                cur.execute(query, params or None)
                 yield cur
         except pymssql.Error as ex:
             raise BackendError(str(ex)) from ex
 
+    def fetch_arrays(self, query, variables, params=None, batch_size=10000):
+        # Choose the conversion of each column by its type, so that numbers
+        # and dates are converted to arrays without inspecting the values
+        with self.execute_sql_query(query, params) as cur:
+            converters = [self._column_converter(var, desc[1])
+                          for var, desc in zip(variables, cur.description)]
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [convert(column)
+                       for convert, column in zip(converters, zip(*rows))]
+
+    @staticmethod
+    def _column_converter(var, type_code):
+        if var.is_time and type_code == pymssql.DATETIME:
+            return dates_to_epoch
+        if var.is_continuous and type_code in (pymssql.NUMBER,
+                                               pymssql.DECIMAL):
+            return partial(np.array, dtype=float)
+        return partial(column_to_array, var)
+
     def create_variable(self, field_name, field_metadata, type_hints, inspect_table=None):
         if field_name in type_hints:
             var = type_hints[field_name]
@@ -145,3 +171,42 @@ class PymssqlBackend(Backend):
                     warnings.warn("SHOWPLAN permission denied, count approximates will not be used")
                     return None
                 raise BackendError(str(ex)) from ex
+
+    def row_order(self, table_name):
+        # rows are ordered by the primary key, if the table has one
+        if table_name.startswith("("):
+            return None
+        *schema, name = [self.unquote_identifier(part)
+                         for part in table_name.split(".")]
+        query = """
+        SELECT kcu.COLUMN_NAME
+          FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
+          JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE kcu
+            ON tc.CONSTRAINT_NAME = kcu.CONSTRAINT_NAME
+           AND tc.TABLE_SCHEMA = kcu.TABLE_SCHEMA
+         WHERE tc.CONSTRAINT_TYPE = 'PRIMARY KEY'
+           AND tc.TABLE_NAME = %s
+           AND tc.TABLE_SCHEMA = COALESCE(%s, SCHEMA_NAME())
+      ORDER BY kcu.ORDINAL_POSITION
+        """
+        with self.execute_sql_query(
+                query, (name, schema[0] if schema else None)) as cur:
+            keys = [row[0] for row in cur.fetchall()]
+        return [self.quote_identifier(key) for key in keys] or None
+
+    def stale_tables(self, prefix, max_age, schema=None):
+        pattern = re.sub(r"([\[_%])", r"[\1]", prefix) + "%"
+        query = """
+        SELECT name
+          FROM sys.tables
+         WHERE name LIKE %s
+           AND SCHEMA_NAME(schema_id) = COALESCE(%s, SCHEMA_NAME())
+           AND create_date < DATEADD(second, -%s, GETDATE())
+        """
+        with self.execute_sql_query(
+                query, (pattern, schema, int(max_age))) as cur:
+            return [row[0] for row in cur.fetchall()]
+
+    def close(self):
+        super().close()
+        self.connection.close()
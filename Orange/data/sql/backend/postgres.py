@@ -3,12 +3,14 @@ import re
 import warnings
 from contextlib import contextmanager
 from time import time
+from uuid import uuid4
 
 from psycopg2 import Error  # pylint: disable=import-error
 from psycopg2.pool import ThreadedConnectionPool  # pylint: disable=import-error
 
 from Orange.data import ContinuousVariable, DiscreteVariable, StringVariable, TimeVariable
-from Orange.data.sql.backend.base import Backend, ToSql, BackendError
+from Orange.data.sql.backend.base import Backend, ToSql, BackendError, \
+    range_filters
 
 log = logging.getLogger(__name__)
 
@@ -20,8 +22,12 @@ class Psycopg2Backend(Backend):
     """
 
     display_name = "PostgreSQL"
+    supports_grouping_sets = True
     connection_pool = None
     auto_create_extensions = True
+    create_table_as_sql = "CREATE UNLOGGED TABLE {} AS {}"
+    rows_table_sql = "CREATE UNLOGGED TABLE {} (row_number BIGINT PRIMARY KEY)"
+    max_parallel_queries = 4
 
     def __init__(self, connection_params):
         super().__init__(connection_params)
@@ -78,8 +84,9 @@ class Psycopg2Backend(Backend):
             utfquery = cur.mogrify(query, params).decode('utf-8')
             log.debug("Executing: %s", utfquery)
             t = time()
-            cur.execute(query, params)
-            yield cur
+            with self.cancellable(connection):
+                cur.execute(query, params)
+                yield cur
             log.info("%.2f ms: %s", 1000 * (time() - t), utfquery)
         except Error as ex:
             raise BackendError(str(ex)) from ex
@@ -87,6 +94,37 @@ class Psycopg2Backend(Backend):
             connection.commit()
             self.connection_pool.putconn(connection)
 
+    def fetch_batches(self, query, params=None, batch_size=10000):
+        # A named cursor keeps the results on the server, so they are
+        # transferred in batches instead of all at once
+        connection = self.connection_pool.getconn()
+        cur = connection.cursor(name="orange_{}".format(uuid4().hex))
+        cur.itersize = batch_size
+        try:
+            log.debug("Executing: %s", query)
+            t = time()
+            with self.cancellable(connection):
+                cur.execute(query, params)
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+            log.info("%.2f ms: %s", 1000 * (time() - t), query)
+        except Error as ex:
+            raise BackendError(str(ex)) from ex
+        finally:
+            try:
+                cur.close()
+            except Error:
+                pass
+            connection.commit()
+            self.connection_pool.putconn(connection)
+
+    def cancel_query(self, handle):
+        # the handle is the connection that runs the query
+        handle.cancel()
+
     def quote_identifier(self, name):
         return '"%s"' % name
 
@@ -180,6 +218,81 @@ class Psycopg2Backend(Backend):
             s = ''.join(row[0] for row in cur.fetchall())
         return int(re.findall(r'rows=(\d*)', s)[0])
 
+    def partition_filters(self, table_name, n_partitions):
+        # Partition tables by ranges of pages, which Postgres 14 and later
+        # reads with TID range scans instead of scanning the whole table
+        if table_name.startswith("("):
+            return None
+        query = "SELECT current_setting('server_version_num')::int, " \
+                "relpages, relkind FROM pg_class WHERE oid = %s::regclass"
+        try:
+            with self.execute_sql_query(query, (table_name,)) as cur:
+                version, pages, kind = cur.fetchone()
+        except BackendError:
+            return None
+        if version < 140000 or kind not in ("r", "m"):
+            return None
+        n_partitions = min(n_partitions, pages)
+        bounds = ["'({},0)'::tid".format(pages * i // n_partitions)
+                  for i in range(n_partitions + 1)]
+        return range_filters("ctid", bounds)
+
+    def row_order(self, table_name):
+        # Order rows by the primary key or, in tables without one, by their
+        # physical location; views and subqueries have neither
+        if table_name.startswith("("):
+            return None
+        query = """SELECT a.attname, c.relkind
+                     FROM pg_class c
+                LEFT JOIN pg_index i
+                       ON i.indrelid = c.oid AND i.indisprimary
+                LEFT JOIN pg_attribute a
+                       ON a.attrelid = c.oid AND a.attnum = ANY(i.indkey)
+                    WHERE c.oid = %s::regclass
+                 ORDER BY a.attnum"""
+        try:
+            with self.execute_sql_query(query, (table_name,)) as cur:
+                rows = cur.fetchall()
+        except BackendError:
+            return None
+        keys = [self.quote_identifier(name) for name, _ in rows
+                if name is not None]
+        if keys:
+            return keys
+        if rows and rows[0][1] in ("r", "m"):
+            return ["ctid"]
+        return None
+
+    def create_rows_table(self, table_name, rows):
+        super().create_rows_table(table_name, rows)
+        # the statistics help the planner and record the age of the table
+        # for stale_tables
+        with self.execute_sql_query("ANALYZE " + table_name):
+            pass
+
+    def stale_tables(self, prefix, max_age, schema=None):
+        # Postgres does not record when tables were created or read, but
+        # samples are analyzed when they are created
+        pattern = re.sub(r"([\\_%])", r"\\\1", prefix) + "%"
+        query = """SELECT relname
+                     FROM pg_catalog.pg_stat_user_tables
+                    WHERE relname LIKE %s
+                      AND {}
+                      AND now() - GREATEST(last_analyze, last_autoanalyze)
+                          > %s * interval '1 second'"""
+        if schema is None:
+            query = query.format("pg_catalog.pg_table_is_visible(relid)")
+            params = (pattern, max_age)
+        else:
+            query = query.format("schemaname = %s")
+            params = (pattern, schema, max_age)
+        with self.execute_sql_query(query, params) as cur:
+            return [row[0] for row in cur.fetchall()]
+
+    def close(self):
+        super().close()
+        self.connection_pool.closeall()
+
     def __getstate__(self):
         # Drop connection_pool from state as it cannot be pickled
         state = dict(self.__dict__)
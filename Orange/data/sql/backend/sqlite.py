@@ -0,0 +1,334 @@
+import logging
+import math
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from time import time
+from urllib.request import pathname2url
+
+from Orange.data import ContinuousVariable, DiscreteVariable, StringVariable, \
+    TimeVariable
+from Orange.data.sql.backend.base import Backend, ToSql, BackendError, \
+    range_filters
+
+log = logging.getLogger(__name__)
+
+#: Number of rows sampled per millisecond when emulating time-based sampling
+ROWS_PER_MS = 100
+
+#: Number of virtual machine instructions between checks for cancellation
+PROGRESS_STEPS = 1000
+
+
+class _StdDev:
+    """Aggregate computing the sample standard deviation (as STDDEV in
+    Postgres) with Welford's algorithm."""
+    def __init__(self):
+        self.n, self.mean, self.m2 = 0, 0., 0.
+
+    def step(self, value):
+        if value is None:
+            return
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def finalize(self):
+        if self.n < 2:
+            return None
+        return math.sqrt(self.m2 / (self.n - 1))
+
+
+def _exp(value):
+    return None if value is None else math.exp(value)
+
+
+class SQLiteBackend(Backend):
+    """Backend for accessing data stored in a local SQLite database file.
+
+    The name of the file is given as `database` in connection parameters.
+    Only existing files are opened; use `":memory:"` for an in-memory
+    database.
+    """
+
+    display_name = "SQLite"
+    create_table_as_sql = "CREATE TEMP TABLE {} AS {}"
+    rows_table_sql = "CREATE TEMP TABLE {} (row_number INTEGER PRIMARY KEY)"
+
+    continuous_stats_sql = "CAST(MIN(%(field_name)s) AS REAL), " \
+                           "CAST(MAX(%(field_name)s) AS REAL), " \
+                           "AVG(%(field_name)s), " \
+                           "STDDEV(%(field_name)s), " \
+                           "SUM(%(field_name)s IS NULL), " \
+                           "SUM(%(field_name)s IS NOT NULL)"
+
+    def __init__(self, connection_params):
+        super().__init__(connection_params)
+        database = connection_params.get("database")
+        if not database:
+            raise BackendError("Database file is not specified")
+        try:
+            if database == ":memory:":
+                self.connection = sqlite3.connect(
+                    database, check_same_thread=False)
+            else:
+                self.connection = sqlite3.connect(
+                    "file:{}?mode=rw".format(pathname2url(database)),
+                    uri=True, check_same_thread=False)
+        except sqlite3.Error as ex:
+            raise BackendError(str(ex)) from ex
+        # The connection is shared by threads (e.g. those that run submitted
+        # queries), so statements and commits are serialized; the lock is
+        # held for as long as the cursor is used. A connection per thread
+        # would not see temporary tables with samples of other threads.
+        self._lock = threading.RLock()
+        self.connection.create_aggregate("STDDEV", 1, _StdDev)
+        # Queries are cancelled by the progress handler, which is called in
+        # the thread that runs the query. Unlike connection.interrupt(), it
+        # does not stop other queries on the connection and also stops
+        # queries that are cancelled before they start
+        self._running = threading.local()
+        self.connection.set_progress_handler(self._is_cancelled,
+                                             PROGRESS_STEPS)
+        try:
+            self.connection.execute("SELECT EXP(0)")
+        except sqlite3.OperationalError:
+            # math functions are not included in all builds of SQLite
+            self.connection.create_function("EXP", 1, _exp)
+
+    def list_tables_query(self, schema=None):
+        return r"""SELECT NULL, name
+                     FROM sqlite_master
+                    WHERE type IN ('table', 'view')
+                      AND name NOT LIKE 'sqlite\_%' ESCAPE '\'
+                      AND name NOT LIKE '\_\_%' ESCAPE '\'
+                 ORDER BY name"""
+
+    def create_sql_query(self, table_name, fields, filters=(),
+                         group_by=None, order_by=None,
+                         offset=None, limit=None,
+                         use_time_sample=None):
+        sql = ["SELECT", ', '.join(fields),
+               "FROM", table_name]
+        if filters:
+            sql.extend(["WHERE", " AND ".join(filters)])
+        if group_by is not None:
+            sql.extend(["GROUP BY", ", ".join(group_by)])
+        if order_by is not None:
+            sql.extend(["ORDER BY", ",".join(order_by)])
+        if limit is not None or offset is not None:
+            sql.extend(["LIMIT", str(-1 if limit is None else limit)])
+        if offset is not None:
+            sql.extend(["OFFSET", str(offset)])
+        return " ".join(sql)
+
+    def create_sample_query(self, table_name, method, parameter, seed=None):
+        # SQLite has no TABLESAMPLE; sample rows by their rowids
+        if method == "system":
+            if seed is None or table_name.startswith("("):
+                rand = "random()"
+            else:
+                # random() cannot be seeded, so hash the rowids instead
+                rand = "(rowid + {}) * 2654435761".format(int(seed) * 7919)
+            return "SELECT * FROM {} WHERE abs({} % 1000000) < {}" \
+                .format(table_name, rand, int(float(parameter) * 10000))
+        if method == "system_time":
+            if table_name.startswith("("):
+                raise NotImplementedError(
+                    "Only percentage sampling of complex queries is supported")
+            return "SELECT * FROM {0} WHERE rowid IN " \
+                   "(SELECT rowid FROM {0} ORDER BY random() LIMIT {1})" \
+                .format(table_name, int(parameter) * ROWS_PER_MS)
+        raise ValueError("Unknown sampling method '{}'".format(method))
+
+    def partition_filters(self, table_name, n_partitions):
+        # Partition tables by ranges of rowids, which are read by seeking in
+        # the table's b-tree; views and WITHOUT ROWID tables have no rowids
+        if table_name.startswith("("):
+            return None
+        query = "SELECT MIN(rowid), MAX(rowid) FROM {}".format(table_name)
+        try:
+            with self.execute_sql_query(query) as cur:
+                low, high = cur.fetchone()
+        except BackendError:
+            return None
+        if low is None:
+            return None
+        n_partitions = min(n_partitions, high - low + 1)
+        bounds = [low + (high + 1 - low) * i // n_partitions
+                  for i in range(n_partitions + 1)]
+        return range_filters("rowid", bounds)
+
+    def row_order(self, table_name):
+        # Order rows by the primary key or, in tables without one, by their
+        # rowids; views and subqueries have neither
+        match = re.match(r'^"((?:[^"]|"")*)"$', table_name)
+        if not match:
+            return None
+        with self.execute_sql_query(
+                "PRAGMA table_info({})".format(table_name)) as cur:
+            keys = sorted((row[5], row[1]) for row in cur.fetchall()
+                          if row[5])
+        if keys:
+            return [self.quote_identifier(name) for _, name in keys]
+        with self.execute_sql_query(
+                "SELECT type FROM sqlite_master WHERE name = ? UNION ALL "
+                "SELECT type FROM sqlite_temp_master WHERE name = ?",
+                (self.unquote_identifier(table_name), ) * 2) as cur:
+            row = cur.fetchone()
+        if row is not None and row[0] == "table":
+            return ["rowid"]
+        return None
+
+    @contextmanager
+    def execute_sql_query(self, query, params=None):
+        cancelled = threading.Event()
+        outer = getattr(self._running, "cancelled", None)
+        self._running.cancelled = cancelled
+        with self._lock:
+            cur = self.connection.cursor()
+            try:
+                log.debug("Executing: %s", query)
+                t = time()
+                with self.cancellable(cancelled):
+                    cur.execute(query, params or ())
+                    yield cur
+                log.info("%.2f ms: %s", 1000 * (time() - t), query)
+            except sqlite3.Error as ex:
+                raise BackendError(str(ex)) from ex
+            finally:
+                self._running.cancelled = outer
+                cur.close()
+                self.connection.commit()
+
+    def cancel_query(self, handle):
+        # the handle is the event that the progress handler checks
+        handle.set()
+
+    def _is_cancelled(self):
+        cancelled = getattr(self._running, "cancelled", None)
+        return cancelled is not None and cancelled.is_set()
+
+    def quote_identifier(self, name):
+        return '"%s"' % name.replace('"', '""')
+
+    def unquote_identifier(self, quoted_name):
+        if quoted_name.startswith('"'):
+            return quoted_name[1:len(quoted_name) - 1].replace('""', '"')
+        else:
+            return quoted_name
+
+    def get_fields(self, table_name):
+        """Return a list of tuples (field name, declared type, type of
+        values); SQLite columns are not typed, so the types of the values
+        in the first rows are used when the type is not declared."""
+        declared = {}
+        match = re.match(r'^"((?:[^"]|"")*)"$', table_name)
+        if match:
+            query = "PRAGMA table_info({})".format(table_name)
+            with self.execute_sql_query(query) as cur:
+                declared = {row[1]: row[2] or "" for row in cur.fetchall()}
+
+        query = self.create_sql_query(table_name, ["*"], limit=100)
+        with self.execute_sql_query(query) as cur:
+            names = [desc[0] for desc in cur.description]
+            rows = cur.fetchall()
+        fields = []
+        for i, name in enumerate(names):
+            types = {type(row[i]) for row in rows if row[i] is not None}
+            if types and types <= {int, float}:
+                value_type = float if float in types else int
+            elif types:
+                value_type = str
+            else:
+                value_type = None
+            fields.append((name, declared.get(name, "").upper(), value_type))
+        return fields
+
+    def create_variable(self, field_name, field_metadata,
+                        type_hints, inspect_table=None):
+        if field_name in type_hints:
+            var = type_hints[field_name]
+        else:
+            var = self._guess_variable(field_name, field_metadata,
+                                       inspect_table)
+
+        field_name_q = self.quote_identifier(field_name)
+        if var.is_continuous:
+            if isinstance(var, TimeVariable):
+                var.to_sql = ToSql("(julianday({}) - 2440587.5) * 86400.0"
+                                   .format(field_name_q))
+            else:
+                var.to_sql = ToSql("CAST({} AS REAL)".format(field_name_q))
+        else:  # discrete or string
+            var.to_sql = ToSql("CAST({} AS TEXT)".format(field_name_q))
+        return var
+
+    def _guess_variable(self, field_name, field_metadata, inspect_table):
+        declared_type, value_type = field_metadata
+
+        if "BOOL" in declared_type:
+            return DiscreteVariable.make(field_name, ['0', '1'])
+
+        if "DATE" in declared_type or "TIME" in declared_type:
+            tv = TimeVariable.make(field_name)
+            tv.have_date |= "DATE" in declared_type \
+                or "TIMESTAMP" in declared_type
+            tv.have_time |= "TIME" in declared_type
+            return tv
+
+        if "INT" in declared_type or not declared_type and value_type is int:
+            if inspect_table:
+                values = self.get_distinct_values(field_name, inspect_table)
+                if values:
+                    return DiscreteVariable.make(field_name, values)
+            return ContinuousVariable.make(field_name)
+
+        if any(t in declared_type for t in ("REAL", "FLOA", "DOUB", "NUM",
+                                            "DEC")) \
+                or not declared_type and value_type is float:
+            return ContinuousVariable.make(field_name)
+
+        if inspect_table:
+            values = self.get_distinct_values(field_name, inspect_table)
+            if values:
+                return DiscreteVariable.make(field_name, values)
+
+        return StringVariable.make(field_name)
+
+    def count_approx(self, query):
+        # SQLite keeps row counts only for analyzed tables
+        match = re.match(r'^SELECT \* FROM "((?:[^"]|"")*)"$', query)
+        if match:
+            with self.execute_sql_query(
+                    "SELECT name FROM sqlite_master "
+                    "WHERE name = 'sqlite_stat1'") as cur:
+                has_stats = cur.fetchone() is not None
+            if has_stats:
+                with self.execute_sql_query(
+                        "SELECT stat FROM sqlite_stat1 WHERE tbl = ?",
+                        (match.group(1).replace('""', '"'), )) as cur:
+                    row = cur.fetchone()
+                if row is not None:
+                    return int(row[0].split()[0])
+        raise NotImplementedError
+
+    def close(self):
+        # samples are temporary tables, which are dropped with the connection
+        super().close()
+        with self._lock:
+            self.connection.close()
+
+    def __getstate__(self):
+        # Drop the connection from state as it cannot be pickled
+        state = dict(self.__dict__)
+        state.pop('connection', None)
+        state.pop('_running', None)
+        state.pop('_lock', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__init__(self.connection_params)
@@ -0,0 +1,300 @@
+"""
+Translation of values computed by Orange (transformations from preprocessing
+and models) into SQL expressions, so they can be computed by the database.
+
+Variables of a domain derived from a :obj:`SqlTable` (e.g. by preprocessors)
+have `compute_value` that refers to the variables of the table. Their
+SQL expressions are composed from the expressions of the original variables,
+so a chain of preprocessors and a model translate into a single projection.
+Expressions for discrete variables, except those stored in the database,
+give indices of values.
+"""
+from functools import singledispatch
+
+import numpy as np
+
+from Orange.classification.logistic_regression import \
+    LogisticRegressionClassifier
+from Orange.classification.naive_bayes import NaiveBayesModel
+from Orange.data import ContinuousVariable, DiscreteVariable, Domain
+from Orange.data.sql.backend.base import ToSql
+from Orange.preprocess.discretize import BinSql, Discretizer, SingleValueSql
+from Orange.preprocess.impute import IsDefined, ReplaceUnknowns
+from Orange.preprocess.transformation import \
+    Identity, Indicator, Indicator1, Lookup, Normalizer
+from Orange.regression.linear import LinearModel
+
+__all__ = ["SqlExpression", "sql_expression", "compute_value_sql",
+           "model_sql", "prediction_variables", "predict"]
+
+# limit of arguments of EXP, which overflows (or underflows) for larger values
+MAX_EXP = 700
+
+
+class SqlExpression:
+    """Callable that returns the SQL expression for the variable's
+    `compute_value`; used as `to_sql` of derived variables."""
+    def __init__(self, variable):
+        self.variable = variable
+
+    def __call__(self):
+        return compute_value_sql(self.variable.compute_value, self.variable)
+
+
+def sql_expression(variable):
+    """
+    Return an SQL expression for the value of the variable.
+
+    Raises `NotImplementedError` if the variable is neither stored in the
+    database nor computed by a transformation that can be translated to SQL.
+    """
+    return _translate(variable)[0]
+
+
+def _translate(variable):
+    """
+    Return an SQL expression for the value of the variable and a flag telling
+    whether it gives values as stored in the database (instead of indices of
+    discrete values).
+    """
+    to_sql = getattr(variable, "to_sql", None)
+    compute_value = variable.compute_value
+    # Translate known transformations even if the variable has its own
+    # `to_sql`, which may refer to variables without one
+    if compute_value is not None and not isinstance(to_sql, ToSql) \
+            and compute_value_sql.dispatch(type(compute_value)) \
+            is not compute_value_sql.dispatch(object):
+        return compute_value_sql(compute_value, variable), False
+    if to_sql is not None:
+        return to_sql(), isinstance(to_sql, (ToSql, SingleValueSql))
+    if compute_value is None:
+        raise NotImplementedError(
+            "'{}' is not stored in the database".format(variable.name))
+    return compute_value_sql(compute_value, variable), False
+
+
+@singledispatch
+def compute_value_sql(compute_value, variable):
+    """
+    Return an SQL expression that computes the value of `variable` with
+    its `compute_value`.
+
+    Translations of other transformations can be added with
+    `compute_value_sql.register`.
+    """
+    raise NotImplementedError(
+        "{} of '{}' cannot be computed in SQL".format(
+            type(compute_value).__name__, variable.name))
+
+
+def _literal(value):
+    if value is None or not np.isfinite(value):
+        return "NULL"
+    return repr(float(value))
+
+
+def _string(value):
+    return "'{}'".format(str(value).replace("'", "''"))
+
+
+def _index_sql(variable):
+    """SQL expression for the index of the value of a discrete variable"""
+    sql, stored_values = _translate(variable)
+    if stored_values:
+        return "CASE {} {} END".format(sql, " ".join(
+            "WHEN {} THEN {}".format(_string(value), i)
+            for i, value in enumerate(variable.values)))
+    return sql
+
+
+def _value_sql(variable):
+    if variable.is_discrete:
+        return _index_sql(variable)
+    return sql_expression(variable)
+
+
+@compute_value_sql.register(Identity)
+def _(compute_value, _):
+    return _value_sql(compute_value.variable)
+
+
+@compute_value_sql.register(Indicator)
+def _(compute_value, _):
+    return "CASE WHEN ({}) = {} THEN 1 ELSE 0 END".format(
+        _value_sql(compute_value.variable), _literal(compute_value.value))
+
+
+@compute_value_sql.register(Indicator1)
+def _(compute_value, _):
+    return "CASE WHEN ({}) = {} THEN 1 ELSE -1 END".format(
+        _value_sql(compute_value.variable), _literal(compute_value.value))
+
+
+@compute_value_sql.register(Normalizer)
+def _(compute_value, _):
+    return "(({}) - {}) * {}".format(
+        _value_sql(compute_value.variable), _literal(compute_value.offset),
+        _literal(compute_value.factor))
+
+
+@compute_value_sql.register(Lookup)
+def _(compute_value, _):
+    return "CASE {} {} ELSE {} END".format(
+        _index_sql(compute_value.variable),
+        " ".join("WHEN {} THEN {}".format(i, _literal(value))
+                 for i, value in enumerate(compute_value.lookup_table)),
+        _literal(compute_value.unknown))
+
+
+@compute_value_sql.register(ReplaceUnknowns)
+def _(compute_value, _):
+    return "COALESCE({}, {})".format(
+        _value_sql(compute_value.variable), _literal(compute_value.value))
+
+
+@compute_value_sql.register(IsDefined)
+def _(compute_value, _):
+    return "CASE WHEN ({}) IS NULL THEN 0 ELSE 1 END".format(
+        _value_sql(compute_value.variable))
+
+
+@compute_value_sql.register(Discretizer)
+def _(compute_value, _):
+    return BinSql(compute_value.variable, list(compute_value.points))()
+
+
+def _linear(xs, weights, intercept=0):
+    return " + ".join([_literal(intercept)] + [
+        "{} * ({})".format(_literal(w), x) for x, w in zip(xs, weights)])
+
+
+def _exp(sql):
+    # clip the argument to prevent overflows, which are errors in SQL
+    return "EXP(CASE WHEN ({0}) > {1} THEN {1} WHEN ({0}) < -{1} THEN -{1} " \
+           "ELSE ({0}) END)".format(sql, MAX_EXP)
+
+
+def _sigmoid(sql):
+    return "1.0 / (1.0 + {})".format(_exp("-({})".format(sql)))
+
+
+def _softmax(scores):
+    return ["1.0 / ({})".format(" + ".join(
+        _exp("({}) - ({})".format(other, score)) if j != i else "1.0"
+        for j, other in enumerate(scores)))
+            for i, score in enumerate(scores)]
+
+
+def _argmax(scores):
+    # the first index with the highest score, as np.argmax
+    if len(scores) == 1:
+        return "0"
+    conditions = [
+        " AND ".join("({}) >= ({})".format(score, other)
+                     for other in scores[i + 1:])
+        for i, score in enumerate(scores[:-1])]
+    return "CASE {} ELSE {} END".format(
+        " ".join("WHEN {} THEN {}".format(condition, i)
+                 for i, condition in enumerate(conditions)),
+        len(scores) - 1)
+
+
+@singledispatch
+def model_sql(model):
+    """
+    Return SQL expressions for the predictions of the model.
+
+    Returns a tuple with the expression for the predicted value (an index for
+    classification) and a list with expressions for probabilities of class
+    values (or `None` for regression).
+
+    Translations of other models can be added with `model_sql.register`.
+    """
+    raise NotImplementedError(
+        "{} cannot be computed in SQL".format(type(model).__name__))
+
+
+@model_sql.register(LogisticRegressionClassifier)
+def _(model):
+    skl_model = model.skl_model
+    xs = [_value_sql(attr) for attr in model.domain.attributes]
+    scores = [_linear(xs, coef, intercept) for coef, intercept
+              in zip(skl_model.coef_, skl_model.intercept_)]
+    multi_class = getattr(skl_model, "multi_class", "ovr")
+    if multi_class == "auto":
+        multi_class = "ovr" if skl_model.solver == "liblinear" \
+            or len(scores) == 1 else "multinomial"
+    if len(scores) == 1:
+        score = scores[0]
+        if multi_class == "multinomial":
+            # softmax of (-score, score)
+            score = "2 * ({})".format(score)
+        probs = [_sigmoid("-({})".format(score)), _sigmoid(score)]
+        value = "CASE WHEN ({}) > 0 THEN 1 ELSE 0 END".format(score)
+    else:
+        if multi_class == "multinomial":
+            probs = _softmax(scores)
+        else:
+            sigmoids = [_sigmoid(score) for score in scores]
+            total = " + ".join("({})".format(s) for s in sigmoids)
+            probs = ["({}) / ({})".format(s, total) for s in sigmoids]
+        value = _argmax(scores)
+    # map from classes seen in training to all values of the class
+    classes = skl_model.classes_.astype(int)
+    value = "CASE {} {} END".format(value, " ".join(
+        "WHEN {} THEN {}".format(i, c) for i, c in enumerate(classes)))
+    all_probs = ["0.0"] * len(model.domain.class_var.values)
+    for c, prob in zip(classes, probs):
+        all_probs[c] = prob
+    return value, all_probs
+
+
+@model_sql.register(NaiveBayesModel)
+def _(model):
+    scores = [_literal(p) for p in np.log(model.class_prob)]
+    for attr, log_prob in zip(model.domain.attributes, model.log_cont_prob):
+        index = _index_sql(attr)
+        for k, class_log_prob in enumerate(log_prob):
+            scores[k] += " + CASE {} {} ELSE 0 END".format(index, " ".join(
+                "WHEN {} THEN {}".format(i, _literal(p))
+                for i, p in enumerate(class_log_prob)))
+    return _argmax(scores), _softmax(scores)
+
+
+@model_sql.register(LinearModel)
+def _(model):
+    skl_model = model.skl_model
+    xs = [_value_sql(attr) for attr in model.domain.attributes]
+    return _linear(xs, np.ravel(skl_model.coef_),
+                   np.ravel(skl_model.intercept_)[0]), None
+
+
+def prediction_variables(model):
+    """
+    Return variables with predictions of the model and, for classification,
+    probabilities of class values, which are computed by the database.
+    """
+    value, probs = model_sql(model)
+    class_var = model.domain.class_var
+    if class_var.is_discrete:
+        predicted = DiscreteVariable(model.name, class_var.values)
+    else:
+        predicted = ContinuousVariable(model.name)
+    predicted.to_sql = ToSql(value)
+    variables = [predicted]
+    if probs is not None:
+        for class_value, prob in zip(class_var.values, probs):
+            var = ContinuousVariable(
+                "{} ({})".format(model.name, class_value))
+            var.to_sql = ToSql(prob)
+            variables.append(var)
+    return variables
+
+
+def predict(model, table):
+    """
+    Return a SqlTable with predictions of the model for rows of the table
+    (see `prediction_variables`) as meta attributes; the predictions are
+    computed by the database, so the data does not need to be downloaded.
+    """
+    return table.transform(Domain([], metas=prediction_variables(model)))
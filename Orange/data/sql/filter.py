@@ -135,3 +135,32 @@ class CustomFilterSql(filter.Filter):
             return "(" + self.sql + ")"
         else:
             return "NOT (" + self.sql + ")"
+
+
+class RowNumbersSql(filter.Filter):
+    """
+    Select rows by their numbers in the given column; `rows` is a slice with
+    a unit step, a sorted sequence of row numbers or the name of a table
+    with row numbers in column `row_number`.
+    """
+    def __init__(self, column, rows, negate=False):
+        super().__init__(negate)
+        self.column = column
+        self.rows = rows
+
+    def to_sql(self):
+        rows = self.rows
+        if isinstance(rows, slice):
+            conditions = ["%s >= %i" % (self.column, rows.start or 0)]
+            if rows.stop is not None:
+                conditions.append("%s < %i" % (self.column, rows.stop))
+            sql = " AND ".join(conditions)
+        elif isinstance(rows, str):
+            sql = "%s IN (SELECT row_number FROM %s)" % (self.column, rows)
+        elif not len(rows):
+            sql = "1 = 0"
+        else:
+            sql = "%s IN (%s)" % (self.column, ",".join(map(str, rows)))
+        if self.negate:
+            sql = 'NOT (%s)' % sql
+        return sql
@@ -2,23 +2,42 @@
 Support for example tables wrapping data stored on a PostgreSQL server.
 """
 import functools
+import hashlib
 import logging
 import threading
 import warnings
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from itertools import islice
 from time import strftime
+from uuid import uuid4
 
 import numpy as np
 from Orange.data import (
     Table, Domain, Value, Instance, filter)
 from Orange.data.sql import filter as sql_filter
 from Orange.data.sql.backend import Backend
-from Orange.data.sql.backend.base import TableDesc, BackendError
+from Orange.data.sql.backend.base import TableDesc, BackendError, \
+    SAMPLE_MAX_AGE
 
 LARGE_TABLE = 100000
 AUTO_DL_LIMIT = 10000
+DOWNLOAD_BATCH_SIZE = 10000
 DEFAULT_SAMPLE_TIME = 1
+#: Percentages of rows in the nested samples returned by sample_levels
+SAMPLE_LEVELS = (0.1, 1, 10)
+#: Sampling methods in names of sample tables ('system' also matches
+#: 'system_time')
+SAMPLE_METHODS = ("system", "nested")
+#: Number of rows above which aggregates are computed by scanning partitions
+#: of the table in parallel (if the backend supports it)
+PARALLEL_SCAN_ROWS = 50000
+#: Number of selected rows above which their numbers are stored in a table
+#: in the database instead of being listed in queries
+MAX_ROWS_IN_QUERY = 1000
+#: Prefix of names of tables with numbers of selected rows
+ROWS_TABLE_PREFIX = "__rows_"
 sql_log = logging.getLogger('sql_log')
 sql_log.debug("Logging started: {}".format(strftime("%Y-%m-%d %H:%M:%S")))
 
@@ -27,6 +46,10 @@ class SqlTable(Table):
     table_name = None
     domain = None
     row_filters = ()
+    # the table name and the expression with numbers of selected rows
+    _row_key = None
+    # tables with numbers of selected rows that the queries depend on
+    _rows_tables = ()
 
     def __new__(cls, *args, **kwargs):
         # We do not (yet) need the magic of the Table.__new__, so we call it
@@ -129,7 +152,9 @@ class SqlTable(Table):
         returned as a SqlRowInstance.
 
         A new SqlTable with appropriate filters is constructed and returned
-        otherwise.
+        otherwise. Rows (a slice, a boolean mask or a sorted sequence of
+        indices) are selected in the database. Rows in any other order are
+        fetched into an ordinary Table.
         """
         if isinstance(key, int):
             # one row
@@ -154,22 +179,109 @@ class SqlTable(Table):
             except TypeError:
                 pass
 
-        elif not (row_idx is Ellipsis or row_idx == slice(None)):
-            # TODO if row_idx specify multiple rows, one of the following must
-            # happen
-            #  - the new table remembers which rows are selected (implement
-            #     table.limit_rows and whatever else is necessary)
-            #  - return an ordinary (non-SQL) Table
-            #  - raise an exception
-            raise NotImplementedError("Row indices must be integers.")
+        elif not (row_idx is Ellipsis or
+                  isinstance(row_idx, slice) and row_idx == slice(None)):
+            table = self._select_rows(row_idx)
+            domain = self.domain.select_columns(col_idx)
+            if isinstance(table, SqlTable):
+                table.domain = domain
+                return table
+            return Table.from_table(domain, table)
 
         # multiple rows OR single row but multiple columns:
         # construct a new table
         table = self.copy()
         table.domain = self.domain.select_columns(col_idx)
-        # table.limit_rows(row_idx)
         return table
 
+    def _row_numbers(self, rows):
+        """
+        Return rows as a slice with a unit step or an array of non-negative
+        row numbers.
+        """
+        if isinstance(rows, slice):
+            if rows.step in (None, 1) and (rows.start or 0) >= 0 \
+                    and (rows.stop is None or rows.stop >= 0):
+                return slice(rows.start or 0, rows.stop)
+            return np.arange(len(self))[rows]
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            if len(rows) != len(self):
+                raise IndexError("Boolean index does not match the number "
+                                 "of rows")
+            return np.flatnonzero(rows)
+        if not rows.size:
+            return rows.astype(int)
+        if rows.ndim != 1 or not np.issubdtype(rows.dtype, np.integer):
+            raise IndexError("Row indices must be integers.")
+        if rows.min() < 0:
+            rows = np.where(rows < 0, rows + len(self), rows)
+            if rows.min() < 0:
+                raise IndexError("Row index out of range")
+        return rows
+
+    def _select_rows(self, rows):
+        """
+        Return a table with the given rows.
+
+        Rows are numbered in the database in the order of a stable key (see
+        `_row_order`) and selected by their numbers, so the returned SqlTable
+        is still lazy. Numbers of many scattered rows are stored in a table
+        that is joined to the query. Rows given in other than increasing
+        order are fetched and returned as an ordinary Table.
+        """
+        rows = self._row_numbers(rows)
+        if isinstance(rows, slice) or np.all(np.diff(rows) > 0):
+            if not isinstance(rows, slice) and len(rows) \
+                    and rows[-1] - rows[0] + 1 == len(rows):
+                rows = slice(int(rows[0]), int(rows[-1]) + 1)
+            backend = self.backend
+            suffix = uuid4().hex[:8]
+            row_field = backend.quote_identifier("__row_" + suffix)
+            row_number = backend.row_number_sql.format(
+                ", ".join(self._row_order()))
+            numbered = self._sql_query(
+                ["*", "{} - 1 AS {}".format(row_number, row_field)])
+            table = self.copy()
+            table.table_name = "({}) AS {}".format(
+                numbered, backend.quote_identifier("__rows_" + suffix))
+            table._row_key = (table.table_name, [row_field])
+            if not isinstance(rows, slice) and len(rows) > MAX_ROWS_IN_QUERY:
+                self._drop_stale_samples()
+                rows_table = _RowsTable(backend, rows)
+                table._rows_tables += (rows_table, )
+                rows = rows_table.name
+            table.row_filters = (sql_filter.RowNumbersSql(row_field, rows),)
+            table.name = self.name
+            return table
+
+        unique, inverse = np.unique(rows, return_inverse=True)
+        selected = self._select_rows(unique)
+        selected.download_data()
+        return Table.from_table_rows(
+            Table.from_numpy(self.domain, selected.X, selected.Y,
+                             selected.metas), inverse)
+
+    def _row_order(self):
+        """
+        Return expressions that order the rows in the same way in all
+        queries, so that rows can be numbered. These are the row numbers of
+        the table whose rows were selected, the key given by the backend
+        (e.g. the primary key) or, if there is none, all columns; rows that
+        are equal in all columns are interchangeable.
+        """
+        if self._is_numbered():
+            return self._row_key[1]
+
+        def row_order():
+            backend = self.backend
+            return backend.row_order(self.table_name) or [
+                backend.quote_identifier(field[0])
+                for field in backend.get_fields(self.table_name)]
+
+        return self.backend.metadata_cache.get(
+            self.table_name, "row_order", row_order)
+
     @functools.lru_cache(maxsize=128)
     def _fetch_row(self, row_index):
         attributes = self.domain.variables + self.domain.metas
@@ -190,6 +302,23 @@ class SqlTable(Table):
             yield SqlRowInstance(self.domain, row)
 
     def _query(self, attributes=None, filters=(), rows=None):
+        query = self._query_sql(attributes, filters, rows)
+        with self.backend.execute_sql_query(query) as cur:
+            while True:
+                row = cur.fetchone()
+                if row is None:
+                    break
+                yield row
+
+    def _query_arrays(self, attributes, filters=(), rows=None,
+                      batch_size=None):
+        """Yield the results of the query as lists of arrays with values of
+        attributes (see `Backend.fetch_arrays`)."""
+        query = self._query_sql(attributes, filters, rows)
+        yield from self.backend.fetch_arrays(
+            query, attributes, batch_size=batch_size or DOWNLOAD_BATCH_SIZE)
+
+    def _query_sql(self, attributes=None, filters=(), rows=None):
         if attributes is not None:
             fields = []
             for attr in attributes:
@@ -211,18 +340,27 @@ class SqlTable(Table):
                 if rows.stop is not None:
                     limit = rows.stop - offset
             else:
-                rows = list(rows)
-                offset, stop = min(rows), max(rows)
-                limit = stop - offset + 1
-
-        # TODO: this returns all rows between min(rows) and max(rows): fix!
-        query = self._sql_query(fields, filters, offset=offset, limit=limit)
-        with self.backend.execute_sql_query(query) as cur:
-            while True:
-                row = cur.fetchone()
-                if row is None:
-                    break
-                yield row
+                rows = np.unique(list(rows)).astype(int)
+                if not len(rows) or rows[-1] - rows[0] + 1 != len(rows):
+                    # fetch exactly the selected rows
+                    table = self._select_rows(rows)
+                    return table._sql_query(fields, filters,
+                                            order_by=table._row_order())
+                offset, limit = int(rows[0]), len(rows)
+
+        # numbered rows are returned in the order of their numbers; other
+        # queries are not ordered, so that the database can stream the rows
+        # without sorting them first
+        order_by = None
+        if rows is not None or self._is_numbered():
+            order_by = self._row_order()
+        return self._sql_query(fields, filters, order_by=order_by,
+                               offset=offset, limit=limit)
+
+    def _is_numbered(self):
+        """Return True if the table's rows were selected by `_select_rows`"""
+        return self._row_key is not None \
+            and self._row_key[0] == self.table_name
 
     def copy(self):
         """Return a copy of the SqlTable"""
@@ -232,8 +370,16 @@ class SqlTable(Table):
         table.row_filters = self.row_filters
         table.table_name = self.table_name
         table.name = self.name
+        table._row_key = self._row_key
+        table._rows_tables = self._rows_tables
         return table
 
+    def invalidate_cache(self):
+        """Discard cached row counts, statistics and distinct values of the
+        table, for instance after the data in the database has changed."""
+        self.backend.metadata_cache.invalidate(self.table_name)
+        self._cached__len__ = None
+
     def __bool__(self):
         """Return True if the SqlTable is not empty."""
         query = self._sql_query(["1"], limit=1)
@@ -253,25 +399,28 @@ class SqlTable(Table):
 
     def _count_rows(self):
         query = self._sql_query(["COUNT(*)"])
-        with self.backend.execute_sql_query(query) as cur:
-            self._cached__len__ = cur.fetchone()[0]
+        (self._cached__len__, ), = self.backend.cached_query(
+            query, self.table_name)
         return self._cached__len__
 
     def approx_len(self, get_exact=False):
         if self._cached__len__ is not None:
             return self._cached__len__
 
-        approx_len = None
-        try:
-            query = self._sql_query(["*"])
-            approx_len = self.backend.count_approx(query)
-            if get_exact:
-                threading.Thread(target=len, args=(self,)).start()
-        except NotImplementedError:
-            pass
-
+        def count_approx():
+            try:
+                return self.backend.count_approx(query)
+            except NotImplementedError:
+                # remember that the backend cannot estimate the count
+                return None
+
+        query = self._sql_query(["*"])
+        approx_len = self.backend.metadata_cache.get(
+            self.table_name, ("count_approx", query), count_approx)
         if approx_len is None:
             approx_len = len(self)
+        elif get_exact:
+            threading.Thread(target=len, args=(self,)).start()
 
         return approx_len
 
@@ -285,16 +434,39 @@ class SqlTable(Table):
         """Download SQL data and store it in memory as numpy matrices."""
         if limit and not partial and self.approx_len() > limit:
             raise ValueError("Too many rows to download the data into memory.")
-        X = [np.empty((0, len(self.domain.attributes)))]
-        Y = [np.empty((0, len(self.domain.class_vars)))]
-        metas = [np.empty((0, len(self.domain.metas)))]
-        for row in islice(self, limit):
-            X.append(row._x)
-            Y.append(row._y)
-            metas.append(row._metas)
-        self._X = np.vstack(X).astype(np.float64)
-        self._Y = np.vstack(Y).astype(np.float64)
-        self._metas = np.vstack(metas).astype(object)
+        domain = self.domain
+        variables = domain.variables
+        attributes = variables + domain.metas
+        nattrs, nvars = len(domain.attributes), len(variables)
+        X = [np.empty((0, nattrs))]
+        Y = [np.empty((0, len(domain.class_vars)))]
+        metas = [np.empty((0, len(domain.metas)), dtype=object)]
+        # partial downloads are the first rows; otherwise the limit is only
+        # a safeguard, and the rows are fetched without ordering them
+        rows = slice(0, limit) if limit and partial else None
+        n_downloaded = 0
+        if attributes:
+            for columns in self._query_arrays(attributes, rows=rows):
+                if limit and n_downloaded + len(columns[0]) > limit:
+                    columns = [column[:limit - n_downloaded]
+                               for column in columns]
+                n_rows = len(columns[0])
+                n_downloaded += n_rows
+                values = np.empty((n_rows, nvars))
+                for i, column in enumerate(columns[:nvars]):
+                    values[:, i] = column
+                X.append(values[:, :nattrs])
+                Y.append(values[:, nattrs:])
+                batch_metas = np.empty((n_rows, len(domain.metas)),
+                                       dtype=object)
+                for i, column in enumerate(columns[nvars:]):
+                    batch_metas[:, i] = column
+                metas.append(batch_metas)
+                if limit and n_downloaded >= limit:
+                    break
+        self._X = np.vstack(X)
+        self._Y = np.vstack(Y)
+        self._metas = np.vstack(metas)
         self._W = np.empty((self._X.shape[0], 0))
         self._init_ids(self)
         if not partial or limit and self._X.shape[0] < limit:
@@ -361,24 +533,84 @@ class SqlTable(Table):
 
     def _get_stats(self, columns):
         columns = [(c.to_sql(), c.is_continuous) for c in columns]
+        continuous_stats = self.backend.continuous_stats_sql \
+            or self.CONTINUOUS_STATS
         sql_fields = []
         for field_name, continuous in columns:
-            stats = self.CONTINUOUS_STATS if continuous else self.DISCRETE_STATS
+            stats = continuous_stats if continuous else self.DISCRETE_STATS
             sql_fields.append(stats % dict(field_name=field_name))
-        query = self._sql_query(sql_fields)
-        with self.backend.execute_sql_query(query) as cur:
-            results = cur.fetchone()
+        partitions = self._partitions()
+        if partitions is None:
+            query = self._sql_query(sql_fields)
+            results, = self.backend.cached_query(query, self.table_name)
+        else:
+            queries = [self._sql_query(sql_fields, filters=[partition])
+                       for partition in partitions]
+            results = [rows[0] for rows in self._parallel_queries(queries)]
         stats = []
         i = 0
         for ci, (field_name, continuous) in enumerate(columns):
+            if partitions is not None:
+                width = 6 if continuous else 2
+                stat = self._merge_stats([r[i:i + width] for r in results])
+            elif continuous:
+                stat = results[i:i + 6]
+            else:
+                stat = results[i:i + 2]
             if continuous:
-                stats.append(results[i:i+6])
+                stats.append(stat)
                 i += 6
             else:
-                stats.append((None,) * 4 + results[i:i+2])
+                stats.append((None,) * 4 + stat)
                 i += 2
         return stats
 
+    @staticmethod
+    def _merge_stats(partial):
+        """Merge statistics (see `_get_stats`) computed on partitions"""
+        nulls = sum(int(p[-2] or 0) for p in partial)
+        nonnulls = sum(int(p[-1] or 0) for p in partial)
+        if len(partial[0]) == 2:
+            return nulls, nonnulls
+        partial = [tuple(None if v is None else float(v) for v in p[:4])
+                   + (int(p[-1] or 0),) for p in partial if p[-1]]
+        if not partial:
+            return None, None, None, None, nulls, nonnulls
+        mins, maxs, means, stds, ns = zip(*partial)
+        mean = sum(n * m for n, m in zip(ns, means)) / nonnulls
+        std = None
+        if nonnulls > 1:
+            # sum of squared deviations from the partial sums (Chan et al.)
+            m2 = sum((n - 1) * (s or 0) ** 2 + n * (m - mean) ** 2
+                     for n, m, s in zip(ns, means, stds))
+            std = (m2 / (nonnulls - 1)) ** 0.5
+        return min(mins), max(maxs), mean, std, nulls, nonnulls
+
+    def _partitions(self):
+        """Return filters for partitions of the table that are scanned in
+        parallel, or `None` if the table is not large enough or the backend
+        does not support partitioning"""
+        n_partitions = self.backend.max_parallel_queries
+        if n_partitions <= 1 or self.approx_len() <= PARALLEL_SCAN_ROWS:
+            return None
+        return self.backend.metadata_cache.get(
+            self.table_name, ("partitions", n_partitions),
+            lambda: self.backend.partition_filters(self.table_name,
+                                                   n_partitions))
+
+    def _parallel_queries(self, queries):
+        """Return rows of (aggregate) queries, which run concurrently on at
+        most `max_parallel_queries` connections"""
+        n_workers = min(self.backend.max_parallel_queries, len(queries))
+        if n_workers <= 1:
+            return [self.backend.cached_query(query, self.table_name)
+                    for query in queries]
+        table_name = self.table_name
+        with ThreadPoolExecutor(n_workers) as executor:
+            return list(executor.map(
+                lambda query: self.backend.cached_query(query, table_name),
+                queries))
+
     def _compute_distributions(self, columns=None):
         if self.approx_len() > LARGE_TABLE:
             self = self.sample_time(DEFAULT_SAMPLE_TIME)
@@ -390,20 +622,22 @@ class SqlTable(Table):
         return self._get_distributions(columns)
 
     def _get_distributions(self, columns):
+        fields = [col.to_sql() for col in columns]
         dists = []
-        for col in columns:
-            field_name = col.to_sql()
-            fields = field_name, "COUNT(%s)" % field_name
-            query = self._sql_query(fields,
-                                    filters=['%s IS NOT NULL' % field_name],
-                                    group_by=[field_name],
-                                    order_by=[field_name])
-            with self.backend.execute_sql_query(query) as cur:
-                dist = np.array(cur.fetchall())
+        for col, counts in zip(columns,
+                               self._group_counts([[f] for f in fields])):
+            unknowns = sum(count for value, count in counts if value is None)
+            counts = [(value, count) for value, count in counts
+                      if value is not None]
             if col.is_continuous:
-                dists.append((dist.T, []))
+                dist = np.array(sorted(counts), dtype=float).reshape(-1, 2)
+                dists.append((dist.T, unknowns))
             else:
-                dists.append((dist[:, 1].T, []))
+                indices = [int(col.to_val(value)) for value, _ in counts]
+                dist = np.zeros(len(col.values))
+                for index, (_, count) in zip(indices, counts):
+                    dist[index] += count
+                dists.append((dist, unknowns))
         return dists
 
     def _compute_contingency(self, col_vars=None, row_var=None):
@@ -412,11 +646,10 @@ class SqlTable(Table):
 
         if col_vars is None:
             col_vars = range(len(self.domain.variables))
-        if len(col_vars) != 1:
-            raise NotImplementedError("Contingency for multiple columns "
-                                      "has not yet been implemented.")
         if row_var is None:
-            raise NotImplementedError("Defaults have not been implemented yet")
+            row_var = self.domain.class_var
+            if row_var is None:
+                raise ValueError("No row variable")
 
         row = self.domain[row_var]
         if not row.is_discrete:
@@ -430,27 +663,81 @@ class SqlTable(Table):
                              "and continuous values")
 
         row_field = row.to_sql()
-
-        all_contingencies = [None] * len(columns)
-        for i, column in enumerate(columns):
-            column_field = column.to_sql()
-            fields = [row_field, column_field, "COUNT(%s)" % column_field]
-            group_by = [row_field, column_field]
-            order_by = [column_field]
-            filters = ['%s IS NOT NULL' % f
-                       for f in (row_field, column_field)]
-            query = self._sql_query(fields, filters=filters,
-                                    group_by=group_by, order_by=order_by)
-            with self.backend.execute_sql_query(query) as cur:
-                data = list(cur.fetchall())
-                if column.is_continuous:
-                    all_contingencies[i] = \
-                        (self._continuous_contingencies(data, row), [])
+        groups = [[row_field, column.to_sql()] for column in columns]
+        filters = ['%s IS NOT NULL' % row_field]
+
+        all_contingencies = []
+        for column, data in zip(columns,
+                                self._group_counts(groups, filters)):
+            unknowns = np.zeros(len(row.values))
+            known = []
+            for row_value, column_value, count in data:
+                if column_value is None:
+                    unknowns[row.to_val(row_value)] += count
                 else:
-                    all_contingencies[i] =\
-                        (self._discrete_contingencies(data, row, column), [])
+                    known.append((row_value, column_value, count))
+            if column.is_continuous:
+                known.sort(key=lambda x: x[1])
+                cont = self._continuous_contingencies(known, row)
+            else:
+                cont = self._discrete_contingencies(known, row, column)
+            all_contingencies.append((cont, unknowns))
         return all_contingencies, None
 
+    def _group_counts(self, groups, filters=()):
+        """
+        Count rows for each combination of values of fields (SQL expressions)
+        in each of the `groups`, including NULL values.
+
+        If the backend supports grouping sets, all groups are counted with a
+        single query (and a single scan), otherwise with a query per group.
+        Queries for partitions of large tables (see `_partitions`) run
+        concurrently and their counts are summed.
+
+        Returns a list with a list of tuples `(*values, count)` for each group.
+        """
+        partitions = [[p] for p in self._partitions() or []] or [[]]
+        if len(groups) > 1 and self.backend.supports_grouping_sets:
+            fields = list(OrderedDict.fromkeys(f for g in groups for f in g))
+            index = {f: i for i, f in enumerate(fields)}
+            group_of = OrderedDict()
+            for i, group in enumerate(groups):
+                group_of.setdefault(frozenset(group), []).append(i)
+            grouping_sets = "GROUPING SETS ({})".format(", ".join(
+                "({})".format(", ".join(group)) for group in
+                (groups[indices[0]] for indices in group_of.values())))
+            queries = [self._sql_query(
+                fields + ["GROUPING(%s)" % f for f in fields] + ["COUNT(*)"],
+                filters=list(filters) + partition,
+                group_by=[grouping_sets]) for partition in partitions]
+            counts = [OrderedDict() for _ in groups]
+            n_fields = len(fields)
+            for rows in self._parallel_queries(queries):
+                for row in rows:
+                    grouped = frozenset(
+                        f for f, grouping in zip(fields, row[n_fields:-1])
+                        if not grouping)
+                    for i in group_of[grouped]:
+                        key = tuple(row[index[f]] for f in groups[i])
+                        counts[i][key] = counts[i].get(key, 0) + row[-1]
+        else:
+            # a query for each group and partition, which run concurrently
+            queries = [self._sql_query(group + ["COUNT(*)"],
+                                       filters=list(filters) + partition,
+                                       group_by=group)
+                       for group in groups for partition in partitions]
+            all_rows = iter(self._parallel_queries(queries))
+            counts = []
+            for _ in groups:
+                group_counts = OrderedDict()
+                for _ in partitions:
+                    for row in next(all_rows):
+                        key = row[:-1]
+                        group_counts[key] = group_counts.get(key, 0) + row[-1]
+                counts.append(group_counts)
+        return [[key + (count, ) for key, count in group_counts.items()]
+                for group_counts in counts]
+
     def _continuous_contingencies(self, data, row):
         values = np.zeros(len(data))
         counts = np.zeros((len(row.values), len(data)))
@@ -464,7 +751,7 @@ class SqlTable(Table):
                 last = column_value
                 values[i] = column_value
                 counts[row.to_val(row_value), i] += count
-        return (values, counts)
+        return (values[:i + 1], counts[:, :i + 1])
 
     def _discrete_contingencies(self, data, row, column):
         conts = np.zeros((len(row.values), len(column.values)))
@@ -556,12 +843,29 @@ class SqlTable(Table):
 
     @classmethod
     def from_table(cls, domain, source, row_indices=...):
-        assert row_indices is ...
+        if row_indices is not ...:
+            source = source._select_rows(row_indices)
+            if not isinstance(source, SqlTable):
+                return Table.from_table(domain, source)
+
+        from Orange.data.sql.expression import SqlExpression, sql_expression
+        for var in domain.variables + domain.metas:
+            if not hasattr(var, "to_sql") and var.compute_value is not None:
+                # compute the derived variable in the database, if possible
+                try:
+                    sql_expression(var)
+                except NotImplementedError:
+                    continue
+                var.to_sql = SqlExpression(var)
 
         table = source.copy()
         table.domain = domain
         return table
 
+    @classmethod
+    def from_table_rows(cls, source, row_indices):
+        return source._select_rows(row_indices)
+
     # sql queries
     def _sql_query(self, fields, filters=(),
                    group_by=None, order_by=None, offset=None, limit=None,
@@ -584,64 +888,155 @@ class SqlTable(Table):
                        "STDDEV(%(field_name)s)::double precision, " \
                        + DISCRETE_STATS
 
-    def sample_percentage(self, percentage, no_cache=False):
+    def sample_percentage(self, percentage, no_cache=False, seed=None):
         if percentage >= 100:
             return self
         return self._sample('system', percentage,
-                            no_cache=no_cache)
+                            no_cache=no_cache, seed=seed)
 
     def sample_time(self, time_in_seconds, no_cache=False):
         return self._sample('system_time', int(time_in_seconds * 1000),
                             no_cache=no_cache)
 
-    def _sample(self, method, parameter, no_cache=False):
-        # the module is optional, but this function is not called if it's not installed
-        # pylint: disable=import-error
-        import psycopg2
-        if "," in self.table_name:
-            raise NotImplementedError("Sampling of complex queries is not supported")
-
+    def sample_levels(self, percentages=SAMPLE_LEVELS, seed=0,
+                      no_cache=False):
+        """
+        Return nested samples with the given percentages of rows, from the
+        smallest to the largest, e.g. for visualizations that are refined
+        from coarse to fine samples.
+
+        Only the largest sample is drawn from the table; each smaller sample
+        is drawn from the next larger one, so it is also its subset. Samples
+        with the same seed are reproducible and are reused until dropped
+        with `drop_samples`.
+        """
+        percentages = sorted(percentages, reverse=True)
+        self._drop_stale_samples()
+        samples = []
+        source, source_percentage = self, 100
+        for i, percentage in enumerate(percentages):
+            if percentage >= 100:
+                samples.append(self)
+                continue
+            relative = round(100 * percentage / source_percentage, 6)
+            sample_table = self._sample_table_name(
+                "nested", "_".join(map(str, percentages[:i + 1])), seed)
+            source = source._create_sample(
+                sample_table,
+                self.backend.create_sample_query(
+                    source.table_name, "system", str(relative), seed),
+                no_cache)
+            source_percentage = percentage
+            samples.append(source)
+        return samples[::-1]
+
+    def drop_samples(self, max_age=None):
+        """
+        Drop the tables with samples of this table (and samples of the
+        samples) that were not used in the last `max_age` seconds, or all
+        of them if `max_age` is `None`.
+
+        Besides samples drawn in this session, this also drops samples
+        that were left in the database by other sessions and are older
+        than `max_age`, if the backend can tell their age (see
+        `Backend.stale_tables`).
+        """
+        backend = self.backend
+        backend.drop_samples(self.table_name, max_age)
+        schema, name = self._sample_name_parts()
+        if schema is not None:
+            schema = backend.unquote_identifier(schema)
+        for method in SAMPLE_METHODS:
+            for sample_name in backend.stale_tables(
+                    "__%s_%s_" % (name, method), max_age or 0, schema):
+                sample_table = self._quote_sample_name(sample_name)
+                if sample_table not in backend.sample_tables:
+                    backend.drop_sample(sample_table)
+
+    def _drop_stale_samples(self):
+        # Drop samples (and tables with numbers of selected rows) that were
+        # not used for SAMPLE_MAX_AGE seconds before creating new ones; the
+        # metadata cache limits this to once per METADATA_CACHE_TTL for each
+        # table
+        def drop():
+            backend = self.backend
+            try:
+                backend.drop_samples(max_age=SAMPLE_MAX_AGE)
+                self.drop_samples(SAMPLE_MAX_AGE)
+                # tables left by sessions that did not drop them
+                for name in backend.stale_tables(
+                        ROWS_TABLE_PREFIX, SAMPLE_MAX_AGE):
+                    rows_table = backend.quote_identifier(name)
+                    if rows_table not in backend.sample_tables:
+                        backend.drop_sample(rows_table)
+            except BackendError as ex:
+                sql_log.warning("Samples could not be dropped: %s", ex)
+            return True
+
+        self.backend.metadata_cache.get(
+            self.table_name, "drop_stale_samples", drop)
+
+    def _sample(self, method, parameter, no_cache=False, seed=None):
         parameter = str(parameter)
-        if "." in self.table_name:
+        self._drop_stale_samples()
+        return self._create_sample(
+            self._sample_table_name(method, parameter, seed),
+            self.backend.create_sample_query(
+                self.table_name, method, parameter, seed),
+            no_cache)
+
+    def _sample_name_parts(self):
+        # the (quoted) schema and the unquoted name used in names of samples
+        if self.table_name.startswith("("):
+            return None, "query_" + hashlib.md5(
+                self.table_name.encode("utf-8")).hexdigest()[:16]
+        elif "." in self.table_name:
             schema, name = self.table_name.split(".")
-            sample_name = '__%s_%s_%s' % (
-                self.backend.unquote_identifier(name),
-                method,
-                parameter.replace('.', '_').replace('-', '_'))
-            sample_table_q = ".".join([schema, self.backend.quote_identifier(sample_name)])
+            return schema, self.backend.unquote_identifier(name)
         else:
-            sample_table = '__%s_%s_%s' % (
-                self.backend.unquote_identifier(self.table_name),
-                method,
-                parameter.replace('.', '_').replace('-', '_'))
-            sample_table_q = self.backend.quote_identifier(sample_table)
-        create = False
+            return None, self.backend.unquote_identifier(self.table_name)
+
+    def _quote_sample_name(self, sample_name):
+        schema, _ = self._sample_name_parts()
+        sample_table_q = self.backend.quote_identifier(sample_name)
+        if schema is not None:
+            sample_table_q = ".".join([schema, sample_table_q])
+        return sample_table_q
+
+    def _sample_table_name(self, method, parameter, seed=None):
+        _, name = self._sample_name_parts()
+        if seed is not None:
+            parameter = "%s_s%s" % (parameter, seed)
+        return self._quote_sample_name('__%s_%s_%s' % (
+            name, method, parameter.replace('.', '_').replace('-', '_')))
+
+    def _create_sample(self, sample_table_q, query, no_cache=False):
+        """Return a table with the sample, which is stored in the table
+        `sample_table_q` and created with `query` if it does not exist."""
         try:
-            query = "SELECT * FROM " + sample_table_q + " LIMIT 0;"
-            with self.backend.execute_sql_query(query):
+            with self.backend.execute_sql_query(
+                    "SELECT * FROM " + sample_table_q + " LIMIT 0"):
                 pass
-
-            if no_cache:
-                query = "DROP TABLE " + sample_table_q
-                with self.backend.execute_sql_query(query):
-                    pass
-                create = True
-
+            exists = True
         except BackendError:
-            create = True
+            exists = False
 
-        if create:
+        if exists and no_cache:
             with self.backend.execute_sql_query(
-                    " ".join(["CREATE TABLE", sample_table_q, "AS",
-                              "SELECT * FROM", self.table_name,
-                              "TABLESAMPLE", method, "(", parameter, ")"])):
+                    "DROP TABLE " + sample_table_q):
                 pass
-
+        if not exists or no_cache:
+            with self.backend.execute_sql_query(
+                    self.backend.create_table_as_sql.format(
+                        sample_table_q, query)):
+                pass
+            with self.backend.execute_sql_query("ANALYZE " + sample_table_q):
+                pass
+            self.backend.metadata_cache.invalidate(sample_table_q)
         sampled_table = self.copy()
         sampled_table.table_name = sample_table_q
-        with sampled_table.backend.execute_sql_query('ANALYZE'
-                                                     + sample_table_q):
-            pass
+        self.backend.sample_tables.register(
+            sample_table_q, self.table_name, sampled_table)
         return sampled_table
 
     @contextmanager
@@ -654,6 +1049,31 @@ class SqlTable(Table):
         return np.nan
 
 
+class _RowsTable:
+    """
+    A table in the database with numbers of selected rows (see
+    `Backend.create_rows_table`), which is dropped when the object is
+    garbage collected.
+
+    The table is registered with the backend's sample tables, so tables
+    that were not dropped (e.g. because the process was killed) are found
+    by `Backend.stale_tables` and dropped like stale samples.
+    """
+    def __init__(self, backend, rows):
+        self.name = backend.quote_identifier(
+            ROWS_TABLE_PREFIX + uuid4().hex)
+        backend.create_rows_table(self.name, rows)
+        backend.sample_tables.register(self.name, None, self)
+        weakref.finalize(self, _drop_table, backend, self.name)
+
+
+def _drop_table(backend, table_name):
+    try:
+        backend.drop_sample(table_name)
+    except BackendError:
+        pass
+
+
 class SqlRowInstance(Instance):
     """
     Extends :obj:`Orange.data.Instance` to correctly handle values of meta
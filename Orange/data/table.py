@@ -3,10 +3,11 @@ import os
 import warnings
 import zlib
 from collections import MutableSequence, Iterable, Sequence, Sized
+from contextlib import contextmanager
 from functools import reduce
 from itertools import chain
 from numbers import Real, Integral
-from threading import Lock, RLock
+from threading import Lock, RLock, local
 
 import bottleneck as bn
 import numpy as np
@@ -26,7 +27,8 @@ from Orange.statistics.util import bincount, countnans, contingency, \
     sparse_implicit_zero_weights
 from Orange.util import flatten
 
-__all__ = ["dataset_dirs", "get_sample_datasets_dir", "RowInstance", "Table"]
+__all__ = ["dataset_dirs", "get_sample_datasets_dir", "RowInstance", "Table",
+           "lazy_row_subsets"]
 
 
 def get_sample_datasets_dir():
@@ -44,6 +46,29 @@ of Table."""
 _conversion_cache = None
 _conversion_cache_lock = RLock()
 
+# whether row selections in the current thread are lazy (see lazy_row_subsets)
+_lazy_subsets = local()
+
+
+@contextmanager
+def lazy_row_subsets():
+    """
+    A context in which tables that are constructed by selecting rows in this
+    thread -- by indexing, with filters or with `Table.from_table_rows` --
+    postpone copying their rows (see `Table.from_table_rows` with `lazy`).
+
+    Use it only where the source tables are not changed in place while the
+    subsets exist, e.g. in widgets, which must not change their inputs.
+    Changes of the subsets themselves are safe, since arrays are copied when
+    they are first accessed.
+    """
+    enabled = getattr(_lazy_subsets, "enabled", False)
+    _lazy_subsets.enabled = True
+    try:
+        yield
+    finally:
+        _lazy_subsets.enabled = enabled
+
 
 def pending_deprecation_resize(name):
     warnings.warn(f"Method Table.{name} will be removed in Orange 3.24",
@@ -174,6 +199,180 @@ class Columns:
             setattr(self, v.name.replace(" ", "_"), v)
 
 
+class _CompactColumns:
+    """
+    Attribute values stored in two blocks: codes of discrete attributes as
+    one- or two-byte unsigned integers and other attributes as floats.
+    The largest value of the integer type stands for unknown values.
+    """
+    def __init__(self, codes, values, index):
+        self.codes = codes
+        self.values = values
+        # for each column: whether it is stored as codes and its index
+        # within the block
+        self.index = index
+
+    @classmethod
+    def from_array(cls, X, attributes):
+        n_values = [len(var.values) if var.is_discrete else 0
+                    for var in attributes]
+        is_code = [0 < n < np.iinfo(np.uint16).max for n in n_values]
+        max_values = max((n for n, c in zip(n_values, is_code) if c),
+                         default=0)
+        dtype = np.uint8 if max_values < np.iinfo(np.uint8).max \
+            else np.uint16
+        code_cols = [i for i, c in enumerate(is_code) if c]
+        value_cols = [i for i, c in enumerate(is_code) if not c]
+
+        unknown = np.iinfo(dtype).max
+        codes = np.empty((X.shape[0], len(code_cols)), dtype=dtype)
+        for j, i in enumerate(code_cols):
+            col = X[:, i]
+            codes[:, j] = np.where(np.isnan(col), unknown, col)
+        values = np.array(X[:, value_cols], dtype=np.float64)
+        index = [(c, code_cols.index(i) if c else value_cols.index(i))
+                 for i, c in enumerate(is_code)]
+        return cls(codes, values, index)
+
+    @property
+    def unknown(self):
+        return np.iinfo(self.codes.dtype).max
+
+    @property
+    def shape(self):
+        return self.codes.shape[0], len(self.index)
+
+    def __len__(self):
+        return self.codes.shape[0]
+
+    def __getitem__(self, row_indices):
+        return _CompactColumns(self.codes[row_indices],
+                               self.values[row_indices], self.index)
+
+    def column_codes(self, col):
+        is_code, i = self.index[col]
+        return self.codes[:, i] if is_code else None
+
+    def column(self, col):
+        is_code, i = self.index[col]
+        if not is_code:
+            return self.values[:, i]
+        codes = self.codes[:, i]
+        values = codes.astype(np.float64)
+        values[codes == self.unknown] = np.nan
+        return values
+
+    def to_array(self):
+        X = np.empty(self.shape)
+        for col in range(X.shape[1]):
+            X[:, col] = self.column(col)
+        return X
+
+    def is_view(self):
+        return self.codes.base is not None or self.values.base is not None
+
+    def copy(self):
+        return _CompactColumns(self.codes.copy(), self.values.copy(),
+                               self.index)
+
+
+class _EncodedMetas:
+    """
+    Meta attributes whose string columns are dictionary-encoded: stored as
+    indices into arrays of distinct values. Other columns are kept in an
+    array of objects.
+    """
+    def __init__(self, codes, uniques, values, index):
+        self.codes = codes
+        self.uniques = uniques
+        self.values = values
+        # for each column: whether it is encoded and its index within the
+        # block of codes or values
+        self.index = index
+
+    @classmethod
+    def from_array(cls, metas, variables):
+        is_code = [var.is_string for var in variables]
+        code_cols = [i for i, c in enumerate(is_code) if c]
+        value_cols = [i for i, c in enumerate(is_code) if not c]
+
+        codes = np.empty((metas.shape[0], len(code_cols)), dtype=np.int32)
+        uniques = []
+        for j, i in enumerate(code_cols):
+            codes[:, j], distinct = _factorize(metas[:, i])
+            uniques.append(distinct)
+        values = np.array(metas[:, value_cols], dtype=object)
+        index = [(c, code_cols.index(i) if c else value_cols.index(i))
+                 for i, c in enumerate(is_code)]
+        return cls(codes, uniques, values, index)
+
+    @property
+    def shape(self):
+        return self.codes.shape[0], len(self.index)
+
+    def __len__(self):
+        return self.codes.shape[0]
+
+    def __getitem__(self, row_indices):
+        return _EncodedMetas(self.codes[row_indices], self.uniques,
+                             self.values[row_indices], self.index)
+
+    def column_codes(self, col):
+        is_code, i = self.index[col]
+        return (self.codes[:, i], self.uniques[i]) if is_code else None
+
+    def column(self, col):
+        is_code, i = self.index[col]
+        if not is_code:
+            return self.values[:, i]
+        return self.uniques[i][self.codes[:, i]]
+
+    def to_array(self):
+        metas = np.empty(self.shape, dtype=object)
+        for col in range(metas.shape[1]):
+            metas[:, col] = self.column(col)
+        return metas
+
+    def is_view(self):
+        return self.codes.base is not None or self.values.base is not None
+
+    def copy(self):
+        return _EncodedMetas(self.codes.copy(), self.uniques,
+                             self.values.copy(), self.index)
+
+
+class _RowSubset:
+    """
+    Rows of an array of another table, selected by indices. The rows are
+    copied only when they are needed as an array.
+    """
+    def __init__(self, array, indices):
+        self.array = array
+        self.indices = indices
+
+    @property
+    def shape(self):
+        return (len(self.indices), ) + self.array.shape[1:]
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, row_indices):
+        return _RowSubset(self.array, self.rows(row_indices))
+
+    def rows(self, row_indices):
+        # indices of the given rows of the subset in the array
+        if row_indices is ...:
+            return self.indices
+        return self.indices[row_indices]
+
+    def column(self, col):
+        return self.array[self.indices, col]
+
+    def to_array(self):
+        return self.array[self.indices]
+
+
 # noinspection PyPep8Naming
 class Table(MutableSequence, Storage):
     __file__ = None
@@ -192,6 +391,42 @@ class Table(MutableSequence, Storage):
     _next_instance_id = 0
     _next_instance_lock = Lock()
 
+    # attributes stored in blocks with different types and dictionary-encoded
+    # metas (see `to_compact`); X and metas are assembled on first access
+    _compact = None
+    _compact_metas = None
+    # rows of arrays of another table (see `from_table_rows`), by the names
+    # of the arrays; they are copied on first access
+    _rows = None
+
+    def __getattr__(self, name):
+        if name == "X" and self.__dict__.get("_compact") is not None:
+            self.X = self._compact.to_array()
+            self._compact = None
+            return self.X
+        if name == "metas" \
+                and self.__dict__.get("_compact_metas") is not None:
+            self.metas = self._compact_metas.to_array()
+            self._compact_metas = None
+            return self.metas
+        rows = self.__dict__.get("_rows")
+        if rows and name in rows:
+            array = rows.pop(name).to_array()
+            setattr(self, name, array)
+            return array
+        raise AttributeError("'{}' object has no attribute '{}'".format(
+            type(self).__name__, name))
+
+    def __getstate__(self):
+        # copy the rows of lazy subsets instead of pickling the arrays of
+        # the tables they refer to
+        for name in list(self._rows or ()):
+            if self._lazy_rows(name) is not None:
+                getattr(self, name)
+        state = dict(self.__dict__)
+        state.pop("_rows", None)
+        return state
+
     @property
     def Y(self):
         if self._Y.shape[1] == 1:
@@ -292,34 +527,79 @@ class Table(MutableSequence, Storage):
 
         global _conversion_cache
 
+        # columns of compact tables are read from blocks without assembling
+        # X and metas
+        compact = source._compact_columns()
+        compact_metas = source._compact_meta_columns()
+
+        def source_rows(name, row_indices):
+            # an array of the source and indices of the rows in it; rows of
+            # lazy subsets are read from the array of the table they refer to
+            rows = source._lazy_rows(name)
+            if rows is not None:
+                return rows.array, rows.rows(row_indices)
+            return getattr(source, name), row_indices
+
+        def source_subarray(name, row_indices, cols, array=None):
+            # rows of lazy subsets are copied, not viewed, so that the new
+            # table does not share memory with the table they refer to
+            source_array, rows = source_rows(name, row_indices)
+            if array is None:
+                array = source_array
+            sub = _subarray(array, rows, cols)
+            if rows is not row_indices and np.may_share_memory(sub, array):
+                sub = sub.copy()
+            return sub
+
+        def columns_of(X):
+            # slicing columns of CSR matrices scans all stored values, so
+            # columns of sparse X are taken from a CSC copy that is made
+            # once per conversion
+            if not sp.issparse(X) or X.format == "csc":
+                return X
+            key = ("csc", id(X))
+            if _conversion_cache.get(key, (None, ))[0] is not X:
+                _conversion_cache[key] = (X, X.tocsc())
+            return _conversion_cache[key][1]
+
         def get_columns(row_indices, src_cols, n_rows, dtype=np.float64, is_sparse=False):
             if not len(src_cols):
+                x_dtype = np.float64 if compact is not None \
+                    else source_rows("X", row_indices)[0].dtype
                 if is_sparse:
-                    return sp.csr_matrix((n_rows, 0), dtype=source.X.dtype)
+                    return sp.csr_matrix((n_rows, 0), dtype=x_dtype)
                 else:
-                    return np.zeros((n_rows, 0), dtype=source.X.dtype)
+                    return np.zeros((n_rows, 0), dtype=x_dtype)
 
             # match density for subarrays
             match_density = assure_array_sparse if is_sparse else assure_array_dense
             n_src_attrs = len(source.domain.attributes)
-            if all(isinstance(x, Integral) and 0 <= x < n_src_attrs
-                   for x in src_cols):
-                return match_density(_subarray(source.X, row_indices, src_cols))
-            if all(isinstance(x, Integral) and x < 0 for x in src_cols):
-                arr = match_density(_subarray(source.metas, row_indices,
-                                              [-1 - x for x in src_cols]))
+            if compact is None and \
+                    all(isinstance(x, Integral) and 0 <= x < n_src_attrs
+                        for x in src_cols):
+                X = source_rows("X", row_indices)[0]
+                if len(src_cols) == 1:
+                    # single columns, as used by transformations
+                    X = columns_of(X)
+                return match_density(
+                    source_subarray("X", row_indices, src_cols, X))
+            if compact_metas is None and \
+                    all(isinstance(x, Integral) and x < 0 for x in src_cols):
+                arr = match_density(source_subarray(
+                    "metas", row_indices, [-1 - x for x in src_cols]))
                 if arr.dtype != dtype:
                     return arr.astype(dtype)
                 return arr
             if all(isinstance(x, Integral) and x >= n_src_attrs
                    for x in src_cols):
-                return match_density(_subarray(
-                    source._Y, row_indices,
-                    [x - n_src_attrs for x in src_cols]))
+                return match_density(source_subarray(
+                    "_Y", row_indices, [x - n_src_attrs for x in src_cols]))
 
-            # initialize final array & set `match_density` for columns
+            # initialize final array & set `match_density` for columns;
+            # sparse columns are stacked at the end, since assignments to
+            # columns of sparse matrices are slow
             if is_sparse:
-                a = sp.dok_matrix((n_rows, len(src_cols)), dtype=dtype)
+                columns = []
                 match_density = assure_column_sparse
             else:
                 a = np.empty((n_rows, len(src_cols)), dtype=dtype)
@@ -328,34 +608,41 @@ class Table(MutableSequence, Storage):
             shared_cache = _conversion_cache
             for i, col in enumerate(src_cols):
                 if col is None:
-                    a[:, i] = Unknown
+                    column = np.full(n_rows, Unknown)
                 elif not isinstance(col, Integral):
                     if isinstance(col, SharedComputeValue):
                         if (id(col.compute_shared), id(source)) not in shared_cache:
                             shared_cache[id(col.compute_shared), id(source)] = \
                                 col.compute_shared(source)
                         shared = shared_cache[id(col.compute_shared), id(source)]
-                        if row_indices is not ...:
-                            a[:, i] = match_density(
-                                col(source, shared_data=shared)[row_indices])
-                        else:
-                            a[:, i] = match_density(
-                                col(source, shared_data=shared))
+                        column = col(source, shared_data=shared)
                     else:
-                        if row_indices is not ...:
-                            a[:, i] = match_density(col(source)[row_indices])
-                        else:
-                            a[:, i] = match_density(col(source))
+                        column = col(source)
+                    if row_indices is not ...:
+                        column = column[row_indices]
                 elif col < 0:
-                    a[:, i] = match_density(source.metas[row_indices, -1 - col])
+                    if compact_metas is not None:
+                        column = compact_metas.column(-1 - col)[row_indices]
+                    else:
+                        metas, rows = source_rows("metas", row_indices)
+                        column = metas[rows, -1 - col]
                 elif col < n_src_attrs:
-                    a[:, i] = match_density(source.X[row_indices, col])
+                    if compact is not None:
+                        column = compact.column(col)[row_indices]
+                    else:
+                        X, rows = source_rows("X", row_indices)
+                        column = columns_of(X)[rows, col]
                 else:
-                    a[:, i] = match_density(
-                        source._Y[row_indices, col - n_src_attrs])
+                    Y, rows = source_rows("_Y", row_indices)
+                    column = Y[rows, col - n_src_attrs]
+
+                if is_sparse:
+                    columns.append(match_density(column))
+                else:
+                    a[:, i] = match_density(column)
 
             if is_sparse:
-                a = a.tocsr()
+                a = sp.hstack(columns, format="csr", dtype=dtype)
 
             return a
 
@@ -378,7 +665,7 @@ class Table(MutableSequence, Storage):
                     return table
 
                 if isinstance(row_indices, slice):
-                    start, stop, stride = row_indices.indices(source.X.shape[0])
+                    start, stop, stride = row_indices.indices(len(source))
                     n_rows = (stop - start) // stride
                     if n_rows < 0:
                         n_rows = 0
@@ -406,15 +693,18 @@ class Table(MutableSequence, Storage):
                                          is_sparse=conversion.sparse_metas)
                 if self.metas.ndim == 1:
                     self.metas = self.metas.reshape(-1, len(self.domain.metas))
-                if source.has_weights():
-                    self.W = source.W[row_indices]
-                else:
+                W, rows = source_rows("W", row_indices)
+                if W.shape[-1] == 0:
                     self.W = np.empty((n_rows, 0))
-                self.name = getattr(source, 'name', '')
-                if hasattr(source, 'ids'):
-                    self.ids = source.ids[row_indices]
                 else:
+                    self.W = W[rows]
+                self.name = getattr(source, 'name', '')
+                try:
+                    ids, rows = source_rows("ids", row_indices)
+                except AttributeError:
                     cls._init_ids(self)
+                else:
+                    self.ids = ids[rows]
                 self.attributes = getattr(source, 'attributes', {})
                 _conversion_cache[(id(domain), id(source))] = self
                 return self
@@ -448,29 +738,84 @@ class Table(MutableSequence, Storage):
         return type(self).from_table(domain, self)
 
     @classmethod
-    def from_table_rows(cls, source, row_indices):
+    def from_table_rows(cls, source, row_indices, lazy=None):
         """
         Construct a new table by selecting rows from the source table.
 
+        If `lazy` is set, the rows are not copied until the arrays (`X`,
+        `Y`, `metas`, `W` and `ids`) are first accessed. Until then, the
+        table refers to the arrays of the source, so the source must not be
+        changed in place. Selections from such tables, their column views
+        and their domain transformations read the rows directly from the
+        arrays they refer to. If `lazy` is `None`, rows are selected lazily
+        within :obj:`lazy_row_subsets`.
+
         :param source: an existing table
         :type source: Orange.data.Table
         :param row_indices: indices of the rows to include
         :type row_indices: a slice or a sequence
+        :param lazy: postpone copying the rows
+        :type lazy: bool or None
         :return: a new table
         :rtype: Orange.data.Table
         """
+        if lazy is None:
+            lazy = getattr(_lazy_subsets, "enabled", False)
+        if isinstance(row_indices, Integral):
+            lazy = False
+        lazy_indices = None
+        if lazy:
+            lazy_indices = _lazy_row_indices(row_indices, len(source))
+
         self = cls()
         self.domain = source.domain
-        self.X = source.X[row_indices]
-        if self.X.ndim == 1:
-            self.X = self.X.reshape(-1, len(self.domain.attributes))
-        self.Y = source._Y[row_indices]
-        self.metas = source.metas[row_indices]
-        if self.metas.ndim == 1:
-            self.metas = self.metas.reshape(-1, len(self.domain.metas))
-        self.W = source.W[row_indices]
+        lazy_rows = {}
+
+        def select(name):
+            # rows of the array of the source; `None` if they are not copied
+            rows = source._lazy_rows(name)
+            if rows is not None:
+                if lazy:
+                    lazy_rows[name] = rows[row_indices]
+                    return None
+                return rows.array[rows.rows(row_indices)]
+            array = getattr(source, name)
+            if lazy_indices is not None and isinstance(array, np.ndarray):
+                lazy_rows[name] = _RowSubset(array, lazy_indices)
+                return None
+            return array[row_indices]
+
+        compact = source._compact_columns()
+        if compact is not None and not isinstance(row_indices, Integral):
+            self._compact = compact[row_indices]
+        else:
+            X = select("X")
+            if X is not None:
+                self.X = X
+                if self.X.ndim == 1:
+                    self.X = self.X.reshape(-1, len(self.domain.attributes))
+        Y = select("_Y")
+        if Y is not None:
+            self.Y = Y
+        compact_metas = source._compact_meta_columns()
+        if compact_metas is not None \
+                and not isinstance(row_indices, Integral):
+            self._compact_metas = compact_metas[row_indices]
+        else:
+            metas = select("metas")
+            if metas is not None:
+                self.metas = metas
+                if self.metas.ndim == 1:
+                    self.metas = self.metas.reshape(-1, len(self.domain.metas))
+        W = select("W")
+        if W is not None:
+            self.W = W
+        ids = select("ids")
+        if ids is not None:
+            self.ids = np.array(ids)
+        if lazy_rows:
+            self._rows = lazy_rows
         self.name = getattr(source, 'name', '')
-        self.ids = np.array(source.ids[row_indices])
         self.attributes = getattr(source, 'attributes', {})
         return self
 
@@ -553,15 +898,31 @@ class Table(MutableSequence, Storage):
         attrs, classes = domain.attributes, domain.class_vars
         metas = domain.metas
         nattrs, ncls = len(domain.attributes), len(domain.class_vars)
-        for i, row in enumerate(rows):
-            if isinstance(row, Instance):
-                row = row.list
-            for j, (var, val) in enumerate(zip(attrs, row)):
-                self.X[i, j] = var.to_val(val)
-            for j, (var, val) in enumerate(zip(classes, row[nattrs:])):
-                self._Y[i, j] = var.to_val(val)
-            for j, (var, val) in enumerate(zip(metas, row[nattrs + ncls:])):
-                self.metas[i, j] = var.to_val(val)
+        rows = [row.list if isinstance(row, Instance) else row
+                for row in rows]
+        if rows and min(map(len, rows)) >= nattrs + ncls + len(metas):
+            # convert by columns, so that discrete values are encoded at once
+            for array, variables, offset in ((self.X, attrs, 0),
+                                             (self._Y, classes, nattrs),
+                                             (self.metas, metas,
+                                              nattrs + ncls)):
+                for j, var in enumerate(variables, start=offset):
+                    column = [row[j] for row in rows]
+                    if var.is_discrete:
+                        array[:, j - offset] = var.encode(
+                            np.array(column, dtype=object))
+                    else:
+                        array[:, j - offset] = [var.to_val(val)
+                                                for val in column]
+        else:
+            for i, row in enumerate(rows):
+                for j, (var, val) in enumerate(zip(attrs, row)):
+                    self.X[i, j] = var.to_val(val)
+                for j, (var, val) in enumerate(zip(classes, row[nattrs:])):
+                    self._Y[i, j] = var.to_val(val)
+                for j, (var, val) in enumerate(
+                        zip(metas, row[nattrs + ncls:])):
+                    self.metas[i, j] = var.to_val(val)
         if weights is not None:
             self.W = np.array(weights)
         self.attributes = {}
@@ -847,6 +1208,12 @@ class Table(MutableSequence, Storage):
         self.ids = np.delete(self.ids, key, axis=0)
 
     def __len__(self):
+        compact = self._compact_columns()
+        if compact is not None:
+            return len(compact)
+        rows = self._lazy_rows("X")
+        if rows is not None:
+            return len(rows)
         return self.X.shape[0]
 
     def __str__(self):
@@ -1048,11 +1415,19 @@ class Table(MutableSequence, Storage):
             # them creates copies in constructor we can skip this check here.
             return not sp.issparse(x) and x.base is not None
 
-        if is_view(self.X):
+        compact = self._compact_columns()
+        if compact is not None:
+            if compact.is_view():
+                self._compact = compact.copy()
+        elif is_view(self.X):
             self.X = self.X.copy()
         if is_view(self._Y):
             self._Y = self._Y.copy()
-        if is_view(self.metas):
+        compact_metas = self._compact_meta_columns()
+        if compact_metas is not None:
+            if compact_metas.is_view():
+                self._compact_metas = compact_metas.copy()
+        elif is_view(self.metas):
             self.metas = self.metas.copy()
         if is_view(self.W):
             self.W = self.W.copy()
@@ -1160,7 +1535,10 @@ class Table(MutableSequence, Storage):
         """
         Return a vector - as a view, not a copy - with a column of the table,
         and a bool flag telling whether this column is sparse. Note that
-        vertical slicing of sparse matrices is inefficient.
+        vertical slicing of sparse matrices is inefficient. Columns of
+        discrete attributes and string meta attributes of compact tables
+        (see :obj:`to_compact`) and columns of tables whose rows have not
+        been copied yet (see :obj:`from_table_rows`) are returned as copies.
 
         :param index: the index of the column
         :type index: int, str or Orange.data.Variable
@@ -1176,13 +1554,80 @@ class Table(MutableSequence, Storage):
         if not isinstance(index, Integral):
             index = self.domain.index(index)
         if index >= 0:
-            if index < self.X.shape[1]:
+            if index < len(self.domain.attributes):
+                compact = self._compact_columns()
+                if compact is not None:
+                    return compact.column(index), False
+                rows = self._lazy_rows("X")
+                if rows is not None:
+                    return rows.column(index), False
                 return rx(self.X[:, index])
             else:
-                return rx(self._Y[:, index - self.X.shape[1]])
+                index -= len(self.domain.attributes)
+                rows = self._lazy_rows("_Y")
+                if rows is not None:
+                    return rows.column(index), False
+                return rx(self._Y[:, index])
         else:
+            compact_metas = self._compact_meta_columns()
+            if compact_metas is not None:
+                return compact_metas.column(-1 - index), False
+            rows = self._lazy_rows("metas")
+            if rows is not None:
+                return rows.column(-1 - index), False
             return rx(self.metas[:, -1 - index])
 
+    def get_column_codes(self, index):
+        """
+        Return codes of values of a discrete attribute of a compact table
+        (see :obj:`to_compact`) and the code that stands for unknown values,
+        or `None` if the column is not stored as codes.
+
+        :param index: the index of the column
+        :type index: int, str or Orange.data.Variable
+        :return: (one-dimensional numpy array of unsigned integers, int)
+        """
+        compact = self._compact_columns()
+        if compact is None:
+            return None
+        if not isinstance(index, Integral):
+            index = self.domain.index(index)
+        if not 0 <= index < len(self.domain.attributes):
+            return None
+        codes = compact.column_codes(index)
+        if codes is None:
+            return None
+        return codes, compact.unknown
+
+    def _compact_columns(self):
+        # blocks with attribute values, unless X has already been assembled
+        if "X" in self.__dict__:
+            return None
+        return self._compact
+
+    def _compact_meta_columns(self):
+        # encoded meta attributes, unless metas have already been assembled
+        if "metas" in self.__dict__:
+            return None
+        return self._compact_metas
+
+    def _lazy_rows(self, name):
+        # rows of the array that have not been copied yet
+        if name in self.__dict__ or not self._rows:
+            return None
+        return self._rows.get(name)
+
+    def _encoded_strings(self, index):
+        # codes and distinct values of a dictionary-encoded string column
+        compact_metas = self._compact_meta_columns()
+        if compact_metas is None:
+            return None
+        if not isinstance(index, Integral):
+            index = self.domain.index(index)
+        if index >= 0:
+            return None
+        return compact_metas.column_codes(-1 - index)
+
     def _filter_is_defined(self, columns=None, negate=False):
         if columns is None:
             if sp.issparse(self.X):
@@ -1232,20 +1677,25 @@ class Table(MutableSequence, Storage):
         selection = self._values_filter_to_indicator(filter)
         return self.from_table(self.domain, self, selection)
 
-    def _values_filter_to_indicator(self, filter):
+    def _values_filter_to_indicator(self, filter, rows=None):
         """Return selection of rows matching the filter conditions
 
-        Handles conjunction/disjunction and negate modifiers
+        Handles conjunction/disjunction and negate modifiers. Conditions on
+        numeric columns are evaluated first; each of the following conditions
+        is evaluated only on rows that are not decided yet.
 
         Parameters
         ----------
         filter: Values object containing the conditions
+        rows: indices of rows to check (all if `None`)
 
         Returns
         -------
-        A 1d bool array. len(result) == len(self)
+        A 1d bool array. len(result) == len(self) or len(rows)
         """
-        from Orange.data.filter import Values
+        from Orange.data.filter import (
+            FilterContinuous, FilterDiscrete, Values
+        )
 
         if isinstance(filter, Values):
             conditions = filter.conditions
@@ -1253,42 +1703,73 @@ class Table(MutableSequence, Storage):
         else:
             conditions = [filter]
             conjunction = True
+        n_rows = len(self) if rows is None else len(rows)
         if conjunction:
-            sel = np.ones(len(self), dtype=bool)
+            sel = np.ones(n_rows, dtype=bool)
         else:
-            sel = np.zeros(len(self), dtype=bool)
-
-        for f in conditions:
-            selection = self._filter_to_indicator(f)
-
-            if conjunction:
-                sel *= selection
-            else:
-                sel += selection
+            sel = np.zeros(n_rows, dtype=bool)
+
+        # numeric comparisons are cheaper than string ones
+        conditions = sorted(
+            conditions,
+            key=lambda f: not isinstance(f, (FilterDiscrete,
+                                             FilterContinuous)))
+        for i, f in enumerate(conditions):
+            if i == 0:
+                sel[:] = self._filter_to_indicator(f, rows)
+                continue
+            # conjunctions need to check only the selected rows and
+            # disjunctions only those that are not
+            undecided = np.flatnonzero(sel if conjunction else ~sel)
+            if not len(undecided):
+                break
+            sel[undecided] = self._filter_to_indicator(
+                f, undecided if rows is None else rows[undecided])
 
         if filter.negate:
             sel = ~sel
         return sel
 
-    def _filter_to_indicator(self, filter):
+    def _filter_to_indicator(self, filter, rows=None):
         """Return selection of rows that match the condition.
 
         Parameters
         ----------
         filter: ValueFilter describing the condition
+        rows: indices of rows to check (all if `None`)
 
         Returns
         -------
-        A 1d bool array. len(result) == len(self)
+        A 1d bool array. len(result) == len(self) or len(rows)
         """
         from Orange.data.filter import (
             FilterContinuous, FilterDiscrete, FilterRegex, FilterString,
             FilterStringList, Values
         )
         if isinstance(filter, Values):
-            return self._values_filter_to_indicator(filter)
+            return self._values_filter_to_indicator(filter, rows)
+
+        if isinstance(filter, (FilterString, FilterStringList, FilterRegex)):
+            encoded = self._encoded_strings(filter.column)
+            if encoded is not None:
+                codes, uniques = encoded
+                if rows is not None:
+                    codes = codes[rows]
+            else:
+                col = self.get_column_view(filter.column)[0]
+                if rows is not None:
+                    col = col[rows]
+                if isinstance(filter, FilterStringList) \
+                        and filter.case_sensitive:
+                    # comparisons of objects are as fast as factorization
+                    return self._strings_filter_to_indicator(filter, col)
+                codes, uniques = _factorize(col)
+            # evaluate the condition once for each distinct value
+            return self._strings_filter_to_indicator(filter, uniques)[codes]
 
         col = self.get_column_view(filter.column)[0]
+        if rows is not None:
+            col = col[rows]
 
         if isinstance(filter, FilterDiscrete):
             return self._discrete_filter_to_indicator(filter, col)
@@ -1296,6 +1777,23 @@ class Table(MutableSequence, Storage):
         if isinstance(filter, FilterContinuous):
             return self._continuous_filter_to_indicator(filter, col)
 
+        raise TypeError("Invalid filter")
+
+    def _strings_filter_to_indicator(self, filter, col):
+        """Return selection of values matched by the given string, string
+        list or regular expression filter.
+
+        Parameters
+        ----------
+        filter: FilterString, FilterStringList or FilterRegex
+        col: np.ndarray
+
+        Returns
+        -------
+        A 1d bool array. len(result) == len(col)
+        """
+        from Orange.data.filter import FilterString, FilterStringList
+
         if isinstance(filter, FilterString):
             return self._string_filter_to_indicator(filter, col)
 
@@ -1307,10 +1805,7 @@ class Table(MutableSequence, Storage):
                 vals = filter.values
             return reduce(operator.add, (col == val for val in vals))
 
-        if isinstance(filter, FilterRegex):
-            return np.vectorize(filter)(col)
-
-        raise TypeError("Invalid filter")
+        return np.fromiter(map(filter, col), dtype=bool, count=len(col))
 
     def _discrete_filter_to_indicator(self, filter, col):
         """Return selection of rows matched by the given discrete filter.
@@ -1322,13 +1817,13 @@ class Table(MutableSequence, Storage):
 
         Returns
         -------
-        A 1d bool array. len(result) == len(self)
+        A 1d bool array. len(result) == len(col)
         """
         if filter.values is None:  # <- is defined filter
             col = col.astype(float)
             return ~np.isnan(col)
 
-        sel = np.zeros(len(self), dtype=bool)
+        sel = np.zeros(len(col), dtype=bool)
         for val in filter.values:
             if not isinstance(val, Real):
                 val = self.domain[filter.column].to_val(val)
@@ -1345,7 +1840,7 @@ class Table(MutableSequence, Storage):
 
         Returns
         -------
-        A 1d bool array. len(result) == len(self)
+        A 1d bool array. len(result) == len(col)
         """
         if filter.oper == filter.IsDefined:
             col = col.astype(float)
@@ -1363,7 +1858,7 @@ class Table(MutableSequence, Storage):
 
         Returns
         -------
-        A 1d bool array. len(result) == len(self)
+        A 1d bool array. len(result) == len(col)
         """
         if filter.oper == filter.IsDefined:
             return col.astype(bool)
@@ -1379,14 +1874,11 @@ class Table(MutableSequence, Storage):
             fmax = fmax.lower()
 
         if filter.oper == filter.Contains:
-            return np.fromiter((fmin in e for e in col),
-                               dtype=bool)
+            return np.char.find(col, fmin) >= 0
         if filter.oper == filter.StartsWith:
-            return np.fromiter((e.startswith(fmin) for e in col),
-                               dtype=bool)
+            return np.char.startswith(col, fmin)
         if filter.oper == filter.EndsWith:
-            return np.fromiter((e.endswith(fmin) for e in col),
-                               dtype=bool)
+            return np.char.endswith(col, fmin)
 
         return self._range_filter_to_indicator(filter, col, fmin, fmax)
 
@@ -1448,23 +1940,33 @@ class Table(MutableSequence, Storage):
             columns = [self.domain.index(var) for var in columns]
 
         distributions = []
-        if sp.issparse(self.X):
-            self.X = self.X.tocsc()
+        compact = self._compact_columns()
+        X = None
+        if compact is None:
+            X = self.X.tocsc() if sp.issparse(self.X) else self.X
 
         W = self.W.ravel() if self.has_weights() else None
+        n_attrs = len(self.domain.attributes)
 
         for col in columns:
             variable = self.domain[col]
 
             # Select the correct data column from X, Y or metas
-            if 0 <= col < self.X.shape[1]:
-                x = self.X[:, col]
+            if 0 <= col < n_attrs and compact is not None:
+                codes = compact.column_codes(col)
+                if codes is not None:
+                    distributions.append(_count_codes(
+                        codes, compact.unknown, len(variable.values), W))
+                    continue
+                x = compact.column(col)
+            elif 0 <= col < n_attrs:
+                x = X[:, col]
             elif col < 0:
                 x = self.metas[:, col * (-1) - 1]
                 if np.issubdtype(x.dtype, np.dtype(object)):
                     x = x.astype(float)
             else:
-                x = self._Y[:, col - self.X.shape[1]]
+                x = self._Y[:, col - n_attrs]
 
             if variable.is_discrete:
                 dist, unknowns = bincount(x, weights=W, max_val=len(variable.values) - 1)
@@ -1503,7 +2005,8 @@ class Table(MutableSequence, Storage):
         return distributions
 
     def _compute_contingency(self, col_vars=None, row_var=None):
-        n_atts = self.X.shape[1]
+        n_atts = len(self.domain.attributes)
+        compact = self._compact_columns()
 
         if col_vars is None:
             col_vars = range(len(self.domain.variables))
@@ -1520,7 +2023,8 @@ class Table(MutableSequence, Storage):
         row_indi = self.domain.index(row_var)
         n_rows = len(row_desc.values)
         if 0 <= row_indi < n_atts:
-            row_data = self.X[:, row_indi]
+            row_data = self.get_column_view(row_indi)[0] \
+                if compact is not None else self.X[:, row_indi]
         elif row_indi < 0:
             row_data = self.metas[:, -1 - row_indi]
         else:
@@ -1549,10 +2053,38 @@ class Table(MutableSequence, Storage):
                 unknown_rows = np.sum(W[nan_inds])
 
         contingencies = [None] * len(col_desc)
-        for arr, f_cond, f_ind in (
-                (self.X, lambda i: 0 <= i < n_atts, lambda i: i),
-                (self._Y, lambda i: i >= n_atts, lambda i: i - n_atts),
-                (self.metas, lambda i: i < 0, lambda i: -1 - i)):
+        if compact is not None:
+            classes = row_data.astype(np.intp)
+            for col_i, (col, var) in enumerate(zip(col_indi, col_desc)):
+                if not 0 <= col < n_atts:
+                    continue
+                codes = compact.column_codes(col)
+                if codes is not None:
+                    if nan_inds is not None:
+                        codes = codes[~nan_inds]
+                    contingencies[col_i] = _codes_contingency(
+                        codes, compact.unknown, len(var.values),
+                        classes, n_rows, W)
+                else:
+                    col_data = compact.column(col)
+                    if nan_inds is not None:
+                        col_data = col_data[~nan_inds]
+                    if var.is_discrete:
+                        contingencies[col_i] = contingency(
+                            col_data, row_data, len(var.values) - 1,
+                            n_rows - 1, W)
+                    else:
+                        U, C, unknown = _contingency.contingency_floatarray(
+                            col_data, classes, n_rows,
+                            None if W is None else W.astype(np.float64))
+                        contingencies[col_i] = ([U, C], unknown)
+
+        blocks = [(self._Y, lambda i: i >= n_atts, lambda i: i - n_atts),
+                  (self.metas, lambda i: i < 0, lambda i: -1 - i)]
+        if compact is None:
+            X = self.X.tocsc() if sp.issparse(self.X) else self.X
+            blocks.insert(0, (X, lambda i: 0 <= i < n_atts, lambda i: i))
+        for arr, f_cond, f_ind in blocks:
 
             if nan_inds is not None:
                 arr = arr[~nan_inds]
@@ -1711,6 +2243,80 @@ class Table(MutableSequence, Storage):
         self.attributes["old_domain"] = table.domain
         return self
 
+    def to_compact(self):
+        """
+        Return a table that stores codes of values of discrete attributes as
+        one- or two-byte integers instead of floats; other attributes are
+        stored in a separate block of floats. String meta attributes are
+        dictionary-encoded: stored as indices into arrays of their distinct
+        values. Class values and weights are shared with this table.
+
+        Distributions, contingencies and learners that use them read the codes
+        directly, and string filters are evaluated once for each distinct
+        value. `X` and `metas` are assembled from the blocks when they are
+        first accessed; the table then stores them as any other table.
+        Sparse arrays are not changed.
+        """
+        table = type(self).from_table_rows(self, ...)
+        if table._compact_columns() is None and not sp.issparse(table.X):
+            table._compact = _CompactColumns.from_array(
+                table.X, self.domain.attributes)
+            del table.X
+        if table._compact_meta_columns() is None \
+                and any(var.is_string for var in self.domain.metas) \
+                and not sp.issparse(table.metas):
+            table._compact_metas = _EncodedMetas.from_array(
+                table.metas, self.domain.metas)
+            del table.metas
+        return table
+
+    def is_compact(self):
+        """
+        Return `True` if the table stores discrete attributes as codes (see
+        :obj:`to_compact`)
+        """
+        return self._compact_columns() is not None
+
+    def to_shared(self, directory=None):
+        """
+        Store the table's arrays into a file that other processes can map
+        into memory, and return a handle, which is small to pickle. Processes
+        reconstruct the table with :obj:`from_shared` without copying the
+        arrays. The file is removed when the handle is closed or garbage
+        collected in this process (see :obj:`Orange.data.shared`).
+
+        :param directory: directory for the file; shared memory by default
+        :type directory: str
+        :return: a handle to the shared arrays
+        :rtype: Orange.data.shared.SharedTable
+        """
+        from Orange.data.shared import SharedTable
+        return SharedTable(self, directory)
+
+    @classmethod
+    def from_shared(cls, shared):
+        """
+        Construct a table from arrays shared by another process (see
+        :obj:`to_shared`). The arrays are mapped copy-on-write, so changes
+        of the table are not seen by other processes.
+
+        :param shared: a handle to the shared arrays
+        :type shared: Orange.data.shared.SharedTable
+        :return: a new table
+        :rtype: Orange.data.Table
+        """
+        arrays = shared.arrays()
+        self = cls()
+        self.domain = shared.domain
+        self.X = arrays["X"]
+        self._Y = arrays["_Y"]
+        self.metas = arrays["metas"]
+        self.W = arrays["W"]
+        self.ids = arrays["ids"]
+        self.name = shared.name
+        self.attributes = shared.attributes
+        return self
+
     def to_sparse(self, sparse_attributes=True, sparse_class=False,
                   sparse_metas=False):
         def sparsify(features):
@@ -1746,6 +2352,39 @@ class Table(MutableSequence, Storage):
         return t
 
 
+def _factorize(values):
+    """Return indices of values in the array of distinct values (in the
+    order of appearance) and the array of distinct values"""
+    values = values.tolist()
+    lookup = {value: k for k, value in enumerate(dict.fromkeys(values))}
+    codes = np.fromiter(map(lookup.__getitem__, values),
+                        dtype=np.int32, count=len(values))
+    uniques = np.empty(len(lookup), dtype=object)
+    uniques[:] = list(lookup)
+    return codes, uniques
+
+
+def _count_codes(codes, unknown, n_values, weights=None):
+    """Distribution of a discrete column stored as codes (see `bincount`)"""
+    counts = np.bincount(codes, weights=weights, minlength=unknown + 1)
+    counts = counts.astype(float)
+    return counts[:n_values], counts[unknown]
+
+
+def _codes_contingency(codes, unknown, n_values, classes, n_classes,
+                       weights=None):
+    """Contingency of a discrete column stored as codes and the number of
+    unknown values for each class (see `contingency`)"""
+    known = codes != unknown
+    cont = np.bincount(
+        classes[known] + n_classes * codes[known].astype(np.intp),
+        weights=None if weights is None else weights[known],
+        minlength=n_classes * n_values)
+    nans = np.bincount(classes[~known], minlength=n_classes)
+    return (cont.astype(float).reshape(n_values, n_classes).T,
+            nans.astype(float))
+
+
 def _check_arrays(*arrays, dtype=None):
     checked = []
     if not len(arrays):
@@ -1831,6 +2470,28 @@ def _optimize_indices(indices, maxlen):
     return indices
 
 
+def _lazy_row_indices(row_indices, n_rows):
+    """
+    Return an array of indices of rows selected by a slice, a sequence of
+    indices or a mask. Invalid indices raise `IndexError`, as when the rows
+    are copied.
+    """
+    if row_indices is ...:
+        return np.arange(n_rows)
+    if isinstance(row_indices, slice):
+        return np.arange(*row_indices.indices(n_rows))
+    indices = np.asarray(row_indices)
+    if indices.dtype == np.bool:
+        if len(indices) != n_rows:
+            raise IndexError("mask of length {} for {} rows".format(
+                len(indices), n_rows))
+        return np.flatnonzero(indices)
+    indices = indices.astype(np.intp, copy=False)
+    if len(indices) and not -n_rows <= indices.min() <= indices.max() < n_rows:
+        raise IndexError("row index out of range")
+    return indices
+
+
 def _rxc_ix(rows, cols):
     """
     Construct an index object to index the `rows` x `cols` cross product.
@@ -1887,7 +2548,15 @@ def assure_domain_conversion_sparsity(target, source):
     """
     conversion = target.domain.get_conversion(source.domain)
     match_density = [assure_array_dense, assure_array_sparse]
-    target.X = match_density[conversion.sparse_X](target.X)
-    target.Y = match_density[conversion.sparse_Y](target.Y)
-    target.metas = match_density[conversion.sparse_metas](target.metas)
+    # compact tables and lazy subsets are dense and keep the blocks or rows
+    # unless sparse arrays are required
+    if not target.is_compact() and target._lazy_rows("X") is None \
+            or conversion.sparse_X:
+        target.X = match_density[conversion.sparse_X](target.X)
+    if target._lazy_rows("_Y") is None or conversion.sparse_Y:
+        target.Y = match_density[conversion.sparse_Y](target.Y)
+    if target._compact_meta_columns() is None \
+            and target._lazy_rows("metas") is None \
+            or conversion.sparse_metas:
+        target.metas = match_density[conversion.sparse_metas](target.metas)
     return target
@@ -1,6 +1,7 @@
 import unittest
 import numpy as np
-from Orange.data import ContinuousVariable, DiscreteVariable, TimeVariable, Table
+from Orange.data import ContinuousVariable, DiscreteVariable, TimeVariable, Table, \
+    Domain
 
 try:
     import pandas as pd
@@ -73,6 +74,44 @@ class TestPandasCompat(unittest.TestCase):
         self.assertEqual(list(df['sepal length'])[0:4], [5.1, 4.9, 4.7, 4.6])
         self.assertEqual(list(df['iris'])[0:2], ['Iris-setosa', 'Iris-setosa'])
 
+    def test_table_from_frame_shares_memory(self):
+        from Orange.data.pandas_compat import table_from_frame
+        df = pd.DataFrame(np.arange(12, dtype=float).reshape(4, 3),
+                          columns=list("abc"))
+        table = table_from_frame(df)
+        self.assertEqual([var.name for var in table.domain.attributes],
+                         list("abc"))
+        np.testing.assert_equal(table.X, df.values)
+        self.assertTrue(np.shares_memory(table.X, df.values))
+
+    def test_table_to_frame_shares_memory(self):
+        from Orange.data.pandas_compat import table_to_frame
+        table = Table("iris")
+        df = table_to_frame(table)
+        self.assertEqual(list(df.columns),
+                         [var.name for var in table.domain.variables])
+        self.assertTrue(np.shares_memory(df['sepal length'].values, table.X))
+
+        table = Table("zoo")
+        df = table_to_frame(table, include_metas=True)
+        self.assertEqual(list(df.columns),
+                         [var.name for var in table.domain.variables
+                          + table.domain.metas])
+        self.assertEqual(list(df['name'])[:2], ['aardvark', 'antelope'])
+        self.assertEqual(df['hair'].dtype, pd.api.types.CategoricalDtype(
+            table.domain['hair'].values))
+
+    def test_table_to_frame_nans(self):
+        from Orange.data.pandas_compat import table_to_frame
+        domain = Domain([ContinuousVariable("x", number_of_decimals=0),
+                         ContinuousVariable("y", number_of_decimals=0),
+                         DiscreteVariable("d", values="ab")])
+        table = Table.from_numpy(domain, [[1, 2, 0], [np.nan, 3, np.nan]])
+        df = table_to_frame(table)
+        self.assertEqual(df['x'].dtype, float)
+        self.assertEqual(df['y'].dtype, int)
+        self.assertEqual(list(df['d'].cat.codes), [0, -1])
+
     @unittest.skip("Convert all Orange demo dataset. It takes about 5s which is way to slow")
     def test_table_to_frame_on_all_orange_dataset(self):
         from os import listdir
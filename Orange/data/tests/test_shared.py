@@ -0,0 +1,174 @@
+import multiprocessing
+import os
+import pickle
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import scipy.sparse as sp
+
+from Orange.data import Table
+from Orange.data import shared as shared_module
+
+
+def _sum_of_shared(shared):
+    data = Table.from_shared(shared)
+    return float(np.nansum(data.X)), list(data.metas[:2, 0])
+
+
+def _drop_shared(shared):
+    shared.close()
+    del shared
+
+
+class TestSharedTable(unittest.TestCase):
+    def setUp(self):
+        self.data = Table("zoo")
+        self.data.W = np.arange(len(self.data), dtype=float)
+
+    def assert_tables_equal(self, table, data):
+        self.assertIs(table.domain, data.domain)
+        np.testing.assert_equal(table.X, data.X)
+        np.testing.assert_equal(table.Y, data.Y)
+        np.testing.assert_equal(table.metas, data.metas)
+        np.testing.assert_equal(table.W, data.W)
+        np.testing.assert_equal(table.ids, data.ids)
+
+    def test_from_shared(self):
+        data = self.data
+        with data.to_shared() as shared:
+            table = Table.from_shared(shared)
+            self.assert_tables_equal(table, data)
+            self.assertEqual(table.name, data.name)
+            self.assertIsNotNone(table.X.base)
+
+            # arrays are mapped copy-on-write
+            table.X[0, 0] = 42
+            table.metas[0, 0] = "foo"
+            other = Table.from_shared(shared)
+            self.assertNotEqual(other.X[0, 0], 42)
+            self.assertEqual(other.metas[0, 0], data.metas[0, 0])
+
+    def test_sparse(self):
+        data = self.data.to_sparse()
+        with data.to_shared() as shared:
+            table = Table.from_shared(shared)
+            self.assertTrue(sp.issparse(table.X))
+            np.testing.assert_equal(table.X.toarray(), data.X.toarray())
+            np.testing.assert_equal(table.metas, data.metas)
+
+    def test_empty(self):
+        data = self.data[:0]
+        with data.to_shared() as shared:
+            table = Table.from_shared(shared)
+            self.assertEqual(len(table), 0)
+            self.assertEqual(table.X.shape, data.X.shape)
+
+    def test_close(self):
+        shared = self.data.to_shared()
+        table = Table.from_shared(shared)
+        self.assertTrue(os.path.exists(shared.filename))
+
+        # handles in other processes do not remove the file
+        unpickled = pickle.loads(pickle.dumps(shared))
+        unpickled.close()
+        del unpickled
+        self.assertTrue(os.path.exists(shared.filename))
+
+        self.assertFalse(shared.closed)
+        shared.close()
+        self.assertTrue(shared.closed)
+        self.assertFalse(os.path.exists(shared.filename))
+        np.testing.assert_equal(table.X, self.data.X)
+
+        shared = self.data.to_shared()
+        filename = shared.filename
+        del shared
+        self.assertFalse(os.path.exists(filename))
+
+    def test_forked_handles_do_not_remove(self):
+        if "fork" not in multiprocessing.get_all_start_methods():
+            self.skipTest("fork is not available")
+        with self.data.to_shared() as shared:
+            # with fork, the handle is inherited, not pickled
+            process = multiprocessing.get_context("fork").Process(
+                target=_drop_shared, args=(shared,))
+            process.start()
+            process.join()
+            self.assertTrue(os.path.exists(shared.filename))
+        self.assertFalse(os.path.exists(shared.filename))
+
+    def test_deferred_removal(self):
+        shared = self.data.to_shared()
+        with patch("os.remove", side_effect=PermissionError):
+            shared.close()
+        self.assertTrue(shared.closed)
+        self.assertTrue(os.path.exists(shared.filename))
+        self.assertIn(shared.filename, shared_module._pending_removal)
+
+        shared_module._remove_pending()
+        self.assertFalse(os.path.exists(shared.filename))
+        self.assertNotIn(shared.filename, shared_module._pending_removal)
+
+    def test_shared_memory_full(self):
+        data = self.data
+        with patch("os.statvfs") as statvfs:
+            # no space in shared memory
+            statvfs.return_value.f_bavail = 0
+            statvfs.return_value.f_frsize = 4096
+            with data.to_shared() as shared:
+                self.assertEqual(os.path.dirname(shared.filename),
+                                 tempfile.gettempdir())
+                self.assert_tables_equal(Table.from_shared(shared), data)
+
+        if shared_module._shared_memory_dir() is None:
+            return
+        # shared memory is filled while the arrays are written
+        fdopen = os.fdopen
+        failed = []
+
+        class FullFile:
+            def __init__(self, fd):
+                self.file = fdopen(fd, "wb")
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *_):
+                self.file.close()
+
+            def tell(self):
+                return self.file.tell()
+
+            def write(self, _):
+                raise OSError(28, "No space left on device")
+
+        def fill_shared_memory(fd, mode):
+            if not failed:
+                failed.append(os.readlink("/proc/self/fd/%i" % fd))
+                return FullFile(fd)
+            return fdopen(fd, mode)
+
+        with patch("os.fdopen", fill_shared_memory):
+            with data.to_shared() as shared:
+                self.assertEqual(os.path.dirname(shared.filename),
+                                 tempfile.gettempdir())
+                self.assert_tables_equal(Table.from_shared(shared), data)
+        self.assertEqual(len(failed), 1)
+        self.assertEqual(os.path.dirname(failed[0]), "/dev/shm")
+        # the partial file is removed
+        self.assertFalse(os.path.exists(failed[0]))
+
+    def test_processes(self):
+        data = self.data
+        with data.to_shared() as shared:
+            self.assertLess(len(pickle.dumps(shared)), len(pickle.dumps(data)))
+            with multiprocessing.Pool(1) as pool:
+                result = pool.map(_sum_of_shared, [shared])
+        self.assertEqual(result, [(float(np.nansum(data.X)),
+                                   list(data.metas[:2, 0]))])
+
+
+if __name__ == "__main__":
+    unittest.main()
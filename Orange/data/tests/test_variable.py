@@ -2,13 +2,16 @@
 # pylint: disable=missing-docstring
 
 import sys
+import gc
 import math
+import weakref
 import unittest
 import pickle
 import pkgutil
 from datetime import datetime, timezone
 
 from io import StringIO
+from unittest.mock import patch
 
 import numpy as np
 
@@ -151,6 +154,36 @@ class TestDiscreteVariable(VariableTest):
         with self.assertRaises(ValueError):
             var.to_val("G")
 
+    def test_encode(self):
+        var = DiscreteVariable("x", values=["F", "M"])
+        np.testing.assert_equal(
+            var.encode(["M", "F", "?", "", None, "M", 1, 0.9, np.nan]),
+            [1, 0, np.nan, np.nan, np.nan, 1, 1, 1, np.nan])
+        np.testing.assert_equal(var.encode(np.array([["M"], ["F"]])),
+                                [[1], [0]])
+        np.testing.assert_equal(var.encode(np.array([1, 0])), [1, 0])
+        np.testing.assert_equal(var.encode([]), [])
+        with self.assertRaises(ValueError):
+            var.encode(["F", "G"])
+        np.testing.assert_equal(var.encode(["F", "G"], strict=False),
+                                [0, np.nan])
+        self.assertEqual(var.values, ["F", "M"])
+
+    def test_encode_add_values(self):
+        var = DiscreteVariable("x", values=["F", "M"])
+        np.testing.assert_equal(
+            var.encode(["M", "X", "F", "?", "A", "X"], add_values=True),
+            [1, 2, 0, np.nan, 3, 2])
+        self.assertEqual(var.values, ["F", "M", "X", "A"])
+
+    def test_decode(self):
+        var = DiscreteVariable("x", values=["F", "M"])
+        decoded = var.decode([1, np.nan, 0])
+        self.assertEqual(decoded.dtype, object)
+        self.assertEqual(list(decoded), ["M", None, "F"])
+        values = np.array(["M", "F", "F"], dtype=object)
+        np.testing.assert_equal(var.decode(var.encode(values)), values)
+
     def test_find_compatible_unordered(self):
         gend = DiscreteVariable("gend", values=["F", "M"])
 
@@ -283,6 +316,35 @@ class TestDiscreteVariable(VariableTest):
         d2 = pickle.loads(s)
         self.assertSequenceEqual(d2.values, ["two", "one", "three"])
 
+    def test_make_reuses_indexed(self):
+        var = DiscreteVariable.make("a", values=["F", "M"])
+        other = DiscreteVariable.make("a", values=["x", "y"])
+        self.assertNotEqual(var, other)
+        with patch.object(DiscreteVariable, "_add_compatible",
+                          autospec=True,
+                          side_effect=DiscreteVariable._add_compatible) \
+                as add_compatible:
+            self.assertEqual(DiscreteVariable.make("a", values=["M", "F"]),
+                             var)
+            self.assertEqual(DiscreteVariable.make("a", values=["y"]), other)
+            self.assertEqual(DiscreteVariable.make("a", values=["y"]), other)
+            # the first request checks both variables; repeated requests
+            # only check the indexed variable
+            self.assertEqual(add_compatible.call_count, 1 + 2 + 1)
+
+    def test_registry_does_not_keep_variables(self):
+        var = DiscreteVariable.make("a", values=["F", "M"])
+        proxy = DiscreteVariable.make("a", values=["F"])
+        self.assertEqual(proxy, var)
+        del var
+        gc.collect()
+        self.assertEqual(DiscreteVariable.make("a", values=["M"]), proxy)
+        master = weakref.ref(proxy.master)
+        del proxy
+        gc.collect()
+        self.assertIsNone(master())
+        self.assertEqual(len(DiscreteVariable._all_vars), 0)
+
 
 @variabletest(ContinuousVariable)
 class TestContinuousVariable(VariableTest):
@@ -294,6 +356,15 @@ class TestContinuousVariable(VariableTest):
         self.assertEqual(age1, age2)
         self.assertNotEqual(age1, age3)
 
+    def test_make_after_unreferenced(self):
+        ContinuousVariable._clear_cache()
+        age = ContinuousVariable.make("age")
+        master = weakref.ref(age.master)
+        del age
+        gc.collect()
+        self.assertIsNone(master())
+        self.assertIsNone(ContinuousVariable._all_vars.get("age"))
+
     def test_decimals(self):
         a = ContinuousVariable("a", 4)
         self.assertEqual(a.str_val(4.654321), "4.6543")
@@ -384,6 +455,38 @@ class TestTimeVariable(VariableTest):
         self.assertEqual(var.repr_val(ts2), datestr)
         self.assertEqual(var.repr_val(ts1), '2015-10-18 20:48:20')
 
+    def test_parse_array(self):
+        columns = [
+            [datestr for datestr, _, _ in self.TESTS],
+            ['2015-10-12 14:13:11.01+0200', '?', '2015-10-12T14:13:11-0130'],
+            ['2015-10-12 14:13:11+0200', '2015-10-12 14:13:11'],
+            ['2015-10-12 14:13', '1969-12-31 23:59:58.9', '1900-01-01'],
+            ['2015-10-12', '', '1900-01-01'],
+            ['01:01:01.01', '01:01', 'NA'],
+            ['1444651991.81', '1444651991'],
+        ]
+        for column in columns:
+            var1, var2 = TimeVariable('time'), TimeVariable('time')
+            expected = [var1.parse(datestr) for datestr in column]
+            np.testing.assert_equal(var2.parse_array(column), expected)
+            self.assertEqual((var2.have_date, var2.have_time,
+                              var2.utc_offset, var2.timezone),
+                             (var1.have_date, var1.have_time,
+                              var1.utc_offset, var1.timezone), msg=column)
+
+        var = TimeVariable('time')
+        with self.assertRaises(ValueError):
+            var.parse_array(['2015-10-12', '123'])
+
+    def test_parse_array_datetime64(self):
+        var = TimeVariable('time')
+        values = np.array(['1969-12-31', 'NaT'], dtype='datetime64[ns]')
+        np.testing.assert_equal(var.parse_array(values), [-86400, np.nan])
+        self.assertEqual((var.have_date, var.have_time), (1, 0))
+        values = np.array(['2015-10-12T14:13:11.81'], dtype='datetime64[ms]')
+        np.testing.assert_equal(var.parse_array(values), [1444659191.81])
+        self.assertEqual((var.have_date, var.have_time), (1, 1))
+
     def test_parse_timestamp(self):
         var = TimeVariable("time")
         datestr = str(datetime(2016, 6, 14, 23, 8, tzinfo=timezone.utc).timestamp())
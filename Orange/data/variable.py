@@ -1,7 +1,9 @@
-import collections
 import re
+import weakref
 
 from datetime import datetime, timedelta, timezone
+from functools import partial
+from itertools import repeat
 from numbers import Number, Real, Integral
 from math import isnan, floor
 from pickle import PickleError
@@ -247,11 +249,70 @@ class Value(float):
         self._value = state.get('value', None)
 
 
+class _VariableRegistry:
+    """
+    Variables (by names) that can be reused by :obj:`Variable.make`.
+
+    The registry does not keep variables alive: a variable is removed when
+    it (and thus all its proxies, which refer to it as their master) is no
+    longer referenced. Variables can also be indexed by keys (e.g. names and
+    values) for finding them without comparing them with all variables with
+    the same name.
+    """
+    def __init__(self):
+        self._vars = {}
+        self._index = weakref.WeakValueDictionary()
+
+    def add(self, var):
+        """Add a variable"""
+        ref = weakref.ref(var, partial(self._remove, var.name))
+        self._vars.setdefault(var.name, []).append(ref)
+
+    def _remove(self, name, ref):
+        refs = self._vars.get(name)
+        if refs is not None and ref in refs:
+            refs.remove(ref)
+            if not refs:
+                del self._vars[name]
+
+    def get(self, name):
+        """Return the last added variable with the given name or `None`"""
+        for ref in reversed(self._vars.get(name, [])):
+            var = ref()
+            if var is not None:
+                return var
+        return None
+
+    def variables(self, name):
+        """Return a list of variables with the given name, in the order in
+        which they were added"""
+        return [var for var in (ref() for ref in list(self._vars.get(name, [])))
+                if var is not None]
+
+    def find(self, key):
+        """Return the variable indexed by the key or `None`"""
+        return self._index.get(key)
+
+    def index(self, key, var):
+        """Index the variable by the key"""
+        self._index[key] = var
+
+    def clear(self):
+        self._vars.clear()
+        self._index.clear()
+
+    def __contains__(self, name):
+        return name in self._vars
+
+    def __len__(self):
+        return len(self._vars)
+
+
 class VariableMeta(Registry):
     def __new__(cls, name, bases, attrs):
         obj = super().__new__(cls, name, bases, attrs)
         if not hasattr(obj, '_all_vars') or obj._all_vars is Variable._all_vars:
-            obj._all_vars = {}
+            obj._all_vars = _VariableRegistry()
         return obj
 
 
@@ -334,10 +395,7 @@ class Variable(Reprable, metaclass=VariableMeta):
         self.attributes = {}
         self.master = self
         if name and compute_value is None:
-            if isinstance(self._all_vars, collections.defaultdict):
-                self._all_vars[name].append(self)
-            else:
-                self._all_vars[name] = self
+            self._all_vars.add(self)
         self._colors = None
 
     def make_proxy(self):
@@ -377,7 +435,8 @@ class Variable(Reprable, metaclass=VariableMeta):
     @classmethod
     def _clear_cache(cls):
         """
-        Clear the list of variables for reuse by :obj:`make`.
+        Clear the list of variables for reuse by :obj:`make`. (Variables that
+        are no longer referenced are removed from the list automatically.)
         """
         cls._all_vars.clear()
 
@@ -613,7 +672,7 @@ class DiscreteVariable(Variable):
 
     TYPE_HEADERS = ('discrete', 'd', 'categorical')
 
-    _all_vars = collections.defaultdict(list)
+    _all_vars = _VariableRegistry()
     presorted_values = []
 
     def __init__(self, name="", values=(), ordered=False, base_value=-1,
@@ -676,6 +735,83 @@ class DiscreteVariable(Variable):
                 type(s).__name__, self.name))
         return self.values.index(s)
 
+    def encode(self, values, add_values=False, strict=True):
+        """
+        Convert an array of values to an array of floats, as :obj:`to_val`
+        converts a single value: strings are converted to their indices in
+        :obj:`values`, representations of unknown values to `Unknown`, and
+        numbers are returned without checking.
+
+        Values are looked up in a dictionary in a single pass, so long arrays
+        are encoded without calling Python code for each value.
+
+        Strings that are not among :obj:`values` are added to them (in the
+        order of their first appearance) if `add_values` is set. Otherwise
+        they raise `ValueError` or, if `strict` is `False`, they are encoded
+        as unknown.
+
+        :param values: values, represented as numbers, strings or `None`
+        :type values: array-like
+        :param add_values: add new values to the variable
+        :type add_values: bool
+        :param strict: raise an error for strings that are not values
+        :type strict: bool
+        :rtype: np.ndarray
+        """
+        values = np.asarray(values)
+        shape = values.shape
+        values = values.ravel()
+        if values.dtype.kind in "biu":
+            return values.astype(float).reshape(shape)
+        if values.dtype.kind == "f":
+            return np.where(np.isnan(values), Unknown,
+                            np.floor(values + 0.25)).reshape(shape)
+
+        if values.dtype.kind == "S":
+            values = values.astype(str)
+        lookup = dict.fromkeys(self.unknown_str, Unknown)
+        lookup.update((value, i) for i, value in enumerate(self.values))
+        codes = np.fromiter(map(lookup.get, values.tolist(), repeat(-1)),
+                            dtype=float, count=len(values))
+        # values that were not found: numbers and new strings
+        not_found = np.flatnonzero(codes == -1)
+        if len(not_found):
+            missed = values[not_found].tolist()
+            distinct = dict.fromkeys(missed)
+            new = [value for value in distinct if isinstance(value, str)]
+            if new:
+                if add_values:
+                    lookup.update((value, i) for i, value
+                                  in enumerate(new, len(self.values)))
+                    self.add_values(new)
+                elif strict:
+                    raise ValueError("'{}' is not a value of '{}'".format(
+                        new[0], self.name))
+                else:
+                    lookup.update(dict.fromkeys(new, Unknown))
+            for value in distinct:
+                if not isinstance(value, str):
+                    lookup[value] = self.to_val(value)
+            codes[not_found] = np.fromiter(map(lookup.__getitem__, missed),
+                                           dtype=float, count=len(missed))
+        return codes.reshape(shape)
+
+    def decode(self, codes):
+        """
+        Return an array (with `dtype=object`) with values (strings) with the
+        given indices; unknown values are decoded as `None`.
+
+        :param codes: indices of values
+        :type codes: array-like
+        :rtype: np.ndarray
+        """
+        codes = np.asarray(codes, dtype=float)
+        known = ~np.isnan(codes)
+        decoded = np.full(codes.shape, None, dtype=object)
+        decoded[known] = np.array(self.values, dtype=object)[
+            codes[known].astype(int)]
+        return decoded
+
     def add_value(self, s):
         """ Add a value `s` to the list of values.
         """
@@ -684,6 +820,14 @@ class DiscreteVariable(Variable):
         self.values.append(s)
         self._colors = None
 
+    def add_values(self, values):
+        """ Add values to the list of values.
+        """
+        if not all(isinstance(value, str) for value in values):
+            raise TypeError("values of DiscreteVariables must be strings")
+        self.values.extend(values)
+        self._colors = None
+
     def val_from_str_add(self, s):
         """
         Similar to :obj:`to_val`, except that it accepts only strings and that
@@ -784,45 +928,57 @@ class DiscreteVariable(Variable):
         :returns: an existing compatible variable or `None`
         """
         base_rep = base_value != -1 and values[base_value]
-        existing = cls._all_vars.get(name)
-        if existing is None:
+        if name not in cls._all_vars:
             return None
         if not ordered:
             values = cls.ordered_values(values)
-        for var in existing:
-            if (var.ordered != ordered or
-                    var.base_value != -1
-                    and var.values[var.base_value] != base_rep):
-                continue
-            if not values:
-                break  # we have the variable - any existing values are OK
-            if not set(var.values) & set(values):
-                continue  # empty intersection of values; not compatible
-            if ordered:
-                i = 0
-                for val in var.values:
-                    if values[i] == val:
-                        i += 1
-                        if i == len(values):
-                            break  # we have all the values
-                else:  # we have some remaining values: check them, add them
-                    if set(values[i:]) & set(var.values):
-                        continue  # next var in existing
-                    for val in values[i:]:
-                        var.add_value(val)
-                break  # we have the variable
-            else:  # not ordered
-                vv = set(var.values)
-                for val in values:
-                    if val not in vv:
-                        var.add_value(val)
-                break  # we have the variable
-        else:
-            return None
+        # Variables found for previous requests are indexed by the request,
+        # so the variable is usually found without checking all variables
+        key = (name, tuple(values), ordered, base_rep)
+        var = cls._all_vars.find(key)
+        if var is None or not var._add_compatible(values, ordered, base_rep):
+            for var in cls._all_vars.variables(name):
+                if var._add_compatible(values, ordered, base_rep):
+                    break
+            else:
+                return None
+            cls._all_vars.index(key, var)
         if base_value != -1 and var.base_value == -1:
             var.base_value = var.values.index(base_rep)
         return var
 
+    def _add_compatible(self, values, ordered, base_rep):
+        """
+        Return `True` if the variable is compatible with the given values (see
+        :obj:`make`) and add the values it does not have yet.
+        """
+        if (self.ordered != ordered or
+                self.base_value != -1
+                and self.values[self.base_value] != base_rep):
+            return False
+        if not values:
+            return True  # we have the variable - any existing values are OK
+        if not set(self.values) & set(values):
+            return False  # empty intersection of values; not compatible
+        if ordered:
+            i = 0
+            for val in self.values:
+                if values[i] == val:
+                    i += 1
+                    if i == len(values):
+                        break  # we have all the values
+            else:  # we have some remaining values: check them, add them
+                if set(values[i:]) & set(self.values):
+                    return False
+                for val in values[i:]:
+                    self.add_value(val)
+        else:
+            vv = set(self.values)
+            for val in values:
+                if val not in vv:
+                    self.add_value(val)
+        return True
+
     @staticmethod
     def ordered_values(values):
         """
@@ -896,7 +1052,7 @@ class TimeVariable(ContinuousVariable):
 
     If time is specified wihout an UTC offset, localtime is assumed.
     """
-    _all_vars = {}
+    _all_vars = _VariableRegistry()
     TYPE_HEADERS = ('time', 't')
     UNIX_EPOCH = datetime(1970, 1, 1)
     _ISO_FORMATS = [
@@ -944,6 +1100,13 @@ class TimeVariable(ContinuousVariable):
              r'\d{1,4}(-?\d{2,3})?'
              r')$')
     _matches_iso_format = re.compile(REGEX).match
+    # The formats that parse_array parses with numpy: dates with optional
+    # times and UTC offsets, and times
+    _matches_numpy_date = re.compile(
+        r'^\d{4}-\d{2}-\d{2}'
+        r'( \d{2}:\d{2}|[ T]\d{2}:\d{2}:\d{2}(\.\d{1,6})?([+-]\d{4})?)?$').match
+    _matches_numpy_time = re.compile(
+        r'^\d{2}:\d{2}(:\d{2}(\.\d{1,6})?)?$').match
 
     # UTC offset and associated timezone. If parsed datetime values provide an
     # offset, it is used for display. If not all values have the same offset,
@@ -1042,16 +1205,7 @@ class TimeVariable(ContinuousVariable):
         else:
             raise ERROR
 
-        # Remember UTC offset. If not all parsed values share the same offset,
-        # remember none of it.
-        offset = dt.utcoffset()
-        if self.utc_offset is not False:
-            if offset and self.utc_offset is None:
-                self.utc_offset = offset
-                self.timezone = timezone(offset)
-            elif self.utc_offset != offset:
-                self.utc_offset = False
-                self.timezone = timezone.utc
+        self._remember_utc_offset(dt.utcoffset())
 
         # Convert time to UTC timezone. In dates without timezone,
         # localtime is assumed. See also:
@@ -1066,6 +1220,106 @@ class TimeVariable(ContinuousVariable):
         except OverflowError:
             return -(self.UNIX_EPOCH - dt).total_seconds()
 
+    def _remember_utc_offset(self, offset):
+        # Remember UTC offset. If not all parsed values share the same offset,
+        # remember none of it.
+        if self.utc_offset is not False:
+            if offset and self.utc_offset is None:
+                self.utc_offset = offset
+                self.timezone = timezone(offset)
+            elif self.utc_offset != offset:
+                self.utc_offset = False
+                self.timezone = timezone.utc
+
+    def parse_array(self, values):
+        """
+        Return an array of values, given as strings in ISO 8601 formats (see
+        `parse`) or as numpy's `datetime64`, parsed as real numbers.
+
+        Columns of dates and times in the common formats (e.g.
+        `2020-01-31 12:00:00+0100`) are parsed with numpy; other columns are
+        parsed value by value with `parse`.
+        """
+        values = np.asarray(values)
+        if np.issubdtype(values.dtype, np.datetime64):
+            return self._parse_datetime64(values)
+        missing = np.fromiter((value in MISSING_VALUES for value in values),
+                              dtype=bool, count=len(values))
+        parsed = np.full(len(values), np.nan)
+        strings = [value.strip().rstrip('Z') for value in values[~missing]]
+        column = self._parse_iso_column(strings) if strings else None
+        if column is None:
+            column = [self.parse(value) for value in values[~missing]]
+        parsed[~missing] = column
+        return parsed
+
+    def _parse_datetime64(self, values):
+        values = values.astype("datetime64[us]")
+        known = ~np.isnat(values)
+        parsed = np.full(len(values), np.nan)
+        parsed[known] = values[known].astype(np.int64) / 1e6
+        self.have_date = 1
+        self.have_time |= int(np.any(
+            values[known] != values[known].astype("datetime64[D]")))
+        return parsed
+
+    def _parse_iso_column(self, strings):
+        # Return None if the column must be parsed value by value
+        if self._matches_numpy_time(strings[0]):
+            if not all(map(self._matches_numpy_time, strings)):
+                return None
+            have_date, have_time = 0, 1
+            strings = ["1970-01-01T" + s for s in strings]
+            offsets = None
+        elif self._matches_numpy_date(strings[0]):
+            if not all(map(self._matches_numpy_date, strings)):
+                return None
+            have_date, have_time = 1, int(max(map(len, strings)) > 10)
+            has_offset = np.fromiter((len(s) > 19 and s[-5] in "+-"
+                                      for s in strings),
+                                     dtype=bool, count=len(strings))
+            offsets = np.full(len(strings), np.nan)
+            if has_offset.any():
+                hhmm = np.array([s[-4:] for s, has in zip(strings, has_offset)
+                                 if has]).astype(int)
+                signs = np.array([1 - 2 * (s[-5] == "-") for s, has
+                                  in zip(strings, has_offset) if has])
+                offsets[has_offset] = signs * (hhmm // 100 * 60 + hhmm % 100)
+                strings = [s[:-5] if has else s
+                           for s, has in zip(strings, has_offset)]
+        elif not any(map(self._matches_iso_format, strings)):
+            # If they are numbers, assume they are unix timestamps
+            try:
+                parsed = np.array(strings, dtype=float)
+            except ValueError:
+                return None
+            self.have_date = self.have_time = 1
+            return parsed
+        else:
+            return None
+
+        try:
+            dates = np.array(strings, dtype="datetime64[us]")
+        except ValueError:
+            return None
+        if np.any(dates < np.datetime64("0001-01-01")):
+            return None
+        parsed = dates.astype(np.int64) / 1e6
+        self.have_date |= have_date
+        self.have_time |= have_time
+        if offsets is None:
+            return parsed
+        known = ~np.isnan(offsets)
+        parsed[known] -= offsets[known] * 60
+        # remember offsets in the order in which parse would see them
+        changes = np.flatnonzero(np.r_[
+            True, ~((offsets[1:] == offsets[:-1])
+                    | (~known[1:] & ~known[:-1]))])
+        for offset in offsets[changes]:
+            self._remember_utc_offset(
+                None if np.isnan(offset) else timedelta(minutes=offset))
+        return parsed
+
     def to_val(self, s):
         """
         Convert a value, given as an instance of an arbitrary type, to a float.
@@ -1,7 +1,11 @@
 import warnings
+from collections import namedtuple
 
 import numpy as np
+import scipy.sparse as sp
+from scipy.spatial.distance import cdist
 from sklearn.metrics import silhouette_score, adjusted_mutual_info_score, silhouette_samples
+from sklearn.utils import check_random_state
 
 from Orange.data import Table
 from Orange.evaluation.testing import Results
@@ -113,6 +117,160 @@ class ClusteringEvaluation(ClusteringResults):
                 self.predicted[i, k, :] = labels.X.flatten()
 
 
+SilhouetteEstimate = namedtuple(
+    "SilhouetteEstimate",
+    ["mean", "std_error", "rows", "scores",
+     "cluster_means", "cluster_std_errors"])
+
+
+def _distances(metric, X, rows):
+    if callable(metric):
+        return np.asarray(metric(X[rows], X), dtype=float)
+    return cdist(X[rows], X, metric=metric)
+
+
+def silhouette_samples_blocked(X, labels, metric="euclidean", rows=None,
+                               block_size=1000):
+    """
+    Return exact silhouette scores without storing the distance matrix.
+
+    Distances from blocks of `block_size` rows to all rows are computed on
+    the fly and summed per cluster, so the memory use is linear in the
+    number of rows. Scores of rows in singleton clusters are 0, as in
+    :obj:`sklearn.metrics.silhouette_samples`.
+
+    Args:
+        X (np.ndarray or Table): data
+        labels (np.ndarray): cluster labels
+        metric (str or callable): a metric name for
+            `scipy.spatial.distance.cdist` or a function that takes two sets
+            of rows from `X` and returns a distance matrix (e.g. a fitted
+            :obj:`Orange.distance` model)
+        rows (np.ndarray): indices of rows for which to compute scores;
+            all rows by default
+        block_size (int): number of rows in a block of distances
+
+    Returns:
+        np.ndarray: silhouette scores of `rows`
+    """
+    _, labels = np.unique(labels, return_inverse=True)
+    n = len(labels)
+    if rows is None:
+        rows = np.arange(n)
+    sizes = np.bincount(labels).astype(float)
+    n_clusters = len(sizes)
+    if n_clusters < 2:
+        raise ValueError("silhouette requires at least two clusters")
+    indicator = sp.csr_matrix(
+        (np.ones(n), (np.arange(n), labels)), shape=(n, n_clusters))
+    scores = np.empty(len(rows))
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size]
+        sums = indicator.T.dot(_distances(metric, X, block).T).T
+        own = labels[block]
+        own_sizes = sizes[own]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            a = sums[np.arange(len(block)), own] / (own_sizes - 1)
+            means = sums / sizes
+            means[np.arange(len(block)), own] = np.inf
+            b = np.min(means, axis=1)
+            s = (b - a) / np.maximum(a, b)
+        s[own_sizes == 1] = 0
+        s[(a == 0) & (b == 0)] = 0
+        scores[start:start + block_size] = s
+    return scores
+
+
+def silhouette_estimate(X, labels, sample_size=1000, metric="euclidean",
+                        random_state=None, block_size=1000):
+    """
+    Estimate the silhouette score from a stratified sample of rows.
+
+    Each cluster contributes a number of rows proportional to its size (but
+    at least two, if possible). Exact silhouettes of sampled rows are
+    computed against all data with :obj:`silhouette_samples_blocked`, which
+    takes time linear in the number of rows.
+
+    The mean is the weighted mean of cluster means. Its standard error
+    accounts for sampling without replacement; the score is within
+    `mean ± 1.96 * std_error` with probability of about 95 %.
+
+    Args:
+        X (np.ndarray or Table): data
+        labels (np.ndarray): cluster labels
+        sample_size (int): approximate number of sampled rows
+        metric (str or callable): see :obj:`silhouette_samples_blocked`
+        random_state: seed or random state for sampling
+        block_size (int): number of rows in a block of distances
+
+    Returns:
+        SilhouetteEstimate: estimated mean and its standard error, sampled
+        rows and their scores, and estimated means and their standard
+        errors for individual clusters
+    """
+    random_state = check_random_state(random_state)
+    values, inverse = np.unique(labels, return_inverse=True)
+    n = len(inverse)
+    sizes = np.bincount(inverse)
+    rows = []
+    for c, size in enumerate(sizes):
+        members = np.flatnonzero(inverse == c)
+        m = min(size, max(2, int(round(sample_size * size / n))))
+        rows.append(np.sort(random_state.choice(members, m, replace=False)))
+    rows = np.hstack(rows)
+    scores = silhouette_samples_blocked(X, inverse, metric, rows, block_size)
+
+    sampled = inverse[rows]
+    cluster_means = np.empty(len(values))
+    cluster_std_errors = np.zeros(len(values))
+    for c, size in enumerate(sizes):
+        cluster_scores = scores[sampled == c]
+        m = len(cluster_scores)
+        cluster_means[c] = np.mean(cluster_scores)
+        if 1 < m < size:
+            cluster_std_errors[c] = \
+                np.std(cluster_scores, ddof=1) / np.sqrt(m) \
+                * np.sqrt(1 - m / size)
+    weights = sizes / n
+    return SilhouetteEstimate(
+        mean=np.sum(weights * cluster_means),
+        std_error=np.sqrt(np.sum((weights * cluster_std_errors) ** 2)),
+        rows=rows, scores=scores,
+        cluster_means=cluster_means, cluster_std_errors=cluster_std_errors)
+
+
+def simplified_silhouette_samples(X, labels, metric="euclidean"):
+    """
+    Return simplified (centroid-based) silhouette scores.
+
+    Mean distances to clusters are replaced by distances to cluster
+    centroids, which takes time linear in the number of rows and clusters.
+    The scores approximate silhouettes of compact, convex clusters.
+
+    Args:
+        X (np.ndarray): data
+        labels (np.ndarray): cluster labels
+        metric (str): a metric name for `scipy.spatial.distance.cdist`
+
+    Returns:
+        np.ndarray: simplified silhouette scores
+    """
+    values, labels = np.unique(labels, return_inverse=True)
+    if len(values) < 2:
+        raise ValueError("silhouette requires at least two clusters")
+    centroids = np.vstack([np.mean(X[labels == c], axis=0)
+                           for c in range(len(values))])
+    dist = cdist(X, centroids, metric=metric)
+    rows = np.arange(len(labels))
+    a = dist[rows, labels]
+    dist[rows, labels] = np.inf
+    b = np.min(dist, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = (b - a) / np.maximum(a, b)
+    scores[np.bincount(labels)[labels] == 1] = 0
+    scores[(a == 0) & (b == 0)] = 0
+    return scores
+
 
 def graph_silhouette(X, y, xlim=None, colors=None, figsize=None, filename=None):
     """
@@ -86,8 +86,12 @@ class BinSql:
         self.points = points
 
     def __call__(self):
-        return 'width_bucket(%s, ARRAY%s::double precision[])' % (
-            self.var.to_sql(), str(self.points))
+        # index of the bin, as returned by np.digitize
+        sql = self.var.to_sql()
+        return "CASE WHEN (%s) IS NULL THEN NULL %s ELSE %i END" % (
+            sql, " ".join("WHEN (%s) < %r THEN %i" % (sql, float(point), i)
+                          for i, point in enumerate(self.points)),
+            len(self.points))
 
 
 class SingleValueSql:
@@ -104,7 +104,9 @@ class Average(BaseImputeMethod):
                 raise TypeError("Variable must be continuous or discrete")
 
         a = variable.copy(compute_value=ReplaceUnknowns(variable, value))
-        a.to_sql = ImputeSql(variable, value)
+        if variable.is_continuous:
+            # discrete values are imputed in SQL by ReplaceUnknowns
+            a.to_sql = ImputeSql(variable, value)
         return a
 
 
@@ -222,15 +222,20 @@ class RemoveNaNColumns(Preprocess):
 
     def __call__(self, data, threshold=None):
         # missing entries in sparse data are treated as zeros so we skip removing NaNs
-        if sp.issparse(data.X):
+        if not data.is_compact() and sp.issparse(data.X):
             return data
 
         if threshold is None:
-            threshold = data.X.shape[0] if self.threshold is None else \
+            threshold = len(data) if self.threshold is None else \
                         self.threshold
         if isinstance(threshold, float):
-            threshold = threshold * data.X.shape[0]
-        nans = np.sum(np.isnan(data.X), axis=0)
+            threshold = threshold * len(data)
+        if data.is_compact():
+            # count by columns to keep data compact
+            nans = [np.sum(np.isnan(data.get_column_view(i)[0]))
+                    for i in range(len(data.domain.attributes))]
+        else:
+            nans = np.sum(np.isnan(data.X), axis=0)
         att = [a for a, n in zip(data.domain.attributes, nans) if n < threshold]
         domain = Orange.data.Domain(att, data.domain.class_vars,
                                     data.domain.metas)
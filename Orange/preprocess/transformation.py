@@ -73,6 +73,9 @@ class Indicator(Transformation):
         self.value = value
 
     def transform(self, c):
+        if sp.issparse(c) and self.value == 0:
+            # implicit zeros equal the value, so the result is dense
+            c = c.toarray().ravel()
         return c == self.value
 
 
@@ -93,6 +96,9 @@ class Indicator1(Transformation):
         self.value = value
 
     def transform(self, c):
+        if sp.issparse(c):
+            # implicit zeros are mapped to -1 (or 1), so the result is dense
+            c = c.toarray().ravel()
         return (c == self.value) * 2 - 1
 
 
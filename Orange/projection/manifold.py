@@ -7,6 +7,9 @@ import scipy.sparse as sp
 from scipy.linalg import eigh as lapack_eigh
 from scipy.sparse.linalg import eigsh as arpack_eigh
 import sklearn.manifold as skl_manifold
+from sklearn.metrics import pairwise_distances
+from sklearn.metrics.pairwise import paired_distances
+from sklearn.utils import check_random_state
 
 import openTSNE
 import openTSNE.affinity
@@ -105,6 +108,172 @@ def torgerson(distances, n_components=2, eigen_solver="auto"):
     return U * np.sqrt(L.reshape((1, n_components)))
 
 
+def _distances_to(X, rows, metric):
+    if metric == "precomputed":
+        return np.asarray(X[:, rows])
+    return pairwise_distances(X, X[rows], metric=metric)
+
+
+def _pair_distances(X, i, j, metric):
+    if metric == "precomputed":
+        return np.asarray(X)[i, j]
+    return paired_distances(X[i], X[j], metric=metric)
+
+
+def maxmin_landmarks(X, n_landmarks, metric="euclidean", random_state=None):
+    """
+    Choose landmarks by maxmin selection: the first landmark is random and
+    each next one is the point farthest from the landmarks chosen so far.
+
+    Fewer landmarks are returned if the data has fewer distinct points.
+
+    Parameters
+    ----------
+    X : (N, M) ndarray or sparse matrix, or (N, N) ndarray
+        Data or, if `metric` is `"precomputed"`, a distance matrix.
+    n_landmarks : int
+        Number of landmarks.
+    metric : str
+        A metric supported by `sklearn.metrics.pairwise_distances` or
+        `"precomputed"`.
+    random_state : int or RandomState, optional
+
+    Returns
+    -------
+    landmarks : (K, ) ndarray
+        Indices of landmarks.
+    distances : (N, K) ndarray
+        Distances of all points to the landmarks.
+    """
+    random_state = check_random_state(random_state)
+    n = X.shape[0]
+    n_landmarks = min(n_landmarks, n)
+    landmarks = np.empty(n_landmarks, dtype=int)
+    distances = np.empty((n, n_landmarks))
+    mindist = np.full(n, np.inf)
+    landmarks[0] = random_state.randint(n)
+    for i in range(n_landmarks):
+        distances[:, i] = _distances_to(X, [landmarks[i]], metric).ravel()
+        np.minimum(mindist, distances[:, i], out=mindist)
+        if i + 1 < n_landmarks:
+            landmarks[i + 1] = np.argmax(mindist)
+            if mindist[landmarks[i + 1]] == 0:
+                return landmarks[:i + 1], distances[:, :i + 1]
+    return landmarks, distances
+
+
+def landmark_mds(X, n_components=2, n_landmarks=100, metric="euclidean",
+                 random_state=None):
+    """
+    Perform landmark MDS in O(N * K) time and space.
+
+    Landmarks are embedded with classical MDS and the remaining points are
+    placed by distance-based triangulation from the landmarks.
+
+    Parameters
+    ----------
+    X : (N, M) ndarray or sparse matrix, or (N, N) ndarray
+        Data or, if `metric` is `"precomputed"`, a distance matrix.
+    n_components : int
+        Number of components to return
+    n_landmarks : int
+        Number of landmarks (K).
+    metric : str
+        A metric supported by `sklearn.metrics.pairwise_distances` or
+        `"precomputed"`.
+    random_state : int or RandomState, optional
+
+    See Also
+    --------
+    V. de Silva and J. B. Tenenbaum: Sparse multidimensional scaling using
+    landmark points, 2004.
+    """
+    landmarks, distances = \
+        maxmin_landmarks(X, n_landmarks, metric, random_state)
+    D_sq = np.square(distances, out=distances)
+    landmark_sq = D_sq[landmarks]
+    Y = torgerson(np.sqrt(landmark_sq), n_components)
+    eigenvalues = np.sum(Y ** 2, axis=0)
+    pinv = np.divide(Y, eigenvalues,
+                     out=np.zeros_like(Y), where=eigenvalues > 0)
+    D_sq -= np.mean(landmark_sq, axis=0)
+    return -0.5 * D_sq.dot(pinv)
+
+
+def iter_stochastic_stress(embedding, X, metric="euclidean", n_iter=100,
+                           pairs_per_point=10, learning_rate=1.0,
+                           min_learning_rate=0.01, random_state=None):
+    """
+    Minimize stress by stochastic gradient descent on sampled pairs and
+    yield the embedding after each iteration.
+
+    Each iteration pairs every point with `pairs_per_point` random points and
+    moves the points of each pair towards their target distance by a step
+    that decreases geometrically from `learning_rate` to
+    `min_learning_rate`. An iteration takes O(N * pairs_per_point) time.
+
+    Parameters
+    ----------
+    embedding : (N, C) ndarray
+        Initial embedding; it is not changed.
+    X : (N, M) ndarray or sparse matrix, or (N, N) ndarray
+        Data or, if `metric` is `"precomputed"`, a distance matrix.
+    metric : str
+        A metric supported by `sklearn.metrics.pairwise.paired_distances`
+        or `"precomputed"`.
+    n_iter : int
+        Number of iterations.
+    pairs_per_point : int
+        Number of pairs per point sampled in each iteration.
+    learning_rate, min_learning_rate : float
+        The initial and final step, as a fraction of the difference between
+        the current and the target distance.
+    random_state : int or RandomState, optional
+
+    See Also
+    --------
+    J. X. Zheng, S. Pawar and D. F. M. Goodman: Graph drawing by stochastic
+    gradient descent, 2018.
+    """
+    random_state = check_random_state(random_state)
+    embedding = np.array(embedding, dtype=float)
+    n = len(embedding)
+    if n < 2:
+        return
+    decay = (min_learning_rate / learning_rate) ** (1 / max(n_iter - 1, 1))
+    i = np.repeat(np.arange(n), pairs_per_point)
+    for it in range(n_iter):
+        j = random_state.randint(n - 1, size=len(i))
+        j += j >= i
+        target = _pair_distances(X, i, j, metric)
+        diff = embedding[i] - embedding[j]
+        dist = np.sqrt(np.sum(diff ** 2, axis=1))
+        step = np.divide(dist - target, dist,
+                         out=np.zeros_like(dist), where=dist > 0)
+        step *= 0.5 * learning_rate * decay ** it
+        counts = np.bincount(i, minlength=n) + np.bincount(j, minlength=n)
+        counts = np.maximum(counts, 1)
+        for c in range(embedding.shape[1]):
+            moves = step * diff[:, c]
+            embedding[:, c] += (np.bincount(j, moves, minlength=n)
+                                - np.bincount(i, moves, minlength=n)) / counts
+        yield embedding
+
+
+def stochastic_stress(embedding, X, metric="euclidean", n_iter=100,
+                      pairs_per_point=10, learning_rate=1.0,
+                      min_learning_rate=0.01, random_state=None):
+    """
+    Return the embedding refined by `iter_stochastic_stress`.
+    """
+    embedding = np.array(embedding, dtype=float)
+    for embedding in iter_stochastic_stress(
+            embedding, X, metric, n_iter, pairs_per_point, learning_rate,
+            min_learning_rate, random_state):
+        pass
+    return embedding
+
+
 class MDS(SklProjector):
     __wraps__ = skl_manifold.MDS
     name = 'MDS'
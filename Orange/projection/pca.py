@@ -1,6 +1,7 @@
 import numbers
 
 import six
+import bottleneck as bn
 import numpy as np
 import scipy.sparse as sp
 from scipy.linalg import lu, qr, svd
@@ -30,12 +31,61 @@ from Orange.projection import SklProjector, DomainProjection
 __all__ = ["PCA", "SparsePCA", "IncrementalPCA", "TruncatedSVD"]
 
 
+def _row_blocks(n_rows, block_size):
+    return [slice(start, min(start + block_size, n_rows))
+            for start in range(0, n_rows, block_size)]
+
+
+def _dot(A, B, block_size=None):
+    """Return `A @ B`, computed in blocks of `block_size` rows of `A`."""
+    if not block_size:
+        return safe_sparse_dot(A, B)
+    return np.vstack([safe_sparse_dot(A[rows], B)
+                      for rows in _row_blocks(A.shape[0], block_size)])
+
+
+def _dot_t(A, B, block_size=None):
+    """Return `A.T @ B`, computed in blocks of `block_size` rows of `A`."""
+    if not block_size:
+        return safe_sparse_dot(A.T, B)
+    result = np.zeros((A.shape[1], B.shape[1]))
+    for rows in _row_blocks(A.shape[0], block_size):
+        result += safe_sparse_dot(A[rows].T, B[rows])
+    return result
+
+
+def _mean_var(A, block_size, ddof=0):
+    """
+    Return column means and variances of `A`, computed in blocks of
+    `block_size` rows of `A` (dense, sparse or memory-mapped), whose
+    statistics are merged with the parallel algorithm of Chan et al.
+    """
+    n_rows = A.shape[0]
+    n, mean, m2 = 0, np.zeros(A.shape[1]), np.zeros(A.shape[1])
+    for rows in _row_blocks(n_rows, block_size):
+        block = A[rows]
+        n_block = block.shape[0]
+        block_mean = np.asarray(block.mean(axis=0)).ravel()
+        block_m2 = ut.var(block, axis=0) * n_block
+        delta = block_mean - mean
+        total = n + n_block
+        mean += delta * n_block / total
+        m2 += block_m2 + delta ** 2 * n * n_block / total
+        n = total
+    return mean, m2 / (n - ddof)
+
+
 def randomized_pca(A, n_components, n_oversamples=10, n_iter="auto",
-                   flip_sign=True, random_state=0):
+                   flip_sign=True, random_state=0, block_size=None):
     """Compute the randomized PCA decomposition of a given matrix.
 
     This method differs from the scikit-learn implementation in that it supports
-    and handles sparse matrices well.
+    and handles sparse matrices well: the data is centered implicitly, without
+    densifying it.
+
+    If `block_size` is given, all products with `A` are computed in blocks of
+    `block_size` rows, so `A` can also be a memory-mapped array that does not
+    fit into memory.
 
     """
     if n_iter == "auto":
@@ -45,39 +95,49 @@ def randomized_pca(A, n_components, n_oversamples=10, n_iter="auto",
 
     n_samples, n_features = A.shape
 
-    c = np.atleast_2d(A.mean(axis=0))
+    if block_size:
+        c = np.atleast_2d(_mean_var(A, block_size)[0])
+    else:
+        c = np.atleast_2d(A.mean(axis=0))
+
+    def dot(Q):
+        return _dot(A, Q, block_size) - safe_sparse_dot(c, Q)
+
+    def dot_t(Q):
+        return _dot_t(A, Q, block_size) \
+            - safe_sparse_dot(c.T, Q.sum(axis=0)[None, :])
 
     if n_samples >= n_features:
         Q = random_state.normal(size=(n_features, n_components + n_oversamples))
-        Q = safe_sparse_dot(A, Q) - safe_sparse_dot(c, Q)
+        Q = dot(Q)
 
         # Normalized power iterations
         for _ in range(n_iter):
-            Q = safe_sparse_dot(A.T, Q) - safe_sparse_dot(c.T, Q.sum(axis=0)[None, :])
+            Q = dot_t(Q)
             Q, _ = lu(Q, permute_l=True)
-            Q = safe_sparse_dot(A, Q) - safe_sparse_dot(c, Q)
+            Q = dot(Q)
             Q, _ = lu(Q, permute_l=True)
 
         Q, _ = qr(Q, mode="economic")
 
-        QA = safe_sparse_dot(A.T, Q) - safe_sparse_dot(c.T, Q.sum(axis=0)[None, :])
+        QA = dot_t(Q)
         R, s, V = svd(QA.T, full_matrices=False)
         U = Q.dot(R)
 
     else:  # n_features > n_samples
         Q = random_state.normal(size=(n_samples, n_components + n_oversamples))
-        Q = safe_sparse_dot(A.T, Q) - safe_sparse_dot(c.T, Q.sum(axis=0)[None, :])
+        Q = dot_t(Q)
 
         # Normalized power iterations
         for _ in range(n_iter):
-            Q = safe_sparse_dot(A, Q) - safe_sparse_dot(c, Q)
+            Q = dot(Q)
             Q, _ = lu(Q, permute_l=True)
-            Q = safe_sparse_dot(A.T, Q) - safe_sparse_dot(c.T, Q.sum(axis=0)[None, :])
+            Q = dot_t(Q)
             Q, _ = lu(Q, permute_l=True)
 
         Q, _ = qr(Q, mode="economic")
 
-        QA = safe_sparse_dot(A, Q) - safe_sparse_dot(c, Q)
+        QA = dot(Q)
         U, s, R = svd(QA, full_matrices=False)
         V = R.dot(Q.T)
 
@@ -94,21 +154,35 @@ class ImprovedPCA(skl_decomposition.PCA):
     efficient methods exist for PCA. This class patches the default scikit-learn
     implementation to properly handle sparse matrices.
 
+    If `block_size` is set, the data (which can also be memory-mapped) is
+    processed in blocks of `block_size` rows with the randomized solver.
+
     Notes
     -----
       - This should be removed once scikit-learn releases a version which
         implements this functionality.
 
     """
+    def __init__(self, n_components=None, copy=True, whiten=False,
+                 svd_solver='auto', tol=0.0, iterated_power='auto',
+                 random_state=None, block_size=None):
+        super().__init__(
+            n_components=n_components, copy=copy, whiten=whiten,
+            svd_solver=svd_solver, tol=tol, iterated_power=iterated_power,
+            random_state=random_state)
+        self.block_size = block_size
+
     # pylint: disable=too-many-branches
     def _fit(self, X):
         """Dispatch to the right submethod depending on the chosen solver."""
+        # Only the dense arpack solver changes the data; do not copy sparse
+        # or blocked data, which can be large
         X = check_array(
             X,
             accept_sparse=["csr", "csc"],
             dtype=[np.float64, np.float32],
             ensure_2d=True,
-            copy=self.copy,
+            copy=self.copy and not (sp.issparse(X) or self.block_size),
         )
 
         # Handle n_components==None
@@ -123,8 +197,9 @@ class ImprovedPCA(skl_decomposition.PCA):
         # Handle svd_solver
         self._fit_svd_solver = self.svd_solver
         if self._fit_svd_solver == "auto":
-            # Sparse data can only be handled with the randomized solver
-            if sp.issparse(X):
+            # Sparse and blocked data can only be handled with the
+            # randomized solver
+            if sp.issparse(X) or self.block_size:
                 self._fit_svd_solver = "randomized"
             # Small problem or n_components == 'mle', just call full PCA
             elif max(X.shape) <= 500 or n_components == "mle":
@@ -180,8 +255,13 @@ class ImprovedPCA(skl_decomposition.PCA):
 
         random_state = check_random_state(self.random_state)
 
-        self.mean_ = X.mean(axis=0)
-        total_var = ut.var(X, axis=0, ddof=1)
+        if self.block_size or sp.issparse(X):
+            # Avoid temporary copies of large data
+            self.mean_, total_var = _mean_var(
+                X, self.block_size or X.shape[0], ddof=1)
+        else:
+            self.mean_ = X.mean(axis=0)
+            total_var = ut.var(X, axis=0, ddof=1)
 
         if svd_solver == "arpack":
             # Center data
@@ -203,6 +283,7 @@ class ImprovedPCA(skl_decomposition.PCA):
                 n_iter=self.iterated_power,
                 flip_sign=True,
                 random_state=random_state,
+                block_size=self.block_size,
             )
 
         self.n_samples_, self.n_features_ = n_samples, n_features
@@ -230,12 +311,18 @@ class ImprovedPCA(skl_decomposition.PCA):
             accept_sparse=["csr", "csc"],
             dtype=[np.float64, np.float32],
             ensure_2d=True,
-            copy=self.copy,
+            copy=self.copy and not (sp.issparse(X) or self.block_size),
         )
 
-        if self.mean_ is not None:
-            X = X - self.mean_
-        X_transformed = np.dot(X, self.components_.T)
+        if sp.issparse(X) or self.block_size:
+            # Center implicitly to keep the data sparse
+            X_transformed = _dot(X, self.components_.T, self.block_size)
+            if self.mean_ is not None:
+                X_transformed -= np.dot(self.mean_, self.components_.T)
+        else:
+            if self.mean_ is not None:
+                X = X - self.mean_
+            X_transformed = np.dot(X, self.components_.T)
         if self.whiten:
             X_transformed /= np.sqrt(self.explained_variance_)
         return X_transformed
@@ -258,10 +345,25 @@ class PCA(SklProjector, _FeatureScorerMixin):
 
     def __init__(self, n_components=None, copy=True, whiten=False,
                  svd_solver='auto', tol=0.0, iterated_power='auto',
-                 random_state=None, preprocessors=None):
+                 random_state=None, block_size=None, preprocessors=None):
         super().__init__(preprocessors=preprocessors)
         self.params = vars()
 
+    def preprocess(self, data):
+        # the default preprocessors would copy (e.g. memory-mapped) data into
+        # memory; they are not needed if the data is numeric and complete
+        if self.params["block_size"] \
+                and self.preprocessors == tuple(type(self).preprocessors) \
+                and self._is_prepared(data):
+            return data
+        return super().preprocess(data)
+
+    @staticmethod
+    def _is_prepared(data):
+        X = data.X
+        return all(var.is_continuous for var in data.domain.attributes) \
+            and not bn.anynan(X.data if sp.issparse(X) else X)
+
     def fit(self, X, Y=None):
         params = self.params.copy()
         if params["n_components"] is not None:
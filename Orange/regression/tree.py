@@ -120,15 +120,19 @@ class TreeLearner(Learner):
         #######################################
         # The real _select_attr starts here
         is_sparse = sp.issparse(data.X)
+        if is_sparse:
+            # slicing columns of CSR matrices scans all stored values
+            X = data.X.tocsc()
         domain = data.domain
         col_y = data.Y
         best_score, *best_res = REJECT_ATTRIBUTE
         best_res = [Node(None, 0, None), ] + best_res[1:]
         disc_scorer = _score_disc_bin if self.binarize else _score_disc
         for attr_no, attr in enumerate(domain.attributes):
-            col_x = data[:, attr_no].X
             if is_sparse:
-                col_x = col_x.toarray()
+                col_x = X[:, attr_no].toarray()
+            else:
+                col_x = data[:, attr_no].X
             col_x = col_x.reshape((len(data),))
             sc, *res = disc_scorer() if attr.is_discrete else _score_cont()
             if res[0] is not None and sc > best_score:
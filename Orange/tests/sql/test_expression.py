@@ -0,0 +1,96 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import numpy as np
+
+from Orange.classification import \
+    LogisticRegressionLearner, NaiveBayesLearner
+from Orange.data import Table, Domain
+from Orange.data.sql.backend import SQLiteBackend
+from Orange.data.sql.expression import predict, sql_expression
+from Orange.data.sql.table import SqlTable
+from Orange.preprocess import Continuize, Normalize, Impute, Discretize
+from Orange.preprocess.discretize import EqualWidth
+from Orange.regression import LinearRegressionLearner
+
+
+class TestSqlExpression(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        data = Table("heart_disease")
+        variables = data.domain.variables
+        fd, cls.database = tempfile.mkstemp(suffix=".sqlite")
+        os.close(fd)
+        with sqlite3.connect(cls.database) as conn:
+            conn.execute("CREATE TABLE heart ({})".format(", ".join(
+                '"{}" {}'.format(var.name,
+                                 "REAL" if var.is_continuous else "TEXT")
+                for var in variables)))
+            rows = [[None if np.isnan(x) else
+                     float(x) if var.is_continuous else var.values[int(x)]
+                     for var, x in zip(variables, row)]
+                    for row in np.hstack((data.X, data.Y[:, None]))]
+            conn.executemany("INSERT INTO heart VALUES ({})".format(
+                ", ".join("?" * len(variables))), rows)
+        conn.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.database)
+
+    def setUp(self):
+        table = SqlTable(dict(database=self.database), "heart",
+                         backend=SQLiteBackend, inspect_values=True)
+        attributes = table.domain.attributes
+        table.domain = Domain(attributes[:-1], attributes[-1])
+        self.table = table
+        self.data = Table(table)
+
+    def test_preprocessors(self):
+        for pp in (Continuize(), Normalize(), Impute(),
+                   Discretize(method=EqualWidth())):
+            table = pp(self.table)
+            self.assertIsInstance(table, SqlTable)
+            for var in table.domain.attributes:
+                sql_expression(var)
+            expected = self.data.transform(table.domain)
+            np.testing.assert_almost_equal(Table(table).X, expected.X)
+
+    def test_chain(self):
+        table = Normalize()(Impute()(Continuize()(self.table)))
+        sql = sql_expression(table.domain.attributes[1])
+        self.assertIn("COALESCE", sql.upper())
+        self.assertIn("CASE", sql)
+        expected = self.data.transform(table.domain)
+        np.testing.assert_almost_equal(Table(table).X, expected.X)
+
+    def test_predict_classification(self):
+        defined = ~np.isnan(self.data.X).any(axis=1)
+        for learner in (LogisticRegressionLearner(),
+                        LogisticRegressionLearner(
+                            multi_class="multinomial", solver="lbfgs"),
+                        NaiveBayesLearner()):
+            model = learner(self.data)
+            predictions = predict(model, self.table)
+            self.assertIsInstance(predictions, SqlTable)
+            self.assertEqual(len(predictions.domain.metas), 3)
+            metas = Table(predictions).metas.astype(float)
+            values, probs = model(self.data, model.ValueProbs)
+            np.testing.assert_equal(metas[defined, 0], values[defined])
+            np.testing.assert_almost_equal(metas[defined, 1:],
+                                           probs[defined])
+
+    def test_predict_regression(self):
+        domain = Domain(self.data.domain.attributes[1:],
+                        self.data.domain.attributes[0])
+        data = self.data.transform(domain)
+        model = LinearRegressionLearner()(data)
+        metas = Table(predict(model, self.table.transform(domain))).metas
+        np.testing.assert_almost_equal(metas[:, 0].astype(float),
+                                       model(data))
+
+
+if __name__ == "__main__":
+    unittest.main()
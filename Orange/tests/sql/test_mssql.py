@@ -0,0 +1,128 @@
+import sqlite3
+import sys
+import types
+import unittest
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+import numpy as np
+
+from Orange.data import ContinuousVariable, DiscreteVariable, \
+    StringVariable, TimeVariable
+from Orange.data.sql.backend import Backend
+
+
+def _stand_in_pymssql():
+    """A DB-API driver with the interface of pymssql that runs queries in an
+    in-memory SQLite database and reports the types of columns"""
+    module = types.ModuleType("pymssql")
+    module.STRING, module.BINARY, module.NUMBER, module.DATETIME, \
+        module.DECIMAL = range(1, 6)
+    module.Error = sqlite3.Error
+
+    class Cursor:
+        def __init__(self, connection):
+            self.cursor = connection.cursor()
+            self.description = None
+            self.rows = []
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *_):
+            self.cursor.close()
+
+        def execute(self, query, params=None):
+            self.cursor.execute(query.replace("%s", "?"), params or ())
+            self.rows = self.cursor.fetchall()
+            self.description = [
+                (desc[0], self._type_code([row[i] for row in self.rows]))
+                + (None,) * 5
+                for i, desc in enumerate(self.cursor.description)]
+
+        @staticmethod
+        def _type_code(values):
+            types_ = {type(v) for v in values if v is not None}
+            if types_ == {Decimal}:
+                return module.DECIMAL
+            if types_ == {datetime}:
+                return module.DATETIME
+            if types_ and types_ <= {int, float}:
+                return module.NUMBER
+            return module.STRING
+
+        def fetchmany(self, size):
+            rows, self.rows = self.rows[:size], self.rows[size:]
+            return rows
+
+    class Connection:
+        def __init__(self):
+            # convert values of DECIMAL and TIMESTAMP columns to the types
+            # returned by pymssql
+            sqlite3.register_converter(
+                "DECIMAL", lambda value: Decimal(value.decode()))
+            self.connection = sqlite3.connect(
+                ":memory:", detect_types=sqlite3.PARSE_DECLTYPES)
+
+        def cursor(self):
+            return Cursor(self.connection)
+
+    module.connect = lambda **_: Connection()
+    return module
+
+
+class TestPymssqlBackend(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.registry = dict(Backend.registry)
+        with patch.dict(sys.modules, pymssql=_stand_in_pymssql()):
+            sys.modules.pop("Orange.data.sql.backend.mssql", None)
+            from Orange.data.sql.backend.mssql import PymssqlBackend
+            cls.backend = PymssqlBackend(dict(host="localhost"))
+        sys.modules.pop("Orange.data.sql.backend.mssql", None)
+
+    @classmethod
+    def tearDownClass(cls):
+        Backend.registry.clear()
+        Backend.registry.update(cls.registry)
+
+    def setUp(self):
+        connection = self.backend.connection.connection
+        connection.execute("DROP TABLE IF EXISTS data")
+        connection.execute("CREATE TABLE data "
+                           "(x REAL, d DECIMAL, t TIMESTAMP, c TEXT, s TEXT)")
+        connection.executemany(
+            "INSERT INTO data VALUES (?, ?, ?, ?, ?)",
+            [(1.5, "2.25", "1970-01-02 00:00:00", "b", "foo"),
+             (None, None, None, None, None),
+             (3, "-1", "2000-01-01 12:00:00", "a", "bar")])
+        self.variables = [ContinuousVariable("x"), ContinuousVariable("d"),
+                          TimeVariable("t"), DiscreteVariable("c", "ab"),
+                          StringVariable("s")]
+
+    def test_fetch_arrays(self):
+        batches = list(self.backend.fetch_arrays(
+            "SELECT x, d, t, c, s FROM data", self.variables, batch_size=2))
+        self.assertEqual([len(batch[0]) for batch in batches], [2, 1])
+        x, d, t, c, s = (np.hstack(columns) for columns in zip(*batches))
+        for column in (x, d, t, c):
+            self.assertEqual(column.dtype, float)
+        np.testing.assert_equal(x, [1.5, np.nan, 3])
+        np.testing.assert_equal(d, [2.25, np.nan, -1])
+        np.testing.assert_equal(t, [86400, np.nan, 946728000])
+        np.testing.assert_equal(c, [1, np.nan, 0])
+        self.assertEqual(s.dtype, object)
+        self.assertEqual(list(s), ["foo", None, "bar"])
+
+    def test_params(self):
+        with self.backend.execute_sql_query(
+                "SELECT COUNT(*) FROM data WHERE c = %s", ("a",)) as cur:
+            self.assertEqual(cur.fetchmany(1), [(1,)])
+        with self.backend.execute_sql_query(
+                "SELECT COUNT(*) FROM data") as cur:
+            self.assertEqual(cur.fetchmany(1), [(3,)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -116,6 +116,16 @@ class TestSqlTable(PostgresTest):
         # has all necessary class members to create a standard Table
         Table(sql_table.domain, sql_table)
 
+    @unittest.mock.patch("Orange.data.sql.table.DOWNLOAD_BATCH_SIZE", 7)
+    def test_download_data_in_batches(self):
+        table = SqlTable(self.conn, self.iris, inspect_values=True)
+        rows = list(table)
+        table.download_data()
+        self.assertEqual(table.X.shape, (150, 4))
+        assert_almost_equal(table.X, np.vstack([row.x for row in rows]))
+        assert_almost_equal(table.Y.flatten(), [row.y for row in rows])
+        self.assertEqual(len(table), 150)
+
     def test_query_all(self):
         table = SqlTable(self.conn, self.iris, inspect_values=True)
         results = list(table)
@@ -166,6 +176,38 @@ class TestSqlTable(PostgresTest):
         self.assertEqual(len(results), 140)
         self.assertSequenceEqual(results, all_results[10:])
 
+    def test_query_scattered_rows(self):
+        table = SqlTable(self.conn, self.iris, inspect_values=True)
+        attributes = table.domain.variables
+        all_results = list(table._query(attributes))
+
+        results = list(table._query(attributes, rows=[3, 7, 100]))
+        self.assertSequenceEqual(
+            results, [all_results[i] for i in (3, 7, 100)])
+
+    def test_select_rows(self):
+        table = SqlTable(self.conn, self.iris, inspect_values=True)
+        data = Table(table.domain, table)
+
+        for rows in ([1, 5, 8], np.arange(150) % 3 == 0, slice(10, 20),
+                     [-1], range(140, 150)):
+            selected = table[rows]
+            self.assertIsInstance(selected, SqlTable)
+            assert_almost_equal(selected.X, data.X[rows])
+            assert_almost_equal(selected.Y, data.Y[rows])
+
+        selected = table[[1, 5, 8, 20]][[0, 2]]
+        self.assertIsInstance(selected, SqlTable)
+        self.assertEqual(len(selected), 2)
+        assert_almost_equal(selected.X, data.X[[1, 8]])
+
+        selected = table[[8, 1, 1], :2]
+        self.assertNotIsInstance(selected, SqlTable)
+        assert_almost_equal(selected.X, data.X[[8, 1, 1], :2])
+
+        selected = SqlTable.from_table_rows(table, [4, 6])
+        assert_almost_equal(selected.X, data.X[[4, 6]])
+
     def test_getitem_single_value(self):
         table = SqlTable(self.conn, self.iris, inspect_values=True)
         self.assertAlmostEqual(table[0, 0], 5.1)
@@ -600,6 +642,28 @@ class TestSqlTable(PostgresTest):
         self.assertIsInstance(conts[1], Continuous)
         self.assertIsInstance(conts[2], Discrete)
 
+    def test_distributions_and_contingencies_in_single_query(self):
+        iris = SqlTable(self.conn, self.iris, inspect_values=True)
+        data = Table(iris.domain, iris)
+        with unittest.mock.patch.object(
+                iris.backend, "execute_sql_query",
+                wraps=iris.backend.execute_sql_query) as execute:
+            dists = iris._compute_distributions()
+            conts, _ = iris._compute_contingency()
+        group_by_queries = [args[0] for args, _ in execute.call_args_list
+                            if "GROUP BY" in args[0]]
+        self.assertEqual(len(group_by_queries), 2)
+
+        for (dist, unknowns), (exp_dist, exp_unknowns) in \
+                zip(dists, data._compute_distributions()):
+            assert_almost_equal(dist, exp_dist)
+            self.assertEqual(unknowns, exp_unknowns)
+        exp_conts, _ = data._compute_contingency()
+        for (cont, _), (exp_cont, _) in zip(conts[:4], exp_conts[:4]):
+            assert_almost_equal(cont[0], exp_cont[0])
+            assert_almost_equal(cont[1], exp_cont[1])
+        assert_almost_equal(conts[4][0], exp_conts[4][0])
+
     def test_pickling_restores_connection_pool(self):
         iris = SqlTable(self.conn, self.iris, inspect_values=True)
         iris2 = pickle.loads(pickle.dumps(iris))
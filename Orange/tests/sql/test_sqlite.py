@@ -0,0 +1,438 @@
+import gc
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from collections import Counter
+from concurrent.futures import CancelledError
+from unittest.mock import patch
+
+import numpy as np
+
+from Orange.data import Table, ContinuousVariable, DiscreteVariable
+from Orange.data.filter import SameValue
+from Orange.data.sql.backend import SQLiteBackend
+from Orange.data.sql.backend.base import BackendError, MetadataCache
+from Orange.data.sql import table as sql_table
+from Orange.data.sql.table import SqlTable
+from Orange.statistics import contingency, distribution
+
+
+class TestSQLiteBackend(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.iris = Table("iris")
+        fd, cls.database = tempfile.mkstemp(suffix=".sqlite")
+        os.close(fd)
+        with sqlite3.connect(cls.database) as conn:
+            conn.execute("""
+                CREATE TABLE iris (
+                    "sepal length" REAL,
+                    "sepal width" REAL,
+                    "petal length" REAL,
+                    "petal width" REAL,
+                    "iris" VARCHAR(15)
+                )""")
+            conn.executemany(
+                "INSERT INTO iris VALUES (?, ?, ?, ?, ?)",
+                [list(map(float, row.x)) + [str(row.get_class())]
+                 for row in cls.iris])
+        conn.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.database)
+
+    def setUp(self):
+        self.table = SqlTable(dict(database=self.database), "iris",
+                              backend=SQLiteBackend, inspect_values=True)
+
+    def test_domain(self):
+        attributes = self.table.domain.attributes
+        self.assertEqual([var.name for var in attributes],
+                         [var.name for var in self.iris.domain.variables])
+        self.assertTrue(all(isinstance(var, ContinuousVariable)
+                            for var in attributes[:4]))
+        self.assertIsInstance(attributes[4], DiscreteVariable)
+        self.assertEqual(attributes[4].values,
+                         self.iris.domain.class_var.values)
+
+    def test_download(self):
+        self.assertEqual(len(self.table), len(self.iris))
+        self.assertEqual(self.table.approx_len(), len(self.iris))
+        data = Table(self.table)
+        np.testing.assert_almost_equal(data.X[:, :4], self.iris.X)
+        np.testing.assert_equal(data.X[:, 4], self.iris.Y)
+
+    def test_list_tables(self):
+        tables = self.table.backend.list_tables()
+        self.assertEqual([str(t) for t in tables], ["iris"])
+
+    def test_distributions_and_contingencies(self):
+        dists = distribution.get_distributions(self.table)
+        expected = distribution.get_distributions(self.iris)
+        self.assertEqual(len(dists), len(expected))
+        for dist, exp in zip(dists, expected):
+            np.testing.assert_almost_equal(np.asarray(dist), np.asarray(exp))
+
+        cont = contingency.get_contingency(
+            self.table, 0, self.table.domain[4])
+        exp = contingency.get_contingency(self.iris, 0)
+        np.testing.assert_almost_equal(np.asarray(cont.values),
+                                       np.asarray(exp.values))
+        np.testing.assert_almost_equal(np.asarray(cont.counts),
+                                       np.asarray(exp.counts))
+
+    def test_basic_stats(self):
+        stats = self.table._compute_basic_stats()
+        expected = self.iris._compute_basic_stats()
+        np.testing.assert_almost_equal(
+            [s[:3] for s in stats[:4]], [s[:3] for s in expected[:4]])
+        np.testing.assert_almost_equal(
+            [s[3] for s in stats[:4]], np.std(self.iris.X, axis=0, ddof=1))
+
+    def test_parallel_partitions(self):
+        backend = self.table.backend
+        filters = backend.partition_filters('"iris"', 3)
+        self.assertEqual(len(filters), 3)
+        counts = []
+        for f in filters:
+            with backend.execute_sql_query(
+                    "SELECT COUNT(*) FROM iris WHERE " + f) as cur:
+                counts.append(cur.fetchone()[0])
+        self.assertEqual(counts, [50, 50, 50])
+        self.assertIsNone(
+            backend.partition_filters("(SELECT * FROM iris)", 3))
+
+        stats = self.table._compute_basic_stats()
+        dists = distribution.get_distributions(self.table)
+        cont = contingency.get_contingency(
+            self.table, 0, self.table.domain[4])
+
+        table = SqlTable(dict(database=self.database), "iris",
+                         backend=SQLiteBackend, inspect_values=True)
+        table.backend.max_parallel_queries = 3
+        with patch("Orange.data.sql.table.PARALLEL_SCAN_ROWS", 10), \
+                patch.object(table.backend, "cached_query",
+                             wraps=table.backend.cached_query) as query:
+            self.assertEqual(len(table._partitions()), 3)
+            query.reset_mock()
+            pstats = table._compute_basic_stats()
+            self.assertEqual(query.call_count, 3)
+            pdists = distribution.get_distributions(table)
+            pcont = contingency.get_contingency(table, 0, table.domain[4])
+        np.testing.assert_almost_equal(
+            [s[:4] for s in pstats[:4]], [s[:4] for s in stats[:4]])
+        self.assertEqual([s[4:] for s in pstats], [s[4:] for s in stats])
+        for dist, exp in zip(pdists, dists):
+            np.testing.assert_almost_equal(np.asarray(dist), np.asarray(exp))
+        np.testing.assert_almost_equal(np.asarray(pcont.values),
+                                       np.asarray(cont.values))
+        np.testing.assert_almost_equal(np.asarray(pcont.counts),
+                                       np.asarray(cont.counts))
+
+    def test_filters_and_rows(self):
+        var = self.table.domain[4]
+        setosa = SameValue(var, var.values[0])(self.table)
+        self.assertEqual(len(setosa), 50)
+        rows = self.table[10:20]
+        self.assertEqual(len(rows), 10)
+        np.testing.assert_almost_equal(Table(rows).X[:, :4], self.iris.X[10:20])
+
+    def test_select_rows(self):
+        table, iris = self.table, self.iris
+        self.assertEqual(table._row_order(), ["rowid"])
+        np.testing.assert_almost_equal(Table(table[[5, 10, 99]]).X[:, :4],
+                                       iris.X[[5, 10, 99]])
+        self.assertAlmostEqual(table[99][0], iris[99][0])
+
+        # rows of views are ordered by all columns
+        view = SqlTable(self.table.backend.connection_params,
+                        "SELECT * FROM iris", backend=SQLiteBackend)
+        self.assertEqual(len(view._row_order()), 5)
+        order = np.lexsort(iris.X[:, ::-1].T)
+        np.testing.assert_almost_equal(Table(view[[0, 7, 149]]).X[:, :4],
+                                       iris.X[order[[0, 7, 149]]])
+
+    def test_order_only_numbered_rows(self):
+        table = self.table
+        attributes = table.domain.attributes
+        # full downloads and iteration are streamed without sorting
+        self.assertNotIn("ORDER BY", table._query_sql(attributes))
+        self.assertIn("ORDER BY", table._query_sql(attributes, rows=[5]))
+        self.assertIn("ORDER BY",
+                      table._query_sql(attributes, rows=slice(10, 20)))
+        self.assertIn("ORDER BY", table[[5, 10]]._query_sql(attributes))
+
+        table.download_data(100, partial=True)
+        np.testing.assert_almost_equal(table.X[:, :4], self.iris.X[:100])
+        with patch.object(table, "approx_len", return_value=100):
+            table.download_data(100)
+        self.assertEqual(len(table.X), 100)
+
+    def test_select_many_rows(self):
+        rows = np.arange(0, 150, 3)
+        with patch.object(sql_table, "MAX_ROWS_IN_QUERY", 10):
+            selected = self.table[rows]
+        self.assertEqual(len(selected._rows_tables), 1)
+        self.assertNotIn(" IN (0,", selected._sql_query(["*"]))
+        np.testing.assert_almost_equal(Table(selected).X[:, :4],
+                                       self.iris.X[rows])
+        np.testing.assert_almost_equal(Table(selected[[1, 2]]).X[:, :4],
+                                       self.iris.X[rows[[1, 2]]])
+
+        backend = self.table.backend
+        name = selected._rows_tables[0].name
+        query = "SELECT * FROM " + name
+        with backend.execute_sql_query(query):
+            pass
+        # the table is not dropped as stale while it is used
+        self.assertIn(name, backend.sample_tables)
+        backend.drop_samples(max_age=0)
+        with backend.execute_sql_query(query):
+            pass
+        del selected
+        gc.collect()
+        self.assertNotIn(name, backend.sample_tables)
+        with self.assertRaises(BackendError):
+            with backend.execute_sql_query(query):
+                pass
+
+    def test_drop_stale_rows_tables(self):
+        backend = self.table.backend
+        # a table left by a session that did not drop it
+        with backend.execute_sql_query(
+                'CREATE TEMP TABLE "__rows_0123" (row_number INTEGER)'):
+            pass
+        def stale_tables(prefix, *_):
+            return ["__rows_0123"] if prefix == "__rows_" else []
+
+        with patch.object(backend, "stale_tables", stale_tables), \
+                patch.object(sql_table, "MAX_ROWS_IN_QUERY", 10):
+            selected = self.table[np.arange(0, 150, 3)]
+        self.assertEqual(len(Table(selected)), 50)
+        with self.assertRaises(BackendError):
+            with backend.execute_sql_query('SELECT * FROM "__rows_0123"'):
+                pass
+
+    def test_sample(self):
+        sample = self.table.sample_percentage(50, no_cache=True)
+        self.assertLess(len(sample), len(self.iris))
+        self.assertEqual([str(t) for t in self.table.backend.list_tables()],
+                         ["iris"])
+
+    def test_seeded_sample(self):
+        sample = self.table.sample_percentage(50, seed=1)
+        rows = Counter(map(tuple, Table(sample).X))
+        sample = self.table.sample_percentage(50, no_cache=True, seed=1)
+        self.assertEqual(Counter(map(tuple, Table(sample).X)), rows)
+        self.assertLess(len(sample), len(self.iris))
+
+    def test_sample_levels(self):
+        samples = self.table.sample_levels((20, 50, 100), seed=0)
+        self.assertEqual(len(samples), 3)
+        self.assertIs(samples[2], self.table)
+        small, large = [Counter(map(tuple, Table(sample).X))
+                        for sample in samples[:2]]
+        self.assertLess(sum(small.values()), sum(large.values()))
+        self.assertLess(sum(large.values()), len(self.iris))
+        self.assertTrue(all(large[row] >= n for row, n in small.items()))
+
+        backend = self.table.backend
+        self.assertEqual(len(backend.sample_tables), 2)
+        self.table.drop_samples(max_age=3600)
+        self.assertEqual(len(backend.sample_tables), 2)
+        self.table.drop_samples()
+        self.assertEqual(len(backend.sample_tables), 0)
+        with self.assertRaises(BackendError):
+            len(samples[0].copy())
+
+    def test_drop_stale_samples(self):
+        backend = self.table.backend
+        kept = self.table.sample_percentage(50, seed=1)
+        self.table.sample_percentage(30, seed=1)
+        self.assertEqual(len(backend.sample_tables), 2)
+
+        # samples are dropped when new samples are drawn, unless they are
+        # still used
+        backend.metadata_cache.invalidate()
+        with patch.object(sql_table, "SAMPLE_MAX_AGE", 0):
+            self.table.sample_percentage(20, seed=1)
+        self.assertEqual(backend.sample_tables.find(),
+                         ['"__iris_system_20_s1"', '"__iris_system_50_s1"'])
+        self.assertEqual(len(kept), len(Table(kept)))
+
+        # samples left by other sessions are found in the database
+        with backend.execute_sql_query(
+                'CREATE TEMP TABLE "__iris_nested_10_s0" AS SELECT 1'):
+            pass
+        with patch.object(backend, "stale_tables",
+                          return_value=["__iris_nested_10_s0"]) as stale:
+            self.table.drop_samples(max_age=3600)
+        stale.assert_any_call("__iris_nested_", 3600, None)
+        self.assertEqual(len(backend.sample_tables), 2)
+        with self.assertRaises(BackendError):
+            with backend.execute_sql_query(
+                    'SELECT * FROM "__iris_nested_10_s0"'):
+                pass
+
+        with patch("Orange.data.sql.backend.base.SAMPLE_MAX_AGE", 0):
+            del kept
+            backend.close()
+        self.assertEqual(len(backend.sample_tables), 0)
+
+    def test_sample_query(self):
+        table = SqlTable(dict(database=self.database),
+                         'SELECT * FROM iris WHERE "sepal length" > 5',
+                         backend=SQLiteBackend)
+        sample = table.sample_percentage(50)
+        self.assertLess(len(sample), len(table))
+        self.assertRaises(NotImplementedError, table.sample_time, 1)
+
+    def test_metadata_cache(self):
+        table = SqlTable(dict(database=self.database), "iris",
+                         backend=SQLiteBackend)
+        backend = table.backend
+        with patch.object(backend, "execute_sql_query",
+                          wraps=backend.execute_sql_query) as execute:
+            for _ in range(3):
+                table.copy().approx_len()
+                len(table.copy())
+                table.copy()._compute_basic_stats()
+                backend.get_distinct_values("iris", table.table_name)
+            self.assertEqual(execute.call_count, 4)
+
+            execute.reset_mock()
+            table.invalidate_cache()
+            len(table)
+            self.assertEqual(execute.call_count, 1)
+
+            execute.reset_mock()
+            backend.metadata_cache.ttl = 0
+            len(table.copy())
+            len(table.copy())
+            self.assertEqual(execute.call_count, 2)
+
+    def test_metadata_cache_entries(self):
+        cache = MetadataCache(ttl=100, maxsize=2)
+        self.assertEqual(cache.get("a", "q", lambda: 1), 1)
+        self.assertEqual(cache.get("a", "q", lambda: 2), 1)
+        cache.get("b", "q", lambda: 3)
+        cache.get("a", "q", lambda: 4)
+        cache.get("c", "q", lambda: 5)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("b", "q", lambda: 6), 6)
+
+        cache.invalidate("b")
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get("c", "q", lambda: 7), 5)
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+
+        cache.get("a", "q", lambda: 1)
+        cache = pickle.loads(pickle.dumps(cache))
+        self.assertEqual((cache.ttl, cache.maxsize, len(cache)), (100, 2, 0))
+
+    def test_submit_query(self):
+        backend = self.table.backend
+        future = backend.submit_query('SELECT * FROM iris')
+        self.assertEqual(len(future.result(timeout=10)), len(self.iris))
+
+        batches = []
+        future = backend.submit_query('SELECT * FROM iris', batch_size=40,
+                                      callback=batches.append)
+        self.assertEqual(future.result(timeout=10), len(self.iris))
+        self.assertEqual([len(batch) for batch in batches], [40, 40, 40, 30])
+
+        future = backend.submit_query("SELECT * FROM missing")
+        self.assertRaises(BackendError, future.result, timeout=10)
+
+    def test_cancel_query(self):
+        backend = self.table.backend
+        started = threading.Event()
+
+        # a query that would run for a very long time
+        future = backend.submit_query(
+            "WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM r) "
+            "SELECT i FROM r", batch_size=1, callback=lambda _: started.set())
+        self.assertTrue(started.wait(10))
+        self.assertTrue(future.cancel())
+        self.assertRaises(CancelledError, future.result, timeout=10)
+
+        # a query that is cancelled while the database computes the result
+        with patch.object(backend, "cancel_query",
+                          wraps=backend.cancel_query) as cancel_query:
+            future = backend.submit_query(
+                "WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL "
+                "SELECT i + 1 FROM r WHERE i < 1e12) SELECT COUNT(*) FROM r")
+            # wait until the query runs on the connection
+            deadline = time.time() + 10
+            while future._interrupt is None and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertTrue(future.cancel())
+            cancel_query.assert_called_once()
+
+        # the connection can be used for other queries
+        future = backend.submit_query('SELECT * FROM iris')
+        self.assertEqual(len(future.result(timeout=10)), len(self.iris))
+
+    def test_submit(self):
+        backend = self.table.backend
+        future = backend.submit(Table, self.table)
+        self.assertEqual(len(future.result(timeout=10)), len(self.iris))
+
+        # queries started after cancelling are not executed
+        started, release = threading.Event(), threading.Event()
+        executed = []
+
+        def download(table):
+            started.set()
+            release.wait(10)
+            executed.append(len(Table(table)))
+
+        future = backend.submit(download, self.table.copy())
+        self.assertTrue(started.wait(10))
+        self.assertTrue(future.cancel())
+        release.set()
+        self.assertRaises(CancelledError, future.result, timeout=10)
+        time.sleep(0.1)
+        self.assertEqual(executed, [])
+
+    def test_concurrent_writes(self):
+        backend = self.table.backend
+        errors = []
+
+        def write(i):
+            name = '"__rows_thread%i"' % i
+            try:
+                for _ in range(5):
+                    backend.create_rows_table(name, list(range(3000)))
+                    with backend.execute_sql_query(
+                            "SELECT COUNT(*) FROM " + name) as cur:
+                        self.assertEqual(cur.fetchone()[0], 3000)
+                    with backend.execute_sql_query("DROP TABLE " + name):
+                        pass
+                    self.assertEqual(len(Table(self.table)), len(self.iris))
+            except Exception as ex:  # pylint: disable=broad-except
+                errors.append(ex)
+
+        threads = [threading.Thread(target=write, args=(i, ))
+                   for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        self.assertEqual(errors, [])
+
+    def test_missing_database(self):
+        with self.assertRaises(BackendError):
+            SQLiteBackend(dict(database=self.database + ".missing"))
+        with self.assertRaises(BackendError):
+            SQLiteBackend(dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,6 +5,7 @@ import unittest
 from itertools import chain, tee
 
 import numpy
+import scipy.cluster.hierarchy
 
 from Orange.clustering import hierarchical
 import Orange.misc
@@ -135,6 +136,33 @@ class TestHierarchical(unittest.TestCase):
         tree = hierarchical.feature_clustering(table)
         numpy.testing.assert_almost_equal(tree.value.height, 0.75)
 
+    def test_data_linkage(self):
+        X = numpy.random.RandomState(0).rand(50, 3)
+        for linkage, metric in [("single", "euclidean"),
+                                ("single", "cityblock"),
+                                ("average", "euclidean"),
+                                ("complete", "cosine"),
+                                ("ward", "euclidean")]:
+            expected = scipy.cluster.hierarchy.linkage(
+                X, method=linkage, metric=metric)
+            numpy.testing.assert_almost_equal(
+                hierarchical.data_linkage(
+                    X, linkage, metric=metric, block_size=7),
+                expected)
+
+        with self.assertRaises(ValueError):
+            hierarchical.data_linkage(X, "ward", metric="cityblock")
+        with self.assertRaises(ValueError):
+            hierarchical.data_linkage(X, "weighted")
+
+    def test_linkage_from_tree(self):
+        Z = hierarchical.dist_matrix_linkage(self.matrix)
+        tree = hierarchical.tree_from_linkage(Z)
+        self.assertEqual(
+            hierarchical.tree_from_linkage(
+                hierarchical.linkage_from_tree(tree)),
+            tree)
+
     def test_invalid_linkage(self):
         link = numpy.array(
             [[0.0, 1.0, 1.0, 2.0],
@@ -7,7 +7,8 @@ import numpy as np
 from scipy.sparse import csc_matrix
 
 import Orange
-from Orange.clustering.kmeans import KMeans
+from Orange.clustering.kmeans import \
+    KMeans, MiniBatchKMeans, warm_start_centroids
 
 
 class TestKMeans(unittest.TestCase):
@@ -63,3 +64,46 @@ class TestKMeans(unittest.TestCase):
         sparse_iris.X = csc_matrix(sparse_iris.X)
         c = kmeans(sparse_iris)
         self.assertFalse(np.isnan(c.silhouette))
+
+    def test_warm_start_centroids(self):
+        X = self.iris.X
+        c2 = KMeans(n_clusters=2, random_state=0)(self.iris)
+        init = warm_start_centroids(X, c2.centroids, 4, random_state=0)
+        self.assertEqual(init.shape, (4, X.shape[1]))
+        np.testing.assert_equal(init[:2], c2.centroids)
+        c4 = KMeans(n_clusters=4, init=init, n_init=1)(self.iris)
+        self.assertEqual(c4.k, 4)
+
+
+class TestMiniBatchKMeans(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.iris = Orange.data.Table('iris')
+
+    def test_fit(self):
+        c = MiniBatchKMeans(n_clusters=3, random_state=0,
+                            compute_silhouette_score=True)(self.iris)
+        self.assertEqual(c.centroids.shape, (3, 4))
+        self.assertGreater(c.silhouette, 0.5)
+        self.assertEqual(len(set(c(self.iris[:20]).X.ravel())), 1)
+
+    def test_partial_fit(self):
+        iris = self.iris[np.random.RandomState(0).permutation(150)]
+        c = MiniBatchKMeans(n_clusters=3, random_state=0).partial_fit(
+            iris[:50])
+        self.assertEqual(c.centroids.shape, (3, 4))
+        self.assertIs(c.partial_fit(iris[50:100]), c)
+        c.partial_fit(iris[100:].X)
+        self.assertEqual(c(iris).X.shape, (150, 1))
+
+    def test_fit_chunks(self):
+        iris = self.iris[np.random.RandomState(0).permutation(150)]
+        c = MiniBatchKMeans(n_clusters=3, random_state=0,
+                            compute_silhouette_score=True).fit_chunks(
+                                iris, chunk_size=40)
+        self.assertEqual(c.centroids.shape, (3, 4))
+        self.assertFalse(np.isnan(c.silhouette))
+
+        c = MiniBatchKMeans(n_clusters=3, random_state=0).fit_chunks(
+            iris, chunk_size=40, max_chunks=1)
+        self.assertEqual(len(c.labels_), 40)
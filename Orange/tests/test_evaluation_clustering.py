@@ -4,10 +4,13 @@
 import unittest
 
 import numpy as np
+from sklearn.metrics import silhouette_samples
 
 import Orange
 from Orange.evaluation.clustering import Silhouette, \
-    AdjustedMutualInfoScore, ClusteringEvaluation, ClusteringResults
+    AdjustedMutualInfoScore, ClusteringEvaluation, ClusteringResults, \
+    silhouette_samples_blocked, silhouette_estimate, \
+    simplified_silhouette_samples
 from Orange.clustering.kmeans import KMeans
 
 
@@ -31,3 +34,51 @@ class TestClusteringEvaluation(unittest.TestCase):
         expected = [0.51936073, 0.74837231, 0.59178896]
         np.testing.assert_almost_equal(AdjustedMutualInfoScore(cr),
                                        expected, decimal=2)
+
+
+class TestSilhouetteEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        random = np.random.RandomState(0)
+        cls.X = np.vstack([random.randn(100, 3) + 3 * i for i in range(3)]
+                          + [[[20, 20, 20]]])
+        cls.labels = np.r_[np.repeat([0, 1, 2], 100), 5]
+
+    def test_blocked(self):
+        X, labels = self.X, self.labels
+        for metric in ("euclidean", "cityblock"):
+            np.testing.assert_almost_equal(
+                silhouette_samples_blocked(X, labels, metric, block_size=7),
+                silhouette_samples(X, labels, metric=metric))
+        rows = np.array([0, 150, 300])
+        np.testing.assert_almost_equal(
+            silhouette_samples_blocked(X, labels, rows=rows),
+            silhouette_samples(X, labels)[rows])
+
+        table = Orange.data.Table(X)
+        distance = Orange.distance.Euclidean().fit(table)
+        np.testing.assert_almost_equal(
+            silhouette_samples_blocked(table, labels, distance),
+            silhouette_samples(X, labels))
+
+        with self.assertRaises(ValueError):
+            silhouette_samples_blocked(X, np.zeros(len(X)))
+
+    def test_estimate(self):
+        X, labels = self.X, self.labels
+        exact = np.mean(silhouette_samples(X, labels))
+        estimate = silhouette_estimate(X, labels, 60, random_state=0)
+        self.assertEqual(len(estimate.rows), 61)
+        self.assertEqual(len(np.unique(labels[estimate.rows])), 4)
+        self.assertLess(abs(estimate.mean - exact), 3 * estimate.std_error)
+        self.assertEqual(len(estimate.cluster_means), 4)
+
+        estimate = silhouette_estimate(X, labels, len(X))
+        self.assertAlmostEqual(estimate.mean, exact)
+        self.assertEqual(estimate.std_error, 0)
+
+    def test_simplified(self):
+        scores = simplified_silhouette_samples(self.X, self.labels)
+        self.assertEqual(scores.shape, (len(self.X), ))
+        self.assertEqual(scores[-1], 0)
+        self.assertGreater(np.mean(scores), 0.5)
@@ -362,6 +362,41 @@ class TestFilterString(unittest.TestCase):
         flt = FilterString("name", FilterString.IsDefined)
         self.assertFalse(flt(self.inst))
 
+    def test_table(self):
+        data = self.data
+        names = [str(inst["name"]) for inst in data]
+        for flt in (FilterString("name", FilterString.Contains, "ar"),
+                    FilterString("name", FilterString.StartsWith, "B",
+                                 case_sensitive=False),
+                    FilterString("name", FilterString.EndsWith, "k"),
+                    FilterString("name", FilterString.Between, "b", "m"),
+                    FilterStringList("name", ["bear", "CALF"],
+                                     case_sensitive=False),
+                    FilterRegex("name", "^b.*r$")):
+            selected = Values([flt])(data)
+            self.assertEqual([str(inst["name"]) for inst in selected],
+                             [name for name, inst in zip(names, data)
+                              if flt(inst if not isinstance(flt, FilterRegex)
+                                     else name)])
+
+    def test_conjunction_checks_selected_rows(self):
+        data = self.data
+        legs = FilterContinuous("legs", FilterContinuous.Equal, 2)
+        name = FilterString("name", FilterString.Contains, "a")
+        with patch.object(Table, "_string_filter_to_indicator",
+                          side_effect=Table._string_filter_to_indicator,
+                          autospec=True) as string_filter:
+            selected = Values([name, legs])(data)
+            # numeric condition is evaluated first, so the string
+            # condition checks only the names of animals with two legs
+            n_legs = sum(inst["legs"] == 2 for inst in data)
+            self.assertLessEqual(len(string_filter.call_args[0][2]), n_legs)
+        self.assertTrue(all(inst["legs"] == 2 and "a" in str(inst["name"])
+                            for inst in selected))
+        self.assertEqual(len(selected),
+                         sum(inst["legs"] == 2 and "a" in str(inst["name"])
+                             for inst in data))
+
 
 class TestSameValueFilter(unittest.TestCase):
     def setUp(self):
@@ -11,7 +11,8 @@ from Orange.data import Table
 from Orange.distance import Euclidean
 from Orange.projection import (MDS, Isomap, LocallyLinearEmbedding,
                                SpectralEmbedding, TSNE)
-from Orange.projection.manifold import torgerson
+from Orange.projection.manifold import \
+    torgerson, maxmin_landmarks, landmark_mds, stochastic_stress
 
 
 np.random.seed(42)
@@ -137,6 +138,48 @@ class TestManifold(unittest.TestCase):
         with self.assertRaises(ValueError):
             torgerson(dis, eigen_solver="madness")
 
+    def test_maxmin_landmarks(self):
+        x = np.array([[0, 0], [0, 0], [1, 0], [0, 1], [1, 1], [1, 1]])
+        landmarks, dist = maxmin_landmarks(x, 10, random_state=0)
+        self.assertEqual(len(landmarks), 4)
+        self.assertEqual(len(set(map(tuple, x[landmarks]))), 4)
+        np.testing.assert_almost_equal(
+            dist, Euclidean(x)[:, landmarks])
+
+    def test_landmark_mds(self):
+        # Points in a plane in 5D are embedded exactly
+        rs = np.random.RandomState(0)
+        x = rs.rand(200, 2).dot(rs.rand(2, 5))
+        dis = Euclidean(x)
+        embedding = landmark_mds(x, n_landmarks=10, random_state=0)
+        self.assertEqual(embedding.shape, (200, 2))
+        np.testing.assert_almost_equal(Euclidean(embedding), dis)
+        np.testing.assert_almost_equal(
+            landmark_mds(dis, n_landmarks=10, metric="precomputed",
+                         random_state=0),
+            embedding)
+
+        # With all points as landmarks, this is classical MDS
+        data = self.ionosphere[::5]
+        np.testing.assert_almost_equal(
+            np.abs(landmark_mds(data.X, n_landmarks=len(data),
+                                random_state=0)),
+            np.abs(torgerson(Euclidean(data))))
+
+    def test_stochastic_stress(self):
+        def stress(embedding):
+            return np.sum((Euclidean(embedding) - dis) ** 2)
+
+        data = self.ionosphere[::5]
+        dis = Euclidean(data)
+        init = landmark_mds(data.X, n_landmarks=10, random_state=0)
+        embedding = stochastic_stress(init, data.X, n_iter=30, random_state=0)
+        self.assertLess(stress(embedding), 0.8 * stress(init))
+        np.testing.assert_almost_equal(
+            stochastic_stress(init, dis, metric="precomputed", n_iter=30,
+                              random_state=0),
+            embedding)
+
 
 class TestTSNE(unittest.TestCase):
     @classmethod
@@ -90,6 +90,16 @@ class TestNaiveBayesLearner(unittest.TestCase):
         np.testing.assert_equal(values, values2)
         np.testing.assert_equal(probs, probs2)
 
+    def test_compact_data(self):
+        compact = self.data.to_compact()
+        model = self.learner(compact)
+        self.assertTrue(compact.is_compact())
+        values, probs = model(compact, model.ValueProbs)
+        self.assertTrue(compact.is_compact())
+        np.testing.assert_equal(values, self.model(self.data))
+        np.testing.assert_almost_equal(
+            probs, self.model(self.data, model.Probs))
+
     def test_predictions(self):
         self._test_predictions(sparse=None)
 
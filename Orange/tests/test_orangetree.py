@@ -2,6 +2,7 @@
 # pylint: disable=missing-docstring
 
 import unittest
+from unittest.mock import patch
 
 import numpy as np
 import scipy.sparse as sp
@@ -200,6 +201,28 @@ class TestTree:
         np.testing.assert_equal(tree(data), data.Y)
 
 
+    def test_sparse_columns(self):
+        data = self.data_mixed
+        sparse = data.copy()
+        sparse.X = sp.csr_matrix(np.nan_to_num(data.X))
+        dense = Table.from_numpy(data.domain, sparse.X.toarray(), data.Y)
+
+        column_slices = []
+        getitem = sp.csr_matrix.__getitem__
+
+        def csr_getitem(matrix, key):
+            if isinstance(key, tuple) and key[0] == slice(None):
+                column_slices.append(key)
+            return getitem(matrix, key)
+
+        for binarize in (False, True):
+            learner = self.TreeLearner(binarize=binarize, max_depth=3)
+            with patch.object(sp.csr_matrix, "__getitem__", csr_getitem):
+                tree = learner(sparse)
+            # columns are not sliced from CSR matrices
+            self.assertEqual(column_slices, [])
+            np.testing.assert_almost_equal(tree(sparse), learner(dense)(dense))
+
 class TestClassifier(TestTree, unittest.TestCase):
     from Orange.classification import TreeLearner
 
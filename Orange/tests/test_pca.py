@@ -1,10 +1,13 @@
 # Test methods with long descriptive names can omit docstrings
 # pylint: disable=missing-docstring
+import os
 import pickle
+import tempfile
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import numpy as np
+import scipy.sparse as sp
 from sklearn import __version__ as sklearn_version
 from sklearn.utils import check_random_state
 
@@ -154,6 +157,61 @@ class TestPCA(unittest.TestCase):
             pca.singular_values_, rpca.singular_values_, decimal=8
         )
 
+    def test_improved_randomized_pca_blocked(self):
+        """Blocked PCA should match the in-memory randomized PCA."""
+        random_state = check_random_state(42)
+        for shape in ((300, 20), (20, 300)):
+            x = random_state.negative_binomial(1, 0.5, shape).astype(float)
+            rpca = pca.ImprovedPCA(
+                5, svd_solver="randomized", random_state=0).fit(x)
+            bpca = pca.ImprovedPCA(5, random_state=0, block_size=7).fit(x)
+            self.assertEqual(bpca._fit_svd_solver, "randomized")
+            np.testing.assert_almost_equal(
+                rpca.components_, bpca.components_, decimal=8)
+            np.testing.assert_almost_equal(
+                rpca.explained_variance_ratio_,
+                bpca.explained_variance_ratio_, decimal=8)
+            np.testing.assert_almost_equal(
+                rpca.transform(x), bpca.transform(x), decimal=8)
+
+    def test_improved_pca_sparse_transform(self):
+        """Transforming sparse data must not densify it."""
+        random_state = check_random_state(42)
+        x = random_state.negative_binomial(1, 0.5, (100, 20)).astype(float)
+        model = pca.ImprovedPCA(5, random_state=0).fit(x)
+        with patch("scipy.sparse.csr_matrix.toarray") as toarray:
+            transformed = model.transform(sp.csr_matrix(x))
+            toarray.assert_not_called()
+        np.testing.assert_almost_equal(transformed, model.transform(x))
+
+    def test_pca_memmap(self):
+        random_state = check_random_state(42)
+        x = random_state.negative_binomial(1, 0.5, (100, 20)).astype(float)
+        with tempfile.TemporaryDirectory() as tmp:
+            mapped = np.memmap(os.path.join(tmp, "x"), dtype=float,
+                               mode="w+", shape=x.shape)
+            mapped[:] = x
+            fit = pca.ImprovedPCA.fit
+            with patch.object(pca.ImprovedPCA, "fit", autospec=True,
+                              side_effect=fit) as fitted:
+                bpca = PCA(5, random_state=0, block_size=30)(
+                    Table.from_numpy(Domain.from_numpy(x), mapped))
+            # the data is not copied by preprocessors
+            self.assertTrue(np.shares_memory(fitted.call_args[0][1], mapped))
+            rpca = PCA(5, random_state=0, svd_solver="randomized")(
+                Table.from_numpy(Domain.from_numpy(x), x))
+            np.testing.assert_almost_equal(
+                bpca.explained_variance_, rpca.explained_variance_, decimal=8)
+
+            # data with missing values is imputed
+            mapped[0, 0] = np.nan
+            with patch.object(pca.ImprovedPCA, "fit", autospec=True,
+                              side_effect=fit) as fitted:
+                PCA(5, random_state=0, block_size=30)(
+                    Table.from_numpy(Domain.from_numpy(x), mapped))
+            self.assertFalse(np.shares_memory(fitted.call_args[0][1], mapped))
+            del mapped
+
     @unittest.skipIf(sklearn_version.startswith('0.20'),
                      "https://github.com/scikit-learn/scikit-learn/issues/12234")
     def test_incremental_pca(self):
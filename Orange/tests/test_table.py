@@ -3,6 +3,7 @@
 
 import copy
 import os
+import pickle
 import random
 import unittest
 from unittest.mock import Mock, MagicMock, patch
@@ -18,7 +19,8 @@ from Orange import data
 from Orange.data import (filter, Unknown, Variable, Table, DiscreteVariable,
                          ContinuousVariable, Domain, StringVariable)
 from Orange.tests import test_dirname, assert_array_nanequal
-from Orange.data.table import _optimize_indices
+from Orange.data.table import _optimize_indices, lazy_row_subsets
+from Orange.preprocess.transformation import Identity
 
 
 if LooseVersion(Orange.__version__) < LooseVersion("3.24"):
@@ -2851,5 +2853,275 @@ class TestTableSparseDense(unittest.TestCase):
         d = self.iris.transform(domain)
         self.assertFalse(sp.issparse(d.metas))
 
+    def test_sparse_columns(self):
+        iris = self.iris
+        sparse = iris.to_sparse()
+        sparse.X = sparse.X.tocsr()
+        np.testing.assert_equal(sparse.get_column_view(2)[0], iris.X[:, 2])
+
+        # statistics do not change the format of X
+        for dist, sparse_dist in zip(iris._compute_distributions(),
+                                     sparse._compute_distributions()):
+            np.testing.assert_equal(dist[0], sparse_dist[0])
+        self.assertEqual(sparse.X.format, "csr")
+
+        # in-place changes of X are seen by column views and statistics
+        sparse.X[0, 0] = 100
+        sparse.X.data *= 2
+        np.testing.assert_equal(sparse.get_column_view(0)[0][:3],
+                                [200, 9.8, 9.4])
+        dist = sparse._compute_distributions([0])[0][0]
+        self.assertEqual(dist[0, -1], 200)
+
+    def test_from_table_sparse_columns(self):
+        sparse = self.iris.to_sparse()
+        sparse.X = sparse.X.tocsr()
+        attrs = sparse.domain.attributes
+        domain = Domain(
+            [ContinuousVariable("a", compute_value=Identity(attrs[2]),
+                                sparse=True),
+             ContinuousVariable("b", compute_value=Identity(attrs[0]),
+                                sparse=True),
+             ContinuousVariable("S1", compute_value=SparseCV(), sparse=True)],
+            sparse.domain.class_var)
+        d = sparse.transform(domain)
+        self.assertEqual(d.X.format, "csr")
+        np.testing.assert_equal(d.X.toarray()[:, :2], self.iris.X[:, [2, 0]])
+        self.assertEqual(d.X[:, 2].nnz, 0)
+
+
+class TestCompactTable(unittest.TestCase):
+    def setUp(self):
+        self.data = Table("heart_disease")
+
+    def test_compact_storage(self):
+        data = self.data
+        compact = data.to_compact()
+        self.assertTrue(compact.is_compact())
+        self.assertEqual(len(compact), len(data))
+
+        chest = data.domain.index("chest pain")
+        codes, unknown = compact.get_column_codes(chest)
+        self.assertEqual(codes.dtype, np.uint8)
+        self.assertEqual(unknown, 255)
+        np.testing.assert_equal(codes, data.X[:, chest])
+        self.assertIsNone(compact.get_column_codes("age"))
+        self.assertIsNone(data.get_column_codes(chest))
+
+        col = data.domain.index("thal")
+        np.testing.assert_equal(compact.get_column_view(col)[0],
+                                data.X[:, col])
+
+        # X is assembled when it is accessed
+        np.testing.assert_equal(compact.X, data.X)
+        self.assertFalse(compact.is_compact())
+        self.assertIsNone(compact.get_column_codes(chest))
+
+    def test_two_byte_codes(self):
+        var = DiscreteVariable("x", values=[str(i) for i in range(300)])
+        x = np.array([[0], [299], [np.nan]])
+        compact = Table.from_numpy(Domain([var]), x).to_compact()
+        codes, unknown = compact.get_column_codes(0)
+        self.assertEqual(codes.dtype, np.uint16)
+        np.testing.assert_equal(codes, [0, 299, unknown])
+        np.testing.assert_equal(compact.X, x)
+
+    def test_rows_and_columns(self):
+        data = self.data
+        compact = data.to_compact()
+
+        subset = compact[10:50:2]
+        self.assertTrue(subset.is_compact())
+        np.testing.assert_equal(subset.X, data.X[10:50:2])
+        subset = compact[[5, 1, 7]]
+        self.assertTrue(subset.is_compact())
+        np.testing.assert_equal(subset.X, data.X[[5, 1, 7]])
+
+        domain = Domain(data.domain.attributes[::-1], data.domain.class_var)
+        np.testing.assert_equal(compact.transform(domain).X,
+                                data.transform(domain).X)
+        self.assertTrue(compact.is_compact())
+
+        copy = compact.copy()
+        self.assertTrue(copy.is_compact())
+        np.testing.assert_equal(copy.X, data.X)
+
+    def test_statistics(self):
+        data = self.data
+        compact = data.to_compact()
+        for dist, compact_dist in zip(data._compute_distributions(),
+                                      compact._compute_distributions()):
+            np.testing.assert_equal(dist[0], compact_dist[0])
+            self.assertEqual(dist[1], compact_dist[1])
+
+        conts, unknowns = data._compute_contingency()
+        compact_conts, compact_unknowns = compact._compute_contingency()
+        self.assertEqual(unknowns, compact_unknowns)
+        for cont, compact_cont in zip(conts, compact_conts):
+            np.testing.assert_equal(cont[0], compact_cont[0])
+            np.testing.assert_equal(cont[1], compact_cont[1])
+        self.assertTrue(compact.is_compact())
+
+    def test_pickle(self):
+        compact = self.data.to_compact()
+        unpickled = pickle.loads(pickle.dumps(compact))
+        self.assertTrue(unpickled.is_compact())
+        np.testing.assert_equal(unpickled.X, self.data.X)
+
+    def test_encoded_strings(self):
+        data = Table("zoo")
+        compact = data.to_compact()
+        codes, uniques = compact._encoded_strings("name")
+        self.assertEqual(codes.dtype, np.int32)
+        np.testing.assert_equal(uniques[codes], data.metas[:, 0])
+        self.assertIsNone(compact._encoded_strings("legs"))
+
+        np.testing.assert_equal(compact.get_column_view("name")[0],
+                                data.metas[:, 0])
+        np.testing.assert_equal(compact[5:10].metas, data[5:10].metas)
+        np.testing.assert_equal(compact.copy().metas, data.metas)
+        domain = Domain([], metas=data.domain.metas)
+        np.testing.assert_equal(compact.transform(domain).metas,
+                                data.transform(domain).metas)
+        self.assertIsNotNone(compact._encoded_strings("name"))
+
+        np.testing.assert_equal(compact.metas, data.metas)
+        self.assertIsNone(compact._encoded_strings("name"))
+
+    def test_encoded_strings_filters(self):
+        data = Table("zoo")
+        compact = data.to_compact()
+        for f in (filter.FilterString("name", filter.FilterString.Contains,
+                                      "a"),
+                  filter.FilterString("name", filter.FilterString.StartsWith,
+                                      "B", case_sensitive=False),
+                  filter.FilterString("name", filter.FilterString.Between,
+                                      "b", "m"),
+                  filter.FilterString("name", filter.FilterString.IsDefined),
+                  filter.FilterStringList("name", ["bear", "CALF"],
+                                          case_sensitive=False),
+                  filter.FilterRegex("name", "^b.*r$")):
+            selected = filter.Values([f])(compact)
+            self.assertIsNotNone(selected._encoded_strings("name"))
+            np.testing.assert_equal(selected.metas,
+                                    filter.Values([f])(data).metas)
+
+    def test_encoded_strings_pickle(self):
+        n = 1000
+        domain = Domain([], metas=[StringVariable("s")])
+        metas = np.array([["value {}".format(i % 10)] for i in range(n)],
+                         dtype=object)
+        data = Table.from_numpy(domain, np.empty((n, 0)), metas=metas)
+        compact = data.to_compact()
+        self.assertLess(len(pickle.dumps(compact)), len(pickle.dumps(data)))
+        unpickled = pickle.loads(pickle.dumps(compact))
+        np.testing.assert_equal(unpickled.metas, metas)
+
+
+class TestLazyRows(unittest.TestCase):
+    def setUp(self):
+        self.data = Table("zoo")
+
+    def test_lazy_rows(self):
+        data = self.data
+        subset = Table.from_table_rows(data, [5, 1, 7, 8], lazy=True)
+        self.assertIs(subset._lazy_rows("X").array, data.X)
+        self.assertIs(subset._lazy_rows("metas").array, data.metas)
+        self.assertEqual(len(subset), 4)
+        np.testing.assert_equal(subset.ids, data.ids[[5, 1, 7, 8]])
+        np.testing.assert_equal(subset.get_column_view(2)[0],
+                                data.X[[5, 1, 7, 8], 2])
+
+        # rows of subsets of subsets are taken from the original table
+        subsubset = Table.from_table_rows(subset, [3, 0], lazy=True)
+        self.assertIs(subsubset._lazy_rows("X").array, data.X)
+        np.testing.assert_equal(subsubset.metas, data.metas[[8, 5]])
+        np.testing.assert_equal(subset[[3, 0]].X, data.X[[8, 5]])
+        self.assertIsNotNone(subset._lazy_rows("X"))
+
+        # arrays are copied on first access
+        subset.X[0, 0] = 42
+        self.assertIsNone(subset._lazy_rows("X"))
+        self.assertNotEqual(data.X[5, 0], 42)
+
+        # contiguous rows are copied, not viewed, on first access
+        subset = Table.from_table_rows(data, slice(1, 4), lazy=True)
+        self.assertIsNotNone(subset._lazy_rows("X"))
+        self.assertFalse(np.may_share_memory(subset.X, data.X))
+        selected = Table.from_table_rows(data, [1, 2, 3], lazy=True)
+        selected = selected.transform(Domain(data.domain.attributes[:3]))
+        self.assertFalse(np.may_share_memory(selected.X, data.X))
+
+        # rows are copied unless asked otherwise
+        self.assertIsNone(data[[5, 1, 7]]._lazy_rows("X"))
+
+    def test_class_weights_ids(self):
+        data = self.data.copy()
+        data.W = np.arange(len(data), dtype=float)
+        subset = Table.from_table_rows(data, [5, 1, 7], lazy=True)
+        for name in ("_Y", "W", "ids"):
+            self.assertIsNotNone(subset._lazy_rows(name))
+        np.testing.assert_equal(
+            subset.get_column_view(data.domain.class_var)[0],
+            data.Y[[5, 1, 7]])
+        np.testing.assert_equal(subset[[2, 0]].ids, data.ids[[7, 5]])
+        self.assertIsNotNone(subset._lazy_rows("_Y"))
+        np.testing.assert_equal(subset.Y, data.Y[[5, 1, 7]])
+        np.testing.assert_equal(subset.W, [5, 1, 7])
+        np.testing.assert_equal(subset.ids, data.ids[[5, 1, 7]])
+
+    def test_lazy_row_subsets(self):
+        data = self.data
+        with lazy_row_subsets():
+            subset = data[[5, 1, 7, 8]]
+            self.assertIs(subset._lazy_rows("X").array, data.X)
+            filtered = filter.SameValue(data.domain.class_var, "bird")(data)
+            self.assertIsNotNone(filtered._lazy_rows("X"))
+            filtered = filter.Values([filter.FilterDiscrete(
+                data.domain.class_var, ["bird"])])(data)
+            self.assertIsNotNone(filtered._lazy_rows("X"))
+            bird = data.domain.class_var.to_val("bird")
+            np.testing.assert_equal(filtered.X, data.X[data.Y == bird])
+        self.assertIsNone(data[[5, 1, 7]]._lazy_rows("X"))
+
+    def test_mask(self):
+        data = self.data
+        mask = data.X[:, 0] == 1
+        subset = Table.from_table_rows(data, mask, lazy=True)
+        np.testing.assert_equal(subset._lazy_rows("X").indices,
+                                np.flatnonzero(mask))
+        np.testing.assert_equal(subset.X, data.X[mask])
+
+        subset = Table.from_table_rows(data, np.zeros(len(data), bool),
+                                       lazy=True)
+        self.assertEqual(len(subset), 0)
+        self.assertEqual(subset.X.shape, (0, len(data.domain.attributes)))
+
+        self.assertRaises(IndexError, Table.from_table_rows,
+                          data, [0, 1000], lazy=True)
+
+    def test_columns(self):
+        data = self.data
+        subset = Table.from_table_rows(data, [5, 1, 7, 8], lazy=True)
+        domain = Domain(data.domain.attributes[3:6], data.domain.class_var,
+                        data.domain.metas)
+        selected = subset.transform(domain)
+        np.testing.assert_equal(selected.X, data.X[[5, 1, 7, 8], 3:6])
+        np.testing.assert_equal(selected.metas, data.metas[[5, 1, 7, 8]])
+        self.assertIsNotNone(subset._lazy_rows("X"))
+
+        copy = subset.copy()
+        self.assertIsNone(copy._lazy_rows("X"))
+        np.testing.assert_equal(copy.X, data.X[[5, 1, 7, 8]])
+
+    def test_pickle(self):
+        data = self.data
+        subset = Table.from_table_rows(data, [5, 1, 7, 8], lazy=True)
+        self.assertLess(len(pickle.dumps(subset)), len(pickle.dumps(data)))
+        unpickled = pickle.loads(pickle.dumps(subset))
+        np.testing.assert_equal(unpickled.X, data.X[[5, 1, 7, 8]])
+        np.testing.assert_equal(unpickled.metas, data.metas[[5, 1, 7, 8]])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -5,7 +5,8 @@ import scipy.sparse as sp
 
 from Orange.data import Table, Domain, DiscreteVariable, ContinuousVariable, \
     StringVariable
-from Orange.preprocess.transformation import Identity, Transformation, Lookup
+from Orange.preprocess.transformation import Identity, Transformation, \
+    Lookup, Indicator, Indicator1
 
 
 class TestTransformation(unittest.TestCase):
@@ -71,3 +72,18 @@ class LookupTest(unittest.TestCase):
             np.testing.assert_array_equal(
                 lookup.transform(col),
                 np.array([2, 0, 2, 1, np.nan, 1], dtype=np.float64))
+
+
+class IndicatorTest(unittest.TestCase):
+    def test_sparse(self):
+        column = np.array([1, 2, 0, 0, 2], dtype=np.float64)
+        sparse = sp.csc_matrix(column.reshape(-1, 1))
+        for value in (0, 2):
+            ind = Indicator(None, value).transform(sparse)
+            np.testing.assert_equal(
+                ind.toarray().ravel() if sp.issparse(ind) else ind,
+                column == value)
+            np.testing.assert_equal(
+                Indicator1(None, value).transform(sparse),
+                (column == value) * 2 - 1)
+        self.assertTrue(sp.issparse(Indicator(None, 2).transform(sparse)))
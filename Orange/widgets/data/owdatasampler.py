@@ -10,6 +10,7 @@ from Orange.widgets import gui
 from Orange.widgets.settings import Setting
 from Orange.data import Table
 from Orange.data.sql.table import SqlTable
+from Orange.data.table import lazy_row_subsets
 from Orange.widgets.utils.widgetpreview import WidgetPreview
 from Orange.widgets.widget import Msg, OWWidget, Input, Output
 from Orange.util import Reprable
@@ -233,8 +234,11 @@ class OWDataSampler(OWWidget):
                     'Outputting fold %d, %d instance%s.' %
                     (self.selectedFold, len(sample), "s" * (len(sample) != 1))
                 )
-            sample = self.data[sample]
-            other = self.data[remaining]
+            # inputs are not changed in place, so rows are copied only when
+            # (and if) the outputs' arrays are accessed
+            with lazy_row_subsets():
+                sample = self.data[sample]
+                other = self.data[remaining]
             self.sampled_instances = len(sample)
             self.remaining_instances = len(other)
         self.Outputs.data_sample.send(sample)
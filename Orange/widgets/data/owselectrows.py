@@ -20,6 +20,7 @@ import Orange.data.filter as data_filter
 from Orange.data.filter import FilterContinuous, FilterString
 from Orange.data.domain import filter_visible
 from Orange.data.sql.table import SqlTable
+from Orange.data.table import lazy_row_subsets
 from Orange.preprocess import Remove
 from Orange.widgets import widget, gui
 from Orange.widgets.settings import Setting, ContextSetting, DomainContextHandler
@@ -516,9 +517,12 @@ class OWSelectRows(widget.OWWidget):
 
             if conditions:
                 self.filters = data_filter.Values(conditions)
-                matching_output = self.filters(self.data)
-                self.filters.negate = True
-                non_matching_output = self.filters(self.data)
+                # inputs are not changed in place, so rows are copied only
+                # when (and if) the outputs' arrays are accessed
+                with lazy_row_subsets():
+                    matching_output = self.filters(self.data)
+                    self.filters.negate = True
+                    non_matching_output = self.filters(self.data)
 
                 row_sel = np.in1d(self.data.ids, matching_output.ids)
                 annotated_output = create_annotated_table(self.data, row_sel)
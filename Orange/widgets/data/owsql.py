@@ -13,6 +13,7 @@ from Orange.data.sql.table import SqlTable, LARGE_TABLE, AUTO_DL_LIMIT
 from Orange.widgets import gui
 from Orange.widgets.credentials import CredentialManager
 from Orange.widgets.settings import Setting
+from Orange.widgets.utils.concurrent import FutureWatcher
 from Orange.widgets.utils.itemmodels import PyListModel
 from Orange.widgets.utils.widgetpreview import WidgetPreview
 from Orange.widgets.widget import OWWidget, Output, Msg
@@ -24,6 +25,15 @@ def is_postgres(backend):
     return getattr(backend, 'display_name', '') == "PostgreSQL"
 
 
+def is_sqlite(backend):
+    return getattr(backend, 'display_name', '') == "SQLite"
+
+
+def download(table):
+    table.download_data(MAX_DL_LIMIT)
+    return Table(table)
+
+
 class TableModel(PyListModel):
     def data(self, index, role=Qt.DisplayRole):
         row = index.row()
@@ -87,6 +97,7 @@ class OWSql(OWWidget):
         self.backend = None
         self.data_desc_table = None
         self.database_desc = None
+        self._download = None  # QueryFuture with the downloaded table
 
         vbox = gui.vBox(self.controlArea, "Server", addSpace=True)
         box = gui.vBox(vbox)
@@ -225,8 +236,14 @@ class OWSql(OWWidget):
         self.port = hostport[1] if len(hostport) == 2 else None
 
     def connect(self):
+        self.cancel_download()
+        self.close_backend()
         self._parse_host_port()
         self.database, _, self.schema = self.databasetext.text().partition('/')
+        if 0 <= self.backendcombo.currentIndex() and \
+                is_sqlite(self.backends[self.backendcombo.currentIndex()]):
+            # database is a path to the file
+            self.database, self.schema = self.databasetext.text(), ""
         self.username = self.usernametext.text() or None
         self.password = self.passwordtext.text() or None
         self.Warning.missing_extension.clear()
@@ -249,7 +266,7 @@ class OWSql(OWWidget):
                 self.download = True
                 self.downloadcb.setEnabled(False)
 
-            if not is_postgres(self.backend):
+            if not is_postgres(self.backend) and not is_sqlite(self.backend):
                 self.download = True
                 self.downloadcb.setEnabled(False)
 
@@ -295,8 +312,43 @@ class OWSql(OWWidget):
         #    shown=missing)
 
     def open_table(self):
+        self.cancel_download()
         table = self.get_table()
         self.data_desc_table = table
+        if self.download and isinstance(table, SqlTable):
+            self.Outputs.data.send(None)
+            self.start_download(table)
+        else:
+            self.Outputs.data.send(table)
+
+    def start_download(self, table):
+        """Download the table in a separate thread"""
+        self.setBlocking(True)
+        self.setStatusMessage("Downloading")
+        self._download = table.backend.submit(download, table)
+        watcher = FutureWatcher(self._download, parent=self)
+        watcher.done.connect(self._on_download_done)
+
+    def cancel_download(self):
+        """Cancel the download (and its query) if it is running"""
+        if self._download is not None:
+            self._download.cancel()
+            self._download = None
+            self.setBlocking(False)
+            self.setStatusMessage("")
+
+    def _on_download_done(self, future):
+        if future is not self._download:  # cancelled
+            return
+        self._download = None
+        self.setBlocking(False)
+        self.setStatusMessage("")
+        try:
+            table = future.result()
+        except BackendError as ex:
+            self.Error.connection(str(ex))
+            return
+        self.data_desc_table = table
         self.Outputs.data.send(table)
 
     def get_table(self):
@@ -416,11 +468,19 @@ class OWSql(OWWidget):
                         if confirm == QMessageBox.No:
                             return
 
-            table.download_data(MAX_DL_LIMIT)
-            table = Table(table)
-
         return table
 
+    def close_backend(self):
+        """Close the connection (and drop unused samples)"""
+        if self.backend is not None:
+            self.backend.close()
+            self.backend = None
+
+    def onDeleteWidget(self):
+        self.cancel_download()
+        self.close_backend()
+        super().onDeleteWidget()
+
     def send_report(self):
         if not self.database_desc:
             self.report_paragraph("No database connection.")
@@ -81,6 +81,14 @@ class TestOWDataSampler(WidgetTest):
                     self.assertEqual(len(self.iris), len(sample) + len(other))
                     self.assertNoIntersection(sample, other)
 
+    def test_outputs_are_not_copied(self):
+        self.send_signal("Data", self.iris)
+        sample = self.get_output("Data Sample")
+        other = self.get_output("Remaining Data")
+        self.assertIs(sample._lazy_rows("X").array, self.iris.X)
+        self.assertIs(other._lazy_rows("X").array, self.iris.X)
+        self.assertEqual(len(sample.X) + len(other.X), len(self.iris))
+
     def test_bigger_size_with_replacement(self):
         """Allow bigger output without replacement."""
         self.send_signal('Data', self.iris[:2])
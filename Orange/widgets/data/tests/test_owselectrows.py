@@ -241,6 +241,18 @@ class TestOWSelectRows(WidgetTest):
         np.testing.assert_equal(annotations[:50], True)
         np.testing.assert_equal(annotations[50:], False)
 
+    def test_outputs_are_not_copied(self):
+        iris = Table("iris")
+        self.send_signal(self.widget.Inputs.data, iris)
+        self.enterFilter(iris.domain["iris"], "is", "Iris-setosa")
+
+        matching = self.get_output(self.widget.Outputs.matching_data)
+        unmatched = self.get_output(self.widget.Outputs.unmatched_data)
+        self.assertIs(matching._lazy_rows("X").array, iris.X)
+        self.assertIs(unmatched._lazy_rows("X").array, iris.X)
+        np.testing.assert_equal(matching.X, iris.X[:50])
+        np.testing.assert_equal(unmatched.Y, iris.Y[50:])
+
     def widget_with_context(self, domain, conditions):
         ch = SelectRowsContextHandler()
         context = ch.new_context(domain, *ch.encode_domain(domain))
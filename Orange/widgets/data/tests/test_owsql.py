@@ -1,10 +1,16 @@
 # Test methods with long descriptive names can omit docstrings
 # pylint: disable=missing-docstring
 
+import os
+import sqlite3
+import tempfile
+import threading
 import unittest
 from unittest import mock
 
 from Orange.data import Table
+from Orange.data.sql.backend import SQLiteBackend
+from Orange.data.sql.table import SqlTable
 from Orange.widgets.data.owsql import OWSql
 from Orange.widgets.tests.base import WidgetTest
 from Orange.tests.sql.base import create_iris, parse_uri, sql_test
@@ -89,5 +95,67 @@ class TestOWSql(WidgetTest):
         self.assertFalse(widget.downloadcb.isEnabled())
 
 
+class TestOWSqlSQLite(WidgetTest):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        fd, cls.database = tempfile.mkstemp(suffix=".sqlite")
+        os.close(fd)
+        with sqlite3.connect(cls.database) as conn:
+            conn.execute("CREATE TABLE iris (a REAL, b REAL)")
+            conn.executemany("INSERT INTO iris VALUES (?, ?)",
+                             Table("iris").X[:, :2].tolist())
+        conn.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        os.remove(cls.database)
+
+    def setUp(self):
+        self.widget = self.create_widget(OWSql)
+        self.widget.backendcombo.setCurrentIndex(
+            list(self.widget.backends).index(SQLiteBackend))
+        self.widget.databasetext.setText(self.database)
+        self.widget.connect()
+        self.widget.tablecombo.setCurrentIndex(
+            list(map(str, self.widget.tables)).index("iris"))
+
+    def test_download(self):
+        self.widget.download = True
+        self.widget.select_table()
+        self.assertTrue(self.widget.isBlocking())
+        output = self.get_output(self.widget.Outputs.data)
+        self.assertNotIsInstance(output, SqlTable)
+        self.assertEqual(len(output), 150)
+        self.assertFalse(self.widget.isBlocking())
+
+        self.widget.download = False
+        self.widget.select_table()
+        self.assertIsInstance(self.get_output(self.widget.Outputs.data),
+                              SqlTable)
+
+    def test_cancel_download(self):
+        started, release = threading.Event(), threading.Event()
+
+        def download(table):
+            started.set()
+            release.wait(5)
+            return Table(table)
+
+        self.widget.download = True
+        with mock.patch("Orange.widgets.data.owsql.download", download):
+            self.widget.select_table()
+            future = self.widget._download
+            self.assertTrue(started.wait(5))
+            # parameters change while the table is being downloaded
+            self.widget.connect()
+            release.set()
+        self.assertTrue(future.cancelled())
+        self.assertFalse(self.widget.isBlocking())
+        self.process_events()
+        self.assertIsNone(self.get_output(self.widget.Outputs.data))
+
+
 if __name__ == "__main__":
     unittest.main()
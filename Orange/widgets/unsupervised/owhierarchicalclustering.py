@@ -6,6 +6,9 @@ import typing
 from typing import Any, List, Tuple, Dict, Optional, Set
 
 import numpy as np
+import bottleneck as bn
+import scipy.cluster.hierarchy
+import scipy.sparse as sp
 
 from AnyQt.QtWidgets import (
     QGraphicsWidget, QGraphicsObject, QGraphicsLinearLayout, QGraphicsPathItem,
@@ -25,9 +28,10 @@ import Orange.data
 from Orange.data.domain import filter_visible
 from Orange.data import Domain
 import Orange.misc
+from Orange import distance
 from Orange.clustering.hierarchical import \
     postorder, preorder, Tree, tree_from_linkage, dist_matrix_linkage, \
-    leaves, prune, top_clusters
+    data_linkage, leaves, prune, top_clusters
 
 from Orange.widgets import widget, gui, settings
 from Orange.widgets.utils import colorpalette, itemmodels, combobox
@@ -41,6 +45,15 @@ __all__ = ["OWHierarchicalClustering"]
 
 LINKAGE = ["Single", "Average", "Weighted", "Complete", "Ward"]
 
+#: Maximum number of leaves drawn in the dendrogram; larger clusterings
+#: are shown with their lowest clusters collapsed
+MAX_DISPLAYED_LEAVES = 2000
+#: Number of rows of data (given without a distance matrix) above which the
+#: clustering is computed by `data_linkage`, which does not store distances
+DATA_LINKAGE_ROWS = 3000
+#: Maximum number of item labels joined into a label of a collapsed cluster
+MAX_JOINED_LABELS = 10
+
 
 def dendrogram_layout(tree, expand_leaves=False):
     # type: (Tree, bool) -> List[Tuple[Tree, Tuple[float, float, float]]]
@@ -792,13 +805,14 @@ if typing.TYPE_CHECKING:
 class OWHierarchicalClustering(widget.OWWidget):
     name = "Hierarchical Clustering"
     description = "Display a dendrogram of a hierarchical clustering " \
-                  "constructed from the input distance matrix."
+                  "constructed from the input distance matrix or data."
     icon = "icons/HierarchicalClustering.svg"
     priority = 2100
     keywords = []
 
     class Inputs:
         distances = Input("Distances", Orange.misc.DistMatrix)
+        data = Input("Data", Orange.data.Table)
 
     class Outputs:
         selected_data = Output("Selected Data", Orange.data.Table, default=True)
@@ -843,6 +857,17 @@ class OWHierarchicalClustering(widget.OWWidget):
 
     class Error(widget.OWWidget.Error):
         not_finite_distances = Msg("Some distances are infinite")
+        no_continuous_features = Msg("No numeric features")
+        not_enough_rows = Msg("At least two data instances are needed")
+        data_linkage = Msg("{} linkage needs distances for more than {} "
+                           "instances")
+
+    class Warning(widget.OWWidget.Warning):
+        ignoring_discrete = Msg("Ignoring categorical features")
+        imputing_data = Msg("Missing values were imputed")
+
+    class Information(widget.OWWidget.Information):
+        low_detail = Msg("Dendrogram shows the top {} of {} clusters.")
 
     #: Stored (manual) selection state (from a saved workflow) to restore.
     __pending_selection_restore = None  # type: Optional[SelectionState]
@@ -851,6 +876,9 @@ class OWHierarchicalClustering(widget.OWWidget):
         super().__init__()
 
         self.matrix = None
+        self.data = None
+        # rows of the input data that are clustered if there are no distances
+        self._data_X = None
         self.items = None
         self.linkmatrix = None
         self.root = None
@@ -1055,14 +1083,8 @@ class OWHierarchicalClustering(widget.OWWidget):
 
     @Inputs.distances
     def set_distances(self, matrix):
-        if self.__pending_selection_restore is not None:
-            selection_state = self.__pending_selection_restore
-        else:
-            # save the current selection to (possibly) restore later
-            selection_state = self._save_selection()
-
         self.error()
-        self.Error.clear()
+        self.Error.not_finite_distances.clear()
         if matrix is not None:
             N, _ = matrix.shape
             if N < 2:
@@ -1074,8 +1096,27 @@ class OWHierarchicalClustering(widget.OWWidget):
                 matrix = None
 
         self.matrix = matrix
-        if matrix is not None:
-            self._set_items(matrix.row_items, matrix.axis)
+        self._setup()
+
+    @Inputs.data
+    def set_data(self, data):
+        """Set the data whose rows are clustered if there are no distances"""
+        self.data = data
+        if self.matrix is None:
+            self._setup()
+
+    def _setup(self):
+        if self.__pending_selection_restore is not None:
+            selection_state = self.__pending_selection_restore
+        else:
+            # save the current selection to (possibly) restore later
+            selection_state = self._save_selection()
+
+        self._prepare_data()
+        if self.matrix is not None:
+            self._set_items(self.matrix.row_items, self.matrix.axis)
+        elif self._data_X is not None:
+            self._set_items(self.data)
         else:
             self._set_items(None)
         self._invalidate_clustering()
@@ -1087,6 +1128,37 @@ class OWHierarchicalClustering(widget.OWWidget):
 
         self.unconditional_commit()
 
+    def _prepare_data(self):
+        # rows of the input data for clustering by euclidean distances, when
+        # there are no distances; as in the Distances widget, categorical
+        # features are ignored and missing values are imputed
+        self.Error.no_continuous_features.clear()
+        self.Error.not_enough_rows.clear()
+        self.Warning.clear()
+        self._data_X = None
+        data = self.data
+        if self.matrix is not None or data is None:
+            return
+        if len(data) < 2:
+            self.Error.not_enough_rows()
+            return
+        if data.domain.has_discrete_attributes():
+            if not data.domain.has_continuous_attributes():
+                self.Error.no_continuous_features()
+                return
+            self.Warning.ignoring_discrete()
+            data = distance.remove_discrete_features(data)
+        if sp.issparse(data.X):
+            X = data.X.toarray()
+        else:
+            X = data.X
+        if bn.anynan(X):
+            self.Warning.imputing_data()
+            X = distance.impute(data).X
+            if sp.issparse(X):
+                X = X.toarray()
+        self._data_X = X
+
     def _set_items(self, items, axis=1):
         self.closeContext()
         self.items = items
@@ -1140,13 +1212,17 @@ class OWHierarchicalClustering(widget.OWWidget):
 
     def _update(self):
         self._clear_plot()
+        self.Error.data_linkage.clear()
 
-        distances = self.matrix
-
-        if distances is not None:
-            method = LINKAGE[self.linkage].lower()
-            Z = dist_matrix_linkage(distances, linkage=method)
+        method = LINKAGE[self.linkage].lower()
+        if self.matrix is not None:
+            Z = dist_matrix_linkage(self.matrix, linkage=method)
+        elif self._data_X is not None:
+            Z = self._data_linkage(method)
+        else:
+            Z = None
 
+        if Z is not None:
             tree = tree_from_linkage(Z)
             self.linkmatrix = Z
             self.root = tree
@@ -1154,17 +1230,50 @@ class OWHierarchicalClustering(widget.OWWidget):
             self.top_axis.setRange(tree.value.height, 0.0)
             self.bottom_axis.setRange(tree.value.height, 0.0)
 
-            if self.pruning:
-                self._set_displayed_root(prune(tree, level=self.max_depth))
-            else:
-                self._set_displayed_root(tree)
+            self._set_displayed_root(self._display_tree())
         else:
             self.linkmatrix = None
             self.root = None
+            self.Information.low_detail.clear()
             self._set_displayed_root(None)
 
         self._apply_selection()
 
+    def _data_linkage(self, method):
+        """
+        Return the linkage of rows of the input data by euclidean distances.
+        Above `DATA_LINKAGE_ROWS` rows, it is computed by `data_linkage`
+        without storing the distances, which does not support weighted
+        linkage.
+        """
+        X = self._data_X
+        if len(X) <= DATA_LINKAGE_ROWS:
+            return scipy.cluster.hierarchy.linkage(
+                X, method=method, metric="euclidean")
+        try:
+            return data_linkage(X, linkage=method)
+        except ValueError:
+            self.Error.data_linkage(LINKAGE[self.linkage], DATA_LINKAGE_ROWS)
+            return None
+
+    def _display_tree(self):
+        """
+        Return the (possibly pruned) tree to display for the clustering.
+
+        Without explicit pruning, clusterings with more than
+        `MAX_DISPLAYED_LEAVES` items are shown at a lower level of detail,
+        with only the top `MAX_DISPLAYED_LEAVES` clusters.
+        """
+        self.Information.low_detail.clear()
+        if self.pruning:
+            return prune(self.root, level=self.max_depth)
+        n_items = self.root.value.last - self.root.value.first
+        if n_items > MAX_DISPLAYED_LEAVES:
+            top = set(top_clusters(self.root, MAX_DISPLAYED_LEAVES))
+            self.Information.low_detail(MAX_DISPLAYED_LEAVES, n_items)
+            return prune(self.root, condition=top.__contains__)
+        return self.root
+
     def _update_labels(self):
         labels = []
         if self.root and self._displayed_root:
@@ -1186,7 +1295,8 @@ class OWHierarchicalClustering(widget.OWWidget):
 
             if labels and self._displayed_root is not self.root:
                 joined = leaves(self._displayed_root)
-                labels = [", ".join(labels[leaf.value.first: leaf.value.last])
+                labels = [joined_label(labels[leaf.value.first:
+                                              leaf.value.last])
                           for leaf in joined]
 
         self.labels.set_labels(labels)
@@ -1265,11 +1375,7 @@ class OWHierarchicalClustering(widget.OWWidget):
         if self.root:
             selection = self.dendrogram.selected_nodes()
             ranges = [node.value.range for node in selection]
-            if self.pruning:
-                self._set_displayed_root(
-                    prune(self.root, level=self.max_depth))
-            else:
-                self._set_displayed_root(self.root)
+            self._set_displayed_root(self._display_tree())
             selected = [node for node in preorder(self._displayed_root)
                         if node.value.range in ranges]
 
@@ -1279,7 +1385,9 @@ class OWHierarchicalClustering(widget.OWWidget):
 
     def commit(self):
         items = getattr(self.matrix, "items", self.items)
-        if not items:
+        # rows of data are clustered if there are no distances
+        axis = getattr(self.matrix, "axis", 1)
+        if not items or not self.root:
             self.Outputs.selected_data.send(None)
             self.Outputs.annotated_data.send(None)
             return
@@ -1299,15 +1407,15 @@ class OWHierarchicalClustering(widget.OWWidget):
         if not selected_indices:
             self.Outputs.selected_data.send(None)
             annotated_data = create_annotated_table(items, []) \
-                if self.selection_method == 0 and self.matrix.axis else None
+                if self.selection_method == 0 and axis else None
             self.Outputs.annotated_data.send(annotated_data)
             return
 
         selected_data = None
 
-        if isinstance(items, Orange.data.Table) and self.matrix.axis == 1:
+        if isinstance(items, Orange.data.Table) and axis == 1:
             # Select rows
-            c = np.zeros(self.matrix.shape[0])
+            c = np.zeros(len(items))
 
             for i, indices in enumerate(maps):
                 c[indices] = i
@@ -1358,7 +1466,7 @@ class OWHierarchicalClustering(widget.OWWidget):
                         metas = remove_other_value(metas)
                     selected_data.domain = Domain(attrs, class_, metas)
 
-        elif isinstance(items, Orange.data.Table) and self.matrix.axis == 0:
+        elif isinstance(items, Orange.data.Table) and axis == 0:
             # Select columns
             domain = Orange.data.Domain(
                 [items.domain[i] for i in selected_indices],
@@ -1616,6 +1724,17 @@ class OWHierarchicalClustering(widget.OWWidget):
         self.report_plot()
 
 
+def joined_label(labels):
+    """
+    Return a label of a collapsed cluster from labels of its items.
+    """
+    if len(labels) > MAX_JOINED_LABELS:
+        return "{}, … (+{})".format(
+            ", ".join(labels[:MAX_JOINED_LABELS]),
+            len(labels) - MAX_JOINED_LABELS)
+    return ", ".join(labels)
+
+
 def qfont_scaled(font, factor):
     scaled = QFont(font)
     if font.pointSizeF() != -1:
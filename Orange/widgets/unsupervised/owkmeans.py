@@ -7,7 +7,7 @@ from AnyQt.QtCore import Qt, QTimer, QAbstractTableModel, QModelIndex, QThread,
 from AnyQt.QtGui import QIntValidator
 from AnyQt.QtWidgets import QGridLayout, QTableView
 
-from Orange.clustering import KMeans
+from Orange.clustering import KMeans, MiniBatchKMeans
 from Orange.clustering.kmeans import KMeansModel, SILHOUETTE_MAX_SAMPLES
 from Orange.data import Table, Domain, DiscreteVariable, ContinuousVariable
 from Orange.data.util import get_unique_names
@@ -22,6 +22,8 @@ from Orange.widgets.widget import Input, Output
 
 
 RANDOM_STATE = 0
+#: Data with more rows is clustered with mini-batch k-means
+MINI_BATCH_THRESHOLD = 100000
 
 
 class ClusterTableModel(QAbstractTableModel):
@@ -123,6 +125,11 @@ class OWKMeans(widget.OWWidget):
             "Too few ({}) unique data instances for {} clusters"
         )
 
+    class Information(widget.OWWidget.Information):
+        mini_batch = widget.Msg(
+            "Large data is clustered with mini-batch k-means."
+        )
+
     INIT_METHODS = (("Initialize with KMeans++", "k-means++"),
                     ("Random initialization", "random"))
 
@@ -269,6 +276,12 @@ class OWKMeans(widget.OWWidget):
         if k > len(data):
             raise NotEnoughData()
 
+        if len(data) > MINI_BATCH_THRESHOLD:
+            return MiniBatchKMeans(
+                n_clusters=k, init=init, n_init=n_init, max_iter=max_iter,
+                batch_size=1000, compute_silhouette_score=silhouette,
+                random_state=random_state,
+            )(data)
         return KMeans(
             n_clusters=k, init=init, n_init=n_init, max_iter=max_iter,
             compute_silhouette_score=silhouette, random_state=random_state,
@@ -411,6 +424,7 @@ class OWKMeans(widget.OWWidget):
             self.send_data()
             return
 
+        self.Information.mini_batch(shown=len(self.data) > MINI_BATCH_THRESHOLD)
         if self.optimize_k:
             self.run_optimization()
         else:
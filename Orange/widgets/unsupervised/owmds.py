@@ -1,6 +1,7 @@
 import warnings
 
 import numpy as np
+import scipy.sparse as sp
 import scipy.spatial.distance
 
 from AnyQt.QtCore import Qt, QTimer
@@ -10,7 +11,8 @@ import pyqtgraph as pg
 from Orange.data import ContinuousVariable, Domain, Table
 from Orange.distance import Euclidean
 from Orange.misc import DistMatrix
-from Orange.projection.manifold import torgerson, MDS
+from Orange.projection.manifold import \
+    torgerson, MDS, landmark_mds, iter_stochastic_stress
 
 from Orange.widgets import gui, settings
 from Orange.widgets.settings import SettingProvider
@@ -29,9 +31,21 @@ def stress(X, distD):
     return delta_sq.sum(axis=0) / 2
 
 
+def _same_data(X1, X2):
+    if sp.issparse(X1) or sp.issparse(X2):
+        return sp.issparse(X1) and sp.issparse(X2) \
+            and X1.shape == X2.shape and (X1 != X2).nnz == 0
+    return np.array_equal(X1, X2)
+
+
 #: Maximum number of displayed closest pairs.
 MAX_N_PAIRS = 10000
 
+#: Data with more rows is embedded with landmark MDS and refined by
+#: stochastic stress minimization, without computing the distance matrix.
+MAX_MATRIX_ROWS = 5000
+N_LANDMARKS = 100
+
 
 class OWMDSGraph(OWScatterPlotBase):
     #: Percentage of all pairs displayed (ranges from 0 to 20)
@@ -149,6 +163,10 @@ class OWMDS(OWDataProjectionWidget):
         out_of_memory = Msg("Out of memory")
         optimization_error = Msg("Error during optimization\n{}")
 
+    class Information(OWDataProjectionWidget.Information):
+        landmark = Msg("Large data: MDS is approximated with landmarks "
+                       "and sampled pairs of instances.")
+
     def __init__(self):
         super().__init__()
         #: Input dissimilarity matrix
@@ -161,6 +179,8 @@ class OWMDS(OWDataProjectionWidget):
         self.__invalidated = True
         self.embedding = None
         self.effective_matrix = None
+        #: Preprocessed data for large data, instead of `effective_matrix`
+        self.effective_X = None
 
         self.__update_loop = None
         # timer for scheduling updates
@@ -243,9 +263,11 @@ class OWMDS(OWDataProjectionWidget):
     def _initialize(self):
         matrix_existed = self.effective_matrix is not None
         effective_matrix = self.effective_matrix
+        effective_X = self.effective_X
         self.__invalidated = True
         self.data = None
         self.effective_matrix = None
+        self.effective_X = None
         self.closeContext()
         self.clear_messages()
 
@@ -273,7 +295,10 @@ class OWMDS(OWDataProjectionWidget):
                 self.data = None
         elif self.data.domain.attributes:
             preprocessed_data = MDS().preprocess(self.data)
-            self.effective_matrix = Euclidean(preprocessed_data)
+            if len(preprocessed_data) > MAX_MATRIX_ROWS:
+                self.effective_X = preprocessed_data.X
+            else:
+                self.effective_matrix = Euclidean(preprocessed_data)
         else:
             self.Error.no_attributes()
             self.clear()
@@ -282,10 +307,12 @@ class OWMDS(OWDataProjectionWidget):
 
         self.init_attr_values()
         self.openContext(self.data)
-        self.__invalidated = not (matrix_existed and
-                                  self.effective_matrix is not None and
-                                  np.array_equal(effective_matrix,
-                                                 self.effective_matrix))
+        self.__invalidated = not (
+            matrix_existed and self.effective_matrix is not None and
+            np.array_equal(effective_matrix, self.effective_matrix)
+            or effective_X is not None and self.effective_X is not None
+            and _same_data(effective_X, self.effective_X))
+        self.Information.landmark(shown=self._landmark_input() is not None)
         if self.__invalidated:
             self.clear()
         self.graph.set_effective_matrix(self.effective_matrix)
@@ -303,14 +330,27 @@ class OWMDS(OWDataProjectionWidget):
         elif self.__state == OWMDS.Finished:
             # Resume/continue from a previous run
             self.__start()
-        elif self.__state == OWMDS.Waiting and \
-                self.effective_matrix is not None:
+        elif self.__state == OWMDS.Waiting and (
+                self.effective_matrix is not None
+                or self.effective_X is not None):
             self.__start()
 
     def stop(self):
         if self.__state == OWMDS.Running:
             self.__set_update_loop(None)
 
+    def _landmark_input(self):
+        """
+        Return the data or distances and the metric for approximate MDS of
+        large data, or `None` for small data.
+        """
+        if self.effective_X is not None:
+            return self.effective_X, "euclidean"
+        if self.effective_matrix is not None \
+                and len(self.effective_matrix) > MAX_MATRIX_ROWS:
+            return self.effective_matrix, "precomputed"
+        return None
+
     def __start(self):
         self.graph.pause_drawing_pairs()
         X = self.effective_matrix
@@ -359,7 +399,24 @@ class OWMDS(OWDataProjectionWidget):
 
                 yield embedding, mdsfit.stress_, iterations_done / max_iter
 
-        self.__set_update_loop(update_loop(X, self.max_iter, step_size, init))
+        def stochastic_update_loop(X, metric, max_iter, step, init):
+            """
+            return an iterator over MDS point embeddings improved on
+            sampled pairs of points.
+            """
+            steps = iter_stochastic_stress(init, X, metric, n_iter=max_iter)
+            for iterations_done, embedding in enumerate(steps, start=1):
+                if iterations_done % step == 0 \
+                        or iterations_done == max_iter:
+                    yield embedding.copy(), None, iterations_done / max_iter
+
+        landmark_input = self._landmark_input()
+        if landmark_input is not None:
+            self.__set_update_loop(stochastic_update_loop(
+                *landmark_input, self.max_iter, step_size, init))
+        else:
+            self.__set_update_loop(
+                update_loop(X, self.max_iter, step_size, init))
         self.progressBarInit(processEvents=None)
 
     def __set_update_loop(self, loop):
@@ -453,16 +510,24 @@ class OWMDS(OWDataProjectionWidget):
         if self.__update_loop is not None:
             self.__set_update_loop(None)
 
-        if self.effective_matrix is None:
+        if self.effective_matrix is None and self.effective_X is None:
             self.graph.reset_graph()
             return
 
-        X = self.effective_matrix
+        landmark_input = self._landmark_input()
+        if landmark_input is not None:
+            X, metric = landmark_input
+        else:
+            X = self.effective_matrix
 
         if initialization == OWMDS.PCA:
-            self.embedding = torgerson(X)
+            if landmark_input is not None:
+                self.embedding = landmark_mds(
+                    X, n_landmarks=N_LANDMARKS, metric=metric, random_state=0)
+            else:
+                self.embedding = torgerson(X)
         elif initialization == OWMDS.Random:
-            self.embedding = np.random.rand(len(X), 2)
+            self.embedding = np.random.rand(X.shape[0], 2)
         else:
             jitter_coord(self.embedding[:, 0])
             jitter_coord(self.embedding[:, 1])
@@ -511,6 +576,8 @@ class OWMDS(OWDataProjectionWidget):
 
     def get_size_data(self):
         if self.attr_size == "Stress":
+            if self.effective_matrix is None:
+                return None
             return stress(self.embedding, self.effective_matrix)
         else:
             return super().get_size_data()
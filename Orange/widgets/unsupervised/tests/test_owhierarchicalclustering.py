@@ -1,6 +1,7 @@
 # Test methods with long descriptive names can omit docstrings
 # pylint: disable=missing-docstring
 import warnings
+from unittest.mock import patch
 
 import numpy as np
 
@@ -8,11 +9,12 @@ from AnyQt.QtCore import QPoint, Qt, QEvent
 from AnyQt.QtGui import QMouseEvent
 
 import Orange.misc
+from Orange.clustering.hierarchical import leaves, data_linkage
 from Orange.data import Table, Domain, ContinuousVariable, DiscreteVariable
 from Orange.distance import Euclidean
 from Orange.widgets.tests.base import WidgetTest, WidgetOutputsTestMixin
 from Orange.widgets.unsupervised.owhierarchicalclustering import \
-    OWHierarchicalClustering
+    OWHierarchicalClustering, LINKAGE
 
 
 class TestOWHierarchicalClustering(WidgetTest, WidgetOutputsTestMixin):
@@ -171,3 +173,88 @@ class TestOWHierarchicalClustering(WidgetTest, WidgetOutputsTestMixin):
         self.send_signal(w.Inputs.distances, self.distances, widget=w)
         ids_2 = self.get_output(w.Outputs.selected_data, widget=w).ids
         self.assertSequenceEqual(list(ids_1), list(ids_2))
+
+    def test_low_detail(self):
+        w = self.widget
+        with patch("Orange.widgets.unsupervised.owhierarchicalclustering."
+                   "MAX_DISPLAYED_LEAVES", 20):
+            self.send_signal(w.Inputs.distances, self.distances)
+            self.assertTrue(w.Information.low_detail.is_shown())
+            self.assertEqual(len(list(leaves(w._displayed_root))), 20)
+
+            w.pruning = 1
+            w._invalidate_pruning()
+            self.assertFalse(w.Information.low_detail.is_shown())
+
+            w.pruning = 0
+            w._invalidate_pruning()
+            self.send_signal(w.Inputs.distances, None)
+            self.assertFalse(w.Information.low_detail.is_shown())
+
+    def test_data_without_distances(self):
+        w = self.widget
+        self.send_signal(w.Inputs.data, self.data)
+        self.assertIsNotNone(w.root)
+        self.assertEqual(len(list(leaves(w.root))), len(self.data))
+        self.assertIsNotNone(self.get_output(w.Outputs.annotated_data))
+
+        # distances take precedence over data
+        self.send_signal(w.Inputs.distances, Euclidean(self.data[:10]))
+        self.assertEqual(len(list(leaves(w.root))), 10)
+        self.send_signal(w.Inputs.distances, None)
+        self.assertEqual(len(list(leaves(w.root))), len(self.data))
+
+        self.send_signal(w.Inputs.data, self.data[:1])
+        self.assertTrue(w.Error.not_enough_rows.is_shown())
+        self.assertIsNone(w.root)
+        self.send_signal(w.Inputs.data, None)
+        self.assertFalse(w.Error.not_enough_rows.is_shown())
+        self.assertIsNone(self.get_output(w.Outputs.annotated_data))
+
+    def test_data_preprocessing(self):
+        w = self.widget
+        data = Table("heart_disease")
+        self.send_signal(w.Inputs.data, data)
+        self.assertTrue(w.Warning.ignoring_discrete.is_shown())
+        self.assertTrue(w.Warning.imputing_data.is_shown())
+        self.assertEqual(len(list(leaves(w.root))), len(data))
+
+        data = Table("zoo")
+        data = data.transform(Domain(data.domain.attributes[:2]))
+        self.send_signal(w.Inputs.data, data)
+        self.assertTrue(w.Error.no_continuous_features.is_shown())
+        self.assertIsNone(w.root)
+
+    def test_data_linkage(self):
+        w = self.widget
+        rs = np.random.RandomState(0)
+        data = Table.from_numpy(
+            Domain([ContinuousVariable(f"x{i}") for i in range(3)]),
+            rs.random_sample((50, 3)))
+
+        def leaf_order():
+            return [leaf.value.index for leaf in leaves(w.root)]
+
+        self.send_signal(w.Inputs.distances, Euclidean(data))
+        expected = leaf_order()
+        self.send_signal(w.Inputs.distances, None)
+        self.send_signal(w.Inputs.data, data)
+        self.assertEqual(leaf_order(), expected)
+
+        with patch("Orange.widgets.unsupervised.owhierarchicalclustering."
+                   "DATA_LINKAGE_ROWS", 20), \
+                patch("Orange.widgets.unsupervised.owhierarchicalclustering."
+                      "data_linkage", wraps=data_linkage) as linkage:
+            w._invalidate_clustering()
+            linkage.assert_called_once()
+            self.assertEqual(leaf_order(), expected)
+
+            w.linkage = LINKAGE.index("Weighted")
+            w._invalidate_clustering()
+            self.assertTrue(w.Error.data_linkage.is_shown())
+            self.assertIsNone(w.root)
+
+            w.linkage = LINKAGE.index("Ward")
+            w._invalidate_clustering()
+            self.assertFalse(w.Error.data_linkage.is_shown())
+            self.assertIsNotNone(w.root)
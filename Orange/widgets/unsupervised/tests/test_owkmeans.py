@@ -453,6 +453,26 @@ class TestOWKMeans(WidgetTest):
         self.send_signal(self.widget.Inputs.data, table)
         self.assertTrue(self.widget.Error.no_attributes.is_shown())
 
+    def test_mini_batch_for_large_data(self):
+        widget = self.widget
+        widget.auto_commit = True
+        widget.k = 3
+        widget.optimize_k = False
+
+        with patch("Orange.widgets.unsupervised.owkmeans."
+                   "MINI_BATCH_THRESHOLD", 100):
+            self.send_signal(widget.Inputs.data, self.iris)
+            self.wait_until_stop_blocking()
+            self.assertTrue(widget.Information.mini_batch.is_shown())
+            self.assertIsInstance(widget.clusterings[3],
+                                  Orange.clustering.kmeans.MiniBatchKMeansModel)
+            self.assertIsNotNone(
+                self.get_output(widget.Outputs.annotated_data))
+
+            self.send_signal(widget.Inputs.data, self.iris[:100])
+            self.wait_until_stop_blocking()
+            self.assertFalse(widget.Information.mini_batch.is_shown())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -127,6 +127,22 @@ class TestOWMDS(WidgetTest, ProjectionWidgetTestMixin,
         self.widget.initialization = 0
         self.widget._OWMDS__invalidate_embedding()  # pylint: disable=protected-access
 
+    @patch("Orange.widgets.unsupervised.owmds.MAX_MATRIX_ROWS", 100)
+    def test_large_data(self):
+        with patch("Orange.projection.MDS.__call__") as smacof:
+            self.send_signal(self.widget.Inputs.data, self.data)
+            output = self.get_output(
+                self.widget.Outputs.annotated_data, wait=5000)
+            smacof.assert_not_called()
+        self.assertIsNone(self.widget.effective_matrix)
+        self.assertTrue(self.widget.Information.landmark.is_shown())
+        self.assertEqual(self.widget.embedding.shape, (len(self.data), 2))
+        self.assertTrue(np.all(np.isfinite(output.metas[:, :2])))
+
+        self.send_signal(self.widget.Inputs.data, self.data[:50])
+        self.assertFalse(self.widget.Information.landmark.is_shown())
+        self.assertIsNotNone(self.widget.effective_matrix)
+
     def test_migrate_settings_from_version_1(self):
         context_settings = [
             Context(attributes={'iris': 1,
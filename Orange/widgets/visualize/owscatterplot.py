@@ -13,6 +13,7 @@ import pyqtgraph as pg
 
 from Orange.data import Table, Domain, DiscreteVariable, Variable, \
     ContinuousVariable
+from Orange.data.sql.backend.base import BackendError
 from Orange.data.sql.table import SqlTable, AUTO_DL_LIMIT
 from Orange.preprocess.score import ReliefF, RReliefF
 
@@ -20,6 +21,7 @@ from Orange.widgets import gui
 from Orange.widgets.io import MatplotlibFormat, MatplotlibPDFFormat
 from Orange.widgets.settings import (
     Setting, ContextSetting, SettingProvider, IncompatibleContext)
+from Orange.widgets.utils.concurrent import FutureWatcher
 from Orange.widgets.utils.itemmodels import DomainModel
 from Orange.widgets.utils.widgetpreview import WidgetPreview
 from Orange.widgets.visualize.owscatterplotgraph import OWScatterPlotBase
@@ -28,6 +30,15 @@ from Orange.widgets.visualize.utils.widget import OWDataProjectionWidget
 from Orange.widgets.widget import AttributeList, Msg, Input, Output
 
 
+def sample_sql(data, time):
+    """Return a sample of the SqlTable, drawn in the given time, as Table"""
+    data_sample = data.sample_time(time, no_cache=True)
+    if not data_sample:
+        return None
+    data_sample.download_data(2000, partial=True)
+    return Table(data_sample)
+
+
 class ScatterPlotVizRank(VizRankDialogAttrPair):
     captionTitle = "Score Plots"
     minK = 10
@@ -244,6 +255,7 @@ class OWScatterPlot(OWDataProjectionWidget):
         self.attribute_selection_list = None  # list of Orange.data.Variable
         self.__timer = QTimer(self, interval=1200)
         self.__timer.timeout.connect(self.add_data)
+        self.__sample = None  # QueryFuture with the sample being drawn
         super().__init__()
 
         # manually register Matplotlib file writers
@@ -343,6 +355,7 @@ class OWScatterPlot(OWDataProjectionWidget):
     def check_data(self):
         self.clear_messages()
         self.__timer.stop()
+        self.cancel_sampling()
         self.sampling.setVisible(False)
         self.sql_data = None
         if isinstance(self.data, SqlTable):
@@ -402,13 +415,33 @@ class OWScatterPlot(OWDataProjectionWidget):
         if self.data and len(self.data) > 2000:
             self.__timer.stop()
             return
-        data_sample = self.sql_data.sample_time(time, no_cache=True)
-        if data_sample:
-            data_sample.download_data(2000, partial=True)
-            data = Table(data_sample)
+        if self.__sample is not None:  # the previous sample is not ready yet
+            return
+        # the sample is drawn in a separate thread and its query is
+        # cancelled if the data or sampling change in the meantime
+        self.__sample = self.sql_data.backend.submit(
+            sample_sql, self.sql_data, time)
+        watcher = FutureWatcher(self.__sample, parent=self)
+        watcher.done.connect(self._on_sample_done)
+
+    def _on_sample_done(self, future):
+        if future is not self.__sample:  # cancelled
+            return
+        self.__sample = None
+        try:
+            data = future.result()
+        except BackendError:
+            return
+        if data is not None:
             self.data = Table.concatenate((self.data, data), axis=0)
             self.handleNewSignals()
 
+    def cancel_sampling(self):
+        """Cancel drawing of the sample that is not ready yet"""
+        if self.__sample is not None:
+            self.__sample.cancel()
+            self.__sample = None
+
     def init_attr_values(self):
         super().init_attr_values()
         data = self.data
@@ -420,6 +453,7 @@ class OWScatterPlot(OWDataProjectionWidget):
 
     def switch_sampling(self):
         self.__timer.stop()
+        self.cancel_sampling()
         if self.auto_sample and self.sql_data:
             self.add_data()
             self.__timer.start()
@@ -483,6 +517,11 @@ class OWScatterPlot(OWDataProjectionWidget):
         features = [attr for attr in [self.attr_x, self.attr_y] if attr]
         self.Outputs.features.send(features or None)
 
+    def onDeleteWidget(self):
+        self.__timer.stop()
+        self.cancel_sampling()
+        super().onDeleteWidget()
+
     def get_widget_name_extension(self):
         if self.data is not None:
             return "{} vs {}".format(self.attr_x.name, self.attr_y.name)
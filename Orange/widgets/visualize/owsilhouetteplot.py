@@ -22,6 +22,7 @@ import pyqtgraph as pg
 
 import Orange.data
 import Orange.distance
+from Orange.evaluation.clustering import silhouette_estimate
 
 from Orange.widgets import widget, gui, settings
 from Orange.widgets.utils import itemmodels
@@ -36,6 +37,9 @@ from Orange.widgets.visualize.owheatmap import scaled
 
 
 ROW_NAMES_WIDTH = 200
+#: Silhouettes of larger data are computed for a stratified sample of this
+#: many instances, without computing the full distance matrix
+MAX_MATRIX_ROWS = 10000
 
 
 class OWSilhouettePlot(widget.OWWidget):
@@ -94,12 +98,19 @@ class OWSilhouettePlot(widget.OWWidget):
         nan_distances = Msg("{} instance{s} omitted (undefined distances)")
         ignoring_categorical = Msg("Ignoring categorical features")
 
+    class Information(widget.OWWidget.Information):
+        sampled = Msg("Showing a sample of {} instances; "
+                      "average silhouette {:.3f} ± {:.3f}")
+
     def __init__(self):
         super().__init__()
         #: The input data
         self.data = None         # type: Optional[Orange.data.Table]
         #: Distance matrix computed from data
         self._matrix = None      # type: Optional[Orange.misc.DistMatrix]
+        #: Data and fitted distance for large data, for which silhouettes
+        #: are computed on a sample, without the distance matrix
+        self._sample_distances = None
         #: An bool mask (size == len(data)) indicating missing group/cluster
         #: assignments
         self._mask = None        # type: Optional[np.ndarray]
@@ -217,6 +228,7 @@ class OWSilhouettePlot(widget.OWWidget):
         """
         self.data = None
         self._matrix = None
+        self._sample_distances = None
         self._mask = None
         self._silhouette = None
         self._labels = None
@@ -225,6 +237,7 @@ class OWSilhouettePlot(widget.OWWidget):
         self._clear_scene()
         self.Error.clear()
         self.Warning.clear()
+        self.Information.clear()
 
     def _clear_scene(self):
         # Clear the graphics scene and associated objects
@@ -234,7 +247,7 @@ class OWSilhouettePlot(widget.OWWidget):
 
     def _invalidate_distances(self):
         # Invalidate the computed distance matrix and recompute the silhouette.
-        self._matrix = None
+        self._matrix = self._sample_distances = None
         self._invalidate_scores()
 
     def _invalidate_scores(self):
@@ -253,7 +266,8 @@ class OWSilhouettePlot(widget.OWWidget):
             self._reset_all()
             return
 
-        if self._matrix is None and self.data is not None:
+        if self._matrix is None and self._sample_distances is None \
+                and self.data is not None:
             _, metric = self.Distances[self.distance_idx]
             data = self.data
             if not metric.supports_discrete and any(
@@ -261,7 +275,10 @@ class OWSilhouettePlot(widget.OWWidget):
                 self.Warning.ignoring_categorical()
                 data = Orange.distance.remove_discrete_features(data)
             try:
-                self._matrix = np.asarray(metric(data))
+                if len(data) > MAX_MATRIX_ROWS:
+                    self._sample_distances = data, metric().fit(data)
+                else:
+                    self._matrix = np.asarray(metric(data))
             except MemoryError:
                 self.Error.memory_error()
                 return
@@ -276,18 +293,23 @@ class OWSilhouettePlot(widget.OWWidget):
         self._silhouette = None
         self._labels = None
         self._matrix = None
+        self._sample_distances = None
         self._clear_scene()
 
     def _clear_messages(self):
         self.Error.clear()
         self.Warning.clear()
+        self.Information.clear()
 
     def _update_labels(self):
         labelvar = self.cluster_var_model[self.cluster_var_idx]
         labels, _ = self.data.get_column_view(labelvar)
         labels = np.asarray(labels, dtype=float)
         cluster_mask = np.isnan(labels)
-        dist_mask = np.isnan(self._matrix).all(axis=0)
+        if self._matrix is not None:
+            dist_mask = np.isnan(self._matrix).all(axis=0)
+        else:
+            dist_mask = np.zeros(len(labels), dtype=bool)
         mask = cluster_mask | dist_mask
         labels = labels.astype(int)
         labels = labels[~mask]
@@ -300,6 +322,8 @@ class OWSilhouettePlot(widget.OWWidget):
         elif len(labels_unq) == len(labels):
             self.Error.singleton_clusters_all()
             labels = silhouette = mask = None
+        elif self._matrix is None:
+            mask, labels, silhouette = self._sample_silhouette(mask, labels)
         else:
             silhouette = sklearn.metrics.silhouette_samples(
                 self._matrix[~mask, :][:, ~mask], labels, metric="precomputed")
@@ -317,6 +341,25 @@ class OWSilhouettePlot(widget.OWWidget):
                 self.Warning.nan_distances(
                     count_nandist, s="s" if count_nandist > 1 else "")
 
+    def _sample_silhouette(self, mask, labels):
+        # Compute silhouettes for a stratified sample of instances with
+        # valid assignments; the remaining instances are masked
+        data, distance = self._sample_distances
+        valid = np.flatnonzero(~mask)
+        estimate = silhouette_estimate(
+            data[valid], labels, sample_size=MAX_MATRIX_ROWS,
+            metric=distance, random_state=0)
+        order = np.argsort(estimate.rows)
+        rows = estimate.rows[order]
+        silhouette = estimate.scores[order]
+        defined = ~np.isnan(silhouette)
+        mask = np.ones(len(mask), dtype=bool)
+        mask[valid[rows[defined]]] = False
+        self.Information.sampled(
+            np.count_nonzero(defined), estimate.mean,
+            1.96 * estimate.std_error)
+        return mask, labels[rows[defined]], silhouette[defined]
+
     def _set_bar_height(self):
         visible = self.bar_size >= 5
         self._silplot.setBarHeight(self.bar_size)
@@ -1,6 +1,10 @@
 # Test methods with long descriptive names can omit docstrings
 # pylint: disable=missing-docstring,too-many-public-methods,protected-access
 # pylint: disable=too-many-lines
+import os
+import sqlite3
+import tempfile
+import threading
 from unittest.mock import MagicMock, patch, Mock
 import numpy as np
 
@@ -9,6 +13,8 @@ from AnyQt.QtWidgets import QToolTip
 from AnyQt.QtGui import QColor
 
 from Orange.data import Table, Domain, ContinuousVariable, DiscreteVariable
+from Orange.data.sql.backend import SQLiteBackend
+from Orange.data.sql.table import SqlTable
 from Orange.widgets.tests.base import (
     WidgetTest, WidgetOutputsTestMixin, datasets, ProjectionWidgetTestMixin
 )
@@ -1006,6 +1012,49 @@ class TestOWScatterPlot(WidgetTest, ProjectionWidgetTestMixin,
         urline.assert_called_once()
         urline.reset_mock()
 
+    def test_sql_sampling(self):
+        fd, database = tempfile.mkstemp(suffix=".sqlite")
+        os.close(fd)
+        self.addCleanup(os.remove, database)
+        with sqlite3.connect(database) as conn:
+            conn.execute("CREATE TABLE points (x REAL, y REAL)")
+            conn.executemany("INSERT INTO points VALUES (?, ?)",
+                             np.random.RandomState(0).rand(5000, 2).tolist())
+        conn.close()
+        table = SqlTable(dict(database=database), "points",
+                         backend=SQLiteBackend)
+        widget = self.widget
+        widget.auto_sample = False
+        # inputs are converted by check_sql_input, so set data directly
+        widget.data = table
+        widget.check_data()
+        widget.init_attr_values()
+        self.assertTrue(widget.Information.sampled_sql.is_shown())
+        n_rows = len(widget.data)
+
+        # further samples are drawn in a separate thread
+        widget.add_data()
+        self.process_events(lambda: len(widget.data) > n_rows)
+
+        # samples that are not ready are cancelled when data changes
+        started, release = threading.Event(), threading.Event()
+
+        def sample_sql(data, time):
+            started.set()
+            release.wait(5)
+
+        with patch("Orange.widgets.visualize.owscatterplot.sample_sql",
+                   sample_sql):
+            widget.data = widget.data[:100]
+            widget.add_data()
+            future = widget._OWScatterPlot__sample
+            self.assertTrue(started.wait(5))
+            self.send_signal(widget.Inputs.data, None)
+            release.set()
+        self.assertTrue(future.cancelled())
+        self.process_events()
+        self.assertIsNone(widget.data)
+
 
 if __name__ == "__main__":
     import unittest
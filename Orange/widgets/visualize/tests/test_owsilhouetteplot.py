@@ -3,6 +3,7 @@
 # pylint: disable=missing-docstring
 import random
 import unittest
+from unittest.mock import patch
 
 import numpy as np
 
@@ -157,3 +158,19 @@ class TestOWSilhouettePlot(WidgetTest, WidgetOutputsTestMixin):
         )
         self.widget.controls.add_scores.setChecked(1)
         self.send_signal(self.widget.Inputs.data, table)
+
+    def test_large_data_sample(self):
+        with patch("Orange.widgets.visualize.owsilhouetteplot."
+                   "MAX_MATRIX_ROWS", 60):
+            self.widget.controls.add_scores.setChecked(1)
+            self.send_signal(self.widget.Inputs.data, self.data)
+            self.assertTrue(self.widget.Information.sampled.is_shown())
+            self.assertIsNone(self.widget._matrix)
+            self.assertEqual(len(self.widget._silhouette), 60)
+            output = self.get_output(self.widget.Outputs.annotated_data)
+            scores = output.get_column_view(self.scorename)[0]
+            self.assertEqual(np.count_nonzero(~np.isnan(scores)), 60)
+
+        self.send_signal(self.widget.Inputs.data, self.data)
+        self.assertFalse(self.widget.Information.sampled.is_shown())
+        self.assertEqual(len(self.widget._silhouette), len(self.data))